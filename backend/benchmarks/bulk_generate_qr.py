@@ -0,0 +1,62 @@
+"""
+Throughput of registering N components by looping over
+POST /manufacturer/components/generate_qr versus one bulk job.
+
+    python -m benchmarks.bulk_generate_qr [--mock] [--count 2000]
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import use_bench_database, use_mock_mongo, app_client, login_as, sample_component
+
+
+async def main(args):
+    use_bench_database()
+    if args.mock:
+        use_mock_mongo()
+    from db.client import components_collection, counters_collection
+    from core.qr import shutdown_render_pool
+    from core.jobs import job_queue
+
+    await components_collection.delete_many({})
+    await counters_collection.delete_many({})
+    comps = [sample_component(i) for i in range(args.count)]
+
+    # the ASGI transport skips startup hooks, so run this process's job workers here
+    job_queue.start()
+    async with app_client() as client:
+        headers = await login_as(client, "bench_bulk_mfr", "MANUFACTURER")
+
+        start = time.perf_counter()
+        for comp in comps:
+            r = await client.post("/manufacturer/components/generate_qr", json=comp, headers=headers)
+            r.raise_for_status()
+        single_secs = time.perf_counter() - start
+
+        start = time.perf_counter()
+        r = await client.post("/manufacturer/components/generate_qr/bulk", json=comps, headers=headers)
+        r.raise_for_status()
+        job_id = r.json()["job_id"]
+        async with client.stream("GET", f"/manufacturer/jobs/{job_id}/progress", headers=headers) as progress:
+            async for line in progress.aiter_lines():
+                last = json.loads(line)
+        bulk_secs = time.perf_counter() - start
+        assert last["status"] == "SUCCEEDED", last
+
+    await job_queue.stop()
+    shutdown_render_pool()
+    await components_collection.delete_many({})
+    print(json.dumps({
+        "count": args.count,
+        "single_endpoint_loop": {"seconds": round(single_secs, 2), "components_per_sec": round(args.count / single_secs, 1)},
+        "bulk_job": {"seconds": round(bulk_secs, 2), "components_per_sec": round(args.count / bulk_secs, 1)},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mock", action="store_true", help="use mongomock-motor instead of MONGODB_URI")
+    parser.add_argument("--count", type=int, default=2000)
+    asyncio.run(main(parser.parse_args()))
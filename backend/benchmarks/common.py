@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+import statistics
+
+
+def use_bench_database():
+    """
+    Points db.client at a throwaway database (MONGODB_DB, default railway_bench)
+    because the benchmarks wipe the collections they use.
+    """
+    if "db.client" in sys.modules:
+        raise RuntimeError("use_bench_database() must run before db.client is imported")
+    os.environ.setdefault("MONGODB_DB", "railway_bench")
+
+
+def use_mock_mongo():
+    """
+    Swaps Motor for mongomock-motor before db.client is imported, so the
+    benchmarks can run without a MongoDB server.
+    """
+    if "db.client" in sys.modules:
+        raise RuntimeError("use_mock_mongo() must run before db.client is imported")
+    import motor.motor_asyncio
+    import mongomock.collection
+    from mongomock_motor import AsyncMongoMockClient
+    motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+
+    # pymongo >= 4.11 passes sort= to bulk update builders; mongomock predates it
+    add_update = mongomock.collection.BulkOperationBuilder.add_update
+    if "sort" not in add_update.__code__.co_varnames:
+        def add_update_compat(self, *args, sort=None, **kwargs):
+            return add_update(self, *args, **kwargs)
+        mongomock.collection.BulkOperationBuilder.add_update = add_update_compat
+
+    # mongomock ignores partialFilterExpression, so a partial unique index would
+    # reject every document lacking the key; leave those indexes out
+    create_indexes = mongomock.collection.Collection.create_indexes
+    def create_indexes_compat(self, indexes, *args, **kwargs):
+        full = [i for i in indexes if "partialFilterExpression" not in i.document]
+        return create_indexes(self, full, *args, **kwargs) if full else []
+    mongomock.collection.Collection.create_indexes = create_indexes_compat
+
+
+def summarize(samples):
+    """Latency summary in milliseconds for a list of durations in seconds."""
+    ordered = sorted(samples)
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(pct(50), 3),
+        "p95_ms": round(pct(95), 3),
+        "p99_ms": round(pct(99), 3),
+    }
+
+
+async def timed(coro_fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await coro_fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def app_client():
+    """httpx client wired straight to the FastAPI app (no network, no uvicorn)."""
+    import httpx
+    from main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None)
+
+
+async def login_as(client, username, role, password="bench-password"):
+    await client.post("/auth/register", json={
+        "username": username, "email": f"{username}@example.com", "password": password,
+        "phone": "0000000000", "role": role, "company_name": f"{username} Ltd",
+    })
+    r = await client.post("/auth/login", json={"username": username, "password": password, "role": role})
+    r.raise_for_status()
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def sample_component(i=0):
+    return {
+        "item_code": "ERC-MK-V",
+        "component_name": ["Rail Clip", "Fish Plate", "Rail Pad", "Base Plate"][i % 4],
+        "specifications": {"material": "Spring steel", "hardness": "44-48 HRC"},
+        "batch_number": f"BATCH{i // 500:04d}",
+        "serial_number": f"SER{i:08d}",
+        "production_date": "2026-01-15T00:00:00",
+        "warranty_period": 24,
+        "unit_weight": 0.9,
+        "irs_specification": "IRS-T-31",
+    }
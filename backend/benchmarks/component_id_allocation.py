@@ -0,0 +1,70 @@
+"""
+Compares component_id allocation cost as the components collection grows:
+the old full-collection scan versus the atomic day counter.
+
+    python -m benchmarks.component_id_allocation [--mock] [--sizes 1000,10000,50000]
+
+Runs against the railway_bench database on MONGODB_URI, or mongomock-motor with --mock.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime
+
+from benchmarks.common import use_bench_database, use_mock_mongo, summarize, timed
+
+QR_DATA = "data:image/png;base64," + "A" * 4000  # roughly the size of a real QR PNG
+
+
+async def seed(components_collection, total):
+    have = await components_collection.count_documents({})
+    batch = []
+    for i in range(have, total):
+        batch.append({"component_id": f"SEED{i:08d}", "qr_data": QR_DATA, "generated_at": datetime.utcnow()})
+        if len(batch) == 1000:
+            await components_collection.insert_many(batch)
+            batch = []
+    if batch:
+        await components_collection.insert_many(batch)
+
+
+async def main(args):
+    use_bench_database()
+    if args.mock:
+        use_mock_mongo()
+    from db.client import components_collection, counters_collection
+    from db import counters
+
+    await components_collection.delete_many({})
+    await counters_collection.delete_many({})
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        await seed(components_collection, size)
+
+        async def scan():
+            len(await components_collection.find().to_list(None)) + 1
+
+        scan_samples = await timed(scan, args.scan_repeat)
+        counter_samples = await timed(counters.next_component_id, args.repeat)
+        results.append({
+            "collection_size": size,
+            "full_scan": summarize(scan_samples),
+            "counter": summarize(counter_samples),
+        })
+        print(f"{size:>8} docs  scan p50 {results[-1]['full_scan']['p50_ms']:>9} ms  "
+              f"counter p50 {results[-1]['counter']['p50_ms']:>7} ms", file=sys.stderr)
+
+    await components_collection.delete_many({})
+    await counters_collection.delete_many({})
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mock", action="store_true", help="use mongomock-motor instead of MONGODB_URI")
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--scan-repeat", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,98 @@
+"""
+Replacement forecasts over a synthetic fleet: building the frame from
+components documents, topping it up with a batch of changed components, and
+computing forecasts at different groupings - against a plain Python loop
+over the documents, which is what a per-request scan would cost at best.
+
+    python -m benchmarks.forecast [--components 200000] [--changed 1000]
+
+Runs in-process on one core; no database needed.
+"""
+import argparse
+import json
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+
+
+def fleet(count: int, now: datetime) -> list:
+    rng = random.Random(1)
+    item_codes = [f"ITEM-{i:03d}" for i in range(40)]
+    manufacturers = [str(ObjectId()) for _ in range(25)]
+    docs = []
+    for i in range(count):
+        produced = now - timedelta(days=rng.randrange(0, 2500))
+        docs.append({
+            "_id": ObjectId(),
+            "item_code": rng.choice(item_codes),
+            "manufacturer_id": rng.choice(manufacturers),
+            "production_date": produced,
+            "expected_expiry": produced + timedelta(days=30 * rng.choice((24, 36, 60, 84))),
+            "status": "Needs Replacement" if rng.random() < 0.01 else "Installed",
+            "defect_count": rng.choice((0, 0, 0, 0, 1, 1, 2)),
+            "installation_point": {"type": "Point", "coordinates": [68 + 29 * rng.random(), 8 + 28 * rng.random()]},
+            "updated_at": now,
+        })
+    return docs
+
+
+def python_forecast(docs: list, today: int, horizon: int) -> float:
+    """Expected total from one pass per document, rates included; no bucketing or grouping."""
+    from core.forecast import _day, FORECAST_PRIOR_DAYS
+    defects, exposure = {}, {}
+    for d in docs:
+        g = (d["item_code"], d["manufacturer_id"])
+        defects[g] = defects.get(g, 0) + d["defect_count"]
+        exposure[g] = exposure.get(g, 0) + max(today - _day(d["production_date"]), 0)
+    fleet_rate = sum(defects.values()) / sum(exposure.values())
+    rate = {g: (defects[g] + FORECAST_PRIOR_DAYS * fleet_rate) / (exposure[g] + FORECAST_PRIOR_DAYS) for g in defects}
+    total = 0.0
+    for d in docs:
+        left = _day(d["expected_expiry"]) - today
+        if d["status"] == "Needs Replacement" or left < horizon:
+            total += 1
+        else:
+            total += 1 - math.exp(-rate[(d["item_code"], d["manufacturer_id"])] * horizon)
+    return total
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, round((time.perf_counter() - start) * 1000, 1)
+
+
+def main(args):
+    from core.forecast import FleetFrame, compute_forecast, _day
+
+    now = datetime.utcnow()
+    today = _day(now)
+    docs = fleet(args.components, now)
+    report = {"components": args.components}
+
+    frame = FleetFrame()
+    _, report["frame_load_ms"] = timed(lambda: [frame.apply(docs[i:i + 5000]) for i in range(0, len(docs), 5000)])
+
+    rng = random.Random(2)
+    changed = [dict(d, defect_count=d["defect_count"] + 1) for d in rng.sample(docs, args.changed)]
+    _, report[f"top_up_{args.changed}_changed_ms"] = timed(lambda: frame.apply(changed))
+    by_id = {d["_id"]: d for d in changed}
+    docs = [by_id.get(d["_id"], d) for d in docs]
+
+    expected, report["python_loop_ms"] = timed(lambda: python_forecast(docs, today, 90))
+    for group_by in ((), ("item_code",), ("item_code", "manufacturer_id"), ("location", "item_code")):
+        result, ms = timed(lambda: compute_forecast(frame, today, 90, 7, group_by))
+        report[f"numpy_{'+'.join(group_by) or 'total'}_ms"] = ms
+        report[f"numpy_{'+'.join(group_by) or 'total'}_groups"] = result["group_count"]
+    totals = compute_forecast(frame, today, 90, 7, ())["totals"]
+    report["expected_total"] = {"python": round(expected, 1), "numpy": round(totals["expected_total"], 1)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--components", type=int, default=200000)
+    parser.add_argument("--changed", type=int, default=1000)
+    main(parser.parse_args())
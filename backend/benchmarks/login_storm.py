@@ -0,0 +1,90 @@
+"""
+Latency of an unrelated endpoint (GET /auth/me) while a burst of logins is
+being processed, e.g. at a shift change.
+
+    python -m benchmarks.login_storm [--mock] [--logins 100] [--inline]
+
+--inline runs bcrypt on the event loop (PASSWORD_HASH_WORKERS=0), which is
+how login behaved before hashing moved to the thread pool.
+"""
+import os
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import use_bench_database, use_mock_mongo, app_client, login_as, summarize
+
+
+async def main(args):
+    if args.inline:
+        os.environ["PASSWORD_HASH_WORKERS"] = "0"
+    use_bench_database()
+    if args.mock:
+        use_mock_mongo()
+    from datetime import datetime
+    from db.client import users_collection
+    from core.security import get_password_hash, password_pool_stats
+
+    await users_collection.delete_many({"username": {"$regex": "^storm_"}})
+    hashed = get_password_hash("storm-password")
+    now = datetime.utcnow()
+    await users_collection.insert_many([
+        {"username": f"storm_{i}", "email": f"storm_{i}@example.com", "phone": "0", "role": "FIELD_INSPECTOR",
+         "password": hashed, "status": "ACTIVE", "created_at": now, "updated_at": now}
+        for i in range(args.logins)
+    ])
+
+    async with app_client() as client:
+        probe_headers = await login_as(client, "storm_probe", "FIELD_INSPECTOR")
+        probe_samples = []
+        storm_done = asyncio.Event()
+
+        async def probe_once(intended):
+            r = await client.get("/auth/me", headers=probe_headers)
+            r.raise_for_status()
+            probe_samples.append(time.perf_counter() - intended)
+
+        async def probe():
+            # open loop: latency counts from when the request *should* have
+            # been sent, so time spent with the event loop blocked shows up
+            interval = 0.01
+            first = time.perf_counter()
+            pending = []
+            k = 0
+            while not storm_done.is_set():
+                intended = first + k * interval
+                await asyncio.sleep(max(0, intended - time.perf_counter()))
+                pending.append(asyncio.create_task(probe_once(intended)))
+                k += 1
+            await asyncio.gather(*pending)
+
+        async def login(i):
+            r = await client.post("/auth/login", json={"username": f"storm_{i}", "password": "storm-password", "role": "FIELD_INSPECTOR"})
+            return r.status_code
+
+        probe_task = asyncio.create_task(probe())
+        await asyncio.sleep(0.1)
+        start = time.perf_counter()
+        codes = await asyncio.gather(*(login(i) for i in range(args.logins)))
+        storm_secs = time.perf_counter() - start
+        storm_done.set()
+        await probe_task
+
+    await users_collection.delete_many({"username": {"$regex": "^storm_"}})
+    print(json.dumps({
+        "mode": "inline" if args.inline else "thread_pool",
+        "logins": args.logins,
+        "login_status_codes": {str(c): codes.count(c) for c in set(codes)},
+        "storm_seconds": round(storm_secs, 2),
+        "unrelated_endpoint_latency": summarize(probe_samples),
+        "password_pool": password_pool_stats,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mock", action="store_true", help="use mongomock-motor instead of MONGODB_URI")
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--inline", action="store_true", help="hash on the event loop (old behaviour)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,55 @@
+"""
+Per-request cost of resolving the manufacturer in get_current_manufacturer:
+a profile lookup on every request versus the principal cache versus the
+mid claim embedded in the JWT at login.
+
+    python -m benchmarks.manufacturer_auth [--mock] [--requests 2000]
+
+The route used (/manufacturer/jobs/<unknown>) does no work of its own, so
+the numbers are dominated by authentication.
+"""
+import argparse
+import asyncio
+import json
+
+from benchmarks.common import use_bench_database, use_mock_mongo, app_client, login_as, summarize, timed
+
+
+async def main(args):
+    use_bench_database()
+    if args.mock:
+        use_mock_mongo()
+    from core import security
+
+    async with app_client() as client:
+        mid_headers = await login_as(client, "bench_auth_mfr", "MANUFACTURER")
+        # a token without the mid claim, as issued before it existed
+        legacy_token = security.create_access_token({"sub": "bench_auth_mfr", "role": "MANUFACTURER"})
+        legacy_headers = {"Authorization": f"Bearer {legacy_token}"}
+
+        async def request(headers):
+            r = await client.get("/manufacturer/jobs/none", headers=headers)
+            assert r.status_code == 404, r.text
+
+        async def uncached():
+            security.manufacturer_cache.clear()
+            await request(legacy_headers)
+
+        async def cached():
+            await request(legacy_headers)
+
+        async def mid_claim():
+            await request(mid_headers)
+
+        results = {}
+        for name, fn in (("db_lookup_every_request", uncached), ("principal_cache", cached), ("jwt_mid_claim", mid_claim)):
+            await timed(fn, 50)  # warm-up
+            results[name] = summarize(await timed(fn, args.requests))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mock", action="store_true", help="use mongomock-motor instead of MONGODB_URI")
+    parser.add_argument("--requests", type=int, default=2000)
+    asyncio.run(main(parser.parse_args()))
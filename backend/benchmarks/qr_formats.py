@@ -0,0 +1,57 @@
+"""
+Render time and output size per QR format, against the original Pillow PNG
+path (and its base64 data URI, which is what generate_qr used to return).
+
+    python -m benchmarks.qr_formats [--count 500] [--error-correction M]
+
+Runs in-process on one core; no database needed.
+"""
+import argparse
+import json
+import time
+from bson import ObjectId
+
+from benchmarks.common import summarize
+
+
+def main(args):
+    from core.qr import render_qr, render_qr_png_pillow, to_data_uri, qr_options, render_cache
+
+    payloads = [str(ObjectId()) for _ in range(args.count)]
+    opts = qr_options(args.error_correction)
+    renderers = {
+        "png_pillow": render_qr_png_pillow,
+        "png_pillow_data_uri": lambda p: to_data_uri(render_qr_png_pillow(p)).encode(),
+        "png": lambda p: render_qr(p, "png", opts),
+        "svg": lambda p: render_qr(p, "svg", opts),
+        "matrix": lambda p: render_qr(p, "matrix", opts),
+    }
+
+    results = {}
+    for name, render in renderers.items():
+        samples, sizes = [], []
+        for p in payloads:
+            start = time.perf_counter()
+            out = render(p)
+            samples.append(time.perf_counter() - start)
+            sizes.append(len(out))
+        results[name] = {**summarize(samples), "mean_bytes": round(sum(sizes) / len(sizes), 1)}
+
+    # Reprints: the render cache lookup render_qr_async does before rendering
+    for p in payloads:
+        render_cache.set((p, "png", opts), render_qr(p, "png", opts))
+    samples = []
+    for p in payloads:
+        start = time.perf_counter()
+        render_cache.get((p, "png", opts))
+        samples.append(time.perf_counter() - start)
+    results["png_cached"] = summarize(samples)
+
+    print(json.dumps({"count": args.count, "error_correction": opts.error_correction, "formats": results}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--error-correction", default="M")
+    main(parser.parse_args())
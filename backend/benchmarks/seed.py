@@ -0,0 +1,169 @@
+"""
+Seeds the bench database with a realistic fleet: manufacturers, inspectors,
+components spread over the past year (some installed), and inspections.
+
+    python -m benchmarks.seed [--mock] [--components 1000000] [--inspections 200000]
+
+Every seeded account uses the password "bench-password". With --mock the data
+only lives as long as the process, so benchmarks.workload seeds in-process.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import use_bench_database, use_mock_mongo, sample_component
+
+PASSWORD = "bench-password"
+BATCH = 5000
+
+
+def _manufacturer_name(i):
+    return f"bench_mfr_{i}"
+
+
+def _inspector_name(i):
+    return f"bench_insp_{i}"
+
+
+async def seed(manufacturers=20, inspectors=50, components=1_000_000, inspections=200_000,
+               installed_fraction=0.3, defect_rate=0.05, rng_seed=7):
+    """
+    Wipes and reseeds the bench collections. Returns a fixture dict the
+    workload uses: usernames plus a sample of component ids per manufacturer.
+    """
+    from bson import ObjectId
+    from core.security import get_password_hash
+    from core.components import build_component_doc
+    from core.geo import geo_point
+    from db.client import db
+    from db.models.component import ComponentIn
+    from db.indexes import ensure_indexes
+    from db.rollups import rebuild_daily_stats
+    from db.migrations import inspection_stats
+
+    rng = random.Random(rng_seed)
+    for name in ("users", "manufacturers", "components", "inspections", "counters", "component_daily_stats", "view_cache"):
+        await db[name].delete_many({})
+    await ensure_indexes()
+
+    hashed = get_password_hash(PASSWORD)
+    now = datetime.utcnow()
+    users, profiles = [], []
+    for i in range(manufacturers):
+        username = _manufacturer_name(i)
+        users.append({"username": username, "email": f"{username}@example.com", "phone": "0", "role": "MANUFACTURER",
+                      "password": hashed, "status": "ACTIVE", "created_at": now, "updated_at": now})
+        profiles.append({"_id": ObjectId(), "username": username, "company_name": f"Bench Manufacturer {i}",
+                         "contact_email": f"{username}@example.com"})
+    for i in range(inspectors):
+        username = _inspector_name(i)
+        users.append({"username": username, "email": f"{username}@example.com", "phone": "0", "role": "FIELD_INSPECTOR",
+                      "password": hashed, "status": "ACTIVE", "created_at": now, "updated_at": now})
+    await db["users"].insert_many(users)
+    if profiles:
+        await db["manufacturers"].insert_many(profiles)
+    manufacturer_ids = [str(p["_id"]) for p in profiles]
+
+    # Components: one template per component type, stamped out with fresh ids.
+    # Dates stay before today so live ID allocation never collides with them.
+    templates = [ComponentIn(**sample_component(i)) for i in range(4)]
+    per_day = {}
+    sample_ids = {mid: [] for mid in manufacturer_ids}
+    all_ids = []
+    batch = []
+    for i in range(components):
+        mid = manufacturer_ids[i % len(manufacturer_ids)]
+        generated = now - timedelta(days=rng.randint(1, 365), seconds=rng.randint(0, 86399))
+        day = generated.strftime("%Y%m%d")
+        per_day[day] = per_day.get(day, 0) + 1
+        doc = build_component_doc(templates[i % 4], mid, f"COMP{day}{per_day[day]:06d}")
+        doc["serial_number"] = f"SER{i:08d}"
+        doc["qr_code"] = f"QRB{i:09d}"
+        doc["uuid"] = f"bench-{i:09d}"
+        doc["generated_at"] = doc["updated_at"] = generated
+        if rng.random() < installed_fraction:
+            # scattered along a rough north-south corridor
+            lat, lon = 8 + rng.random() * 20, 72 + rng.random() * 16
+            doc.update({"installation_location": f"{lat:.6f},{lon:.6f}", "installation_point": geo_point(lat, lon),
+                        "status": "Installed"})
+        batch.append(doc)
+        all_ids.append(doc["_id"])
+        if len(sample_ids[mid]) < 1000:
+            sample_ids[mid].append(str(doc["_id"]))
+        if len(batch) >= BATCH:
+            await db["components"].insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await db["components"].insert_many(batch, ordered=False)
+
+    batch = []
+    for i in range(inspections if all_ids else 0):
+        status = "DEFECTED" if rng.random() < defect_rate else "OK"
+        batch.append({
+            "component_id": str(rng.choice(all_ids)),
+            "inspected_by": _inspector_name(rng.randrange(max(1, inspectors))),
+            "status": status,
+            "defect_type": "Crack" if status == "DEFECTED" else None,
+            "comments": None,
+            "inspected_at": now - timedelta(minutes=rng.randint(1, 60 * 24 * 180)),
+        })
+        if len(batch) >= BATCH:
+            await db["inspections"].insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await db["inspections"].insert_many(batch, ordered=False)
+
+    await rebuild_daily_stats()
+    await inspection_stats()
+
+    return {
+        "manufacturers": [_manufacturer_name(i) for i in range(manufacturers)],
+        "inspectors": [_inspector_name(i) for i in range(inspectors)],
+        "component_ids": sample_ids,
+        "password": PASSWORD,
+    }
+
+
+async def load_fixture(sample_size=1000):
+    """The same fixture seed() returns, read back from an already-seeded database."""
+    from db.client import db
+    manufacturers = await db["manufacturers"].find({"username": {"$regex": "^bench_mfr_"}}).to_list(None)
+    inspectors = await db["users"].distinct("username", {"username": {"$regex": "^bench_insp_"}})
+    component_ids = {}
+    for m in manufacturers:
+        cursor = db["components"].find({"manufacturer_id": str(m["_id"])}, {"_id": 1}).limit(sample_size)
+        component_ids[str(m["_id"])] = [str(c["_id"]) async for c in cursor]
+    return {
+        "manufacturers": [m["username"] for m in manufacturers],
+        "inspectors": inspectors,
+        "component_ids": component_ids,
+        "password": PASSWORD,
+    }
+
+
+async def main(args):
+    use_bench_database()
+    if args.mock:
+        use_mock_mongo()
+    start = time.perf_counter()
+    fixture = await seed(args.manufacturers, args.inspectors, args.components, args.inspections)
+    print(json.dumps({
+        "manufacturers": len(fixture["manufacturers"]),
+        "inspectors": len(fixture["inspectors"]),
+        "components": args.components,
+        "inspections": args.inspections,
+        "seconds": round(time.perf_counter() - start, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mock", action="store_true", help="use mongomock-motor instead of MONGODB_URI")
+    parser.add_argument("--manufacturers", type=int, default=20)
+    parser.add_argument("--inspectors", type=int, default=50)
+    parser.add_argument("--components", type=int, default=1_000_000)
+    parser.add_argument("--inspections", type=int, default=200_000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,107 @@
+"""
+Cost of turning 1k component / inspection documents into a response body:
+the default path (pydantic model per document, jsonable_encoder, stdlib json)
+against trusted_serializer + orjson. No database needed.
+
+    python -m benchmarks.serialization [--docs 1000] [--repeat 50]
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import sample_component
+
+
+def component_docs(n: int) -> list:
+    from core.components import build_component_doc
+    from core.geo import geo_point
+    from db.models.component import ComponentIn
+    rng = random.Random(1)
+    docs = []
+    for i in range(n):
+        doc = build_component_doc(ComponentIn(**sample_component(i)), "665f1c2e9b1e8a3d4c2b1a00", f"COMP20260101{i:06d}")
+        doc.update(
+            status="Installed",
+            installation_location="12.97,77.59",
+            installation_point=geo_point(12.97 + rng.random(), 77.59 + rng.random()),
+            last_inspected_at=datetime(2026, 3, 1) + timedelta(minutes=i),
+            last_inspection_status="OK",
+            inspection_count=rng.randrange(1, 20),
+            defect_count=rng.randrange(0, 3),
+            defect_rate=rng.random() / 5,
+        )
+        docs.append(doc)
+    return docs
+
+
+def inspection_docs(n: int) -> list:
+    from bson import ObjectId
+    return [{
+        "_id": ObjectId(),
+        "component_id": "665f1c2e9b1e8a3d4c2b1a01",
+        "inspected_by": "inspector_7",
+        "status": "DEFECTED" if i % 20 == 0 else "OK",
+        "defect_type": "crack" if i % 20 == 0 else None,
+        "comments": "Routine check",
+        "inspected_at": datetime(2026, 3, 1) + timedelta(minutes=i),
+    } for i in range(n)]
+
+
+def measure(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(args):
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from core.components import component_out, qr_url
+    from core.serialization import FastJSONResponse, trusted_serializer
+    from db.models.component import ComponentOut
+    from models.Inspection import InspectionOut
+
+    components = component_docs(args.docs)
+    inspections = inspection_docs(args.docs)
+    inspection_out = trusted_serializer(InspectionOut)
+
+    cases = {
+        "components": (
+            lambda: JSONResponse(jsonable_encoder(
+                [ComponentOut(**c, manufacturer="ACME", qr_url=qr_url(c["_id"])) for c in components])).body,
+            lambda: FastJSONResponse(
+                [component_out(c, manufacturer="ACME", qr_url=qr_url(c["_id"])) for c in components]).body,
+        ),
+        "inspections": (
+            lambda: JSONResponse(jsonable_encoder(
+                [InspectionOut(**i, inspection_id=str(i["_id"])) for i in inspections])).body,
+            lambda: FastJSONResponse(
+                [inspection_out(i, inspection_id=str(i["_id"])) for i in inspections]).body,
+        ),
+    }
+
+    per_1k = 1000 / args.docs
+    report = {"docs": args.docs, "repeat": args.repeat}
+    for name, (default, fast) in cases.items():
+        assert json.loads(default()) == json.loads(fast()), f"{name}: fast path output differs"
+        default_ms = measure(default, args.repeat) * 1000 * per_1k
+        fast_ms = measure(fast, args.repeat) * 1000 * per_1k
+        report[name] = {
+            "pydantic_jsonable_encoder_ms_per_1k": round(default_ms, 2),
+            "trusted_orjson_ms_per_1k": round(fast_ms, 2),
+            "speedup": round(default_ms / fast_ms, 1),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    main(parser.parse_args())
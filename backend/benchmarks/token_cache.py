@@ -0,0 +1,51 @@
+"""
+Requests/sec on an authenticated no-op route (GET /auth/me) with and without
+the verified-JWT cache, plus the raw cost of decode_access_token.
+
+    python -m benchmarks.token_cache [--mock] [--requests 5000]
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import use_bench_database, use_mock_mongo, app_client, login_as
+
+
+async def main(args):
+    use_bench_database()
+    if args.mock:
+        use_mock_mongo()
+    from core import security
+
+    token = security.create_access_token({"sub": "bench_token_user", "role": "FIELD_INSPECTOR"})
+    results = {}
+
+    for name, enabled in (("uncached", False), ("cached", True)):
+        security.token_cache.clear()
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            if not enabled:
+                security.token_cache.clear()
+            security.decode_access_token(token)
+        results[f"decode_{name}_us"] = round((time.perf_counter() - start) / args.requests * 1e6, 2)
+
+    async with app_client() as client:
+        headers = await login_as(client, "bench_token_user", "FIELD_INSPECTOR")
+        for name, enabled in (("uncached", False), ("cached", True)):
+            security.token_cache.clear()
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                if not enabled:
+                    security.token_cache.clear()
+                r = await client.get("/auth/me", headers=headers)
+                r.raise_for_status()
+            results[f"requests_per_sec_{name}"] = round(args.requests / (time.perf_counter() - start), 1)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mock", action="store_true", help="use mongomock-motor instead of MONGODB_URI")
+    parser.add_argument("--requests", type=int, default=5000)
+    asyncio.run(main(parser.parse_args()))
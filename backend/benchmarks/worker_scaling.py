@@ -0,0 +1,140 @@
+"""
+Throughput of the scan and login mixes as serve.py goes from 1 to N worker
+processes, against a real MongoDB (mongomock can't be shared between
+processes, so there is no --mock here).
+
+    python -m benchmarks.worker_scaling [--workers 1,2,4] [--seed] [--components 100000]
+                                        [--duration 15] [--concurrency 64] [--clients 4]
+                                        [--out results.json]
+
+Each worker count gets a fresh `python serve.py` on --port. Load comes from
+--clients separate processes so the generator isn't the bottleneck; keep
+workers + clients within the machine's cores for a fair reading. Without
+--seed it expects data from `python -m benchmarks.seed`.
+
+    scan   GET  /inspection/component/{id}  cached views, mostly I/O
+    login  bursts of POST /auth/login        bcrypt, CPU bound
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import time
+
+from benchmarks.common import use_bench_database, summarize
+
+MIXES = {"scan": {"scan": 1}, "login": {"login": 1}}
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _drive(url, fixture, mix, duration, concurrency, rng_seed, login_burst):
+    """One load-generating process; returns (samples, errors) per endpoint."""
+    import httpx
+    from benchmarks.workload import Session, Recorder, run
+
+    async def go():
+        limits = httpx.Limits(max_connections=concurrency * max(1, login_burst))
+        async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as client:
+            recorder = Recorder()
+            session = Session(client, fixture, recorder, random.Random(rng_seed), login_burst)
+            await run(session, mix, duration, concurrency, rng_seed)
+            return recorder.samples, recorder.errors
+
+    return asyncio.run(go())
+
+
+def _wait_ready(url, timeout=60):
+    import httpx
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{url}/health/ready", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"Server at {url} did not become ready")
+
+
+def measure(args, fixture, workers: int, mix_name: str) -> dict:
+    url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--workers", str(workers), "--port", str(args.port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+    )
+    try:
+        _wait_ready(url)
+        # warm-up: fill every worker's caches and pools outside the measurement
+        _drive(url, fixture, MIXES[mix_name], 2, args.concurrency, 0, args.login_burst)
+        per_client = max(1, args.concurrency // args.clients)
+        jobs = [(url, fixture, MIXES[mix_name], args.duration, per_client, args.rng_seed + i, args.login_burst)
+                for i in range(args.clients)]
+        start = time.perf_counter()
+        with multiprocessing.get_context("spawn").Pool(args.clients) as pool:
+            results = pool.starmap(_drive, jobs)
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+    samples = [s for result, _ in results for values in result.values() for s in values]
+    errors = sum(n for _, errs in results for n in errs.values())
+    return {
+        "workers": workers,
+        **(summarize(samples) if samples else {"count": 0}),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / elapsed, 1),
+    }
+
+
+async def load(args):
+    from benchmarks.seed import seed, load_fixture
+    if args.seed:
+        return await seed(args.manufacturers, args.inspectors, args.components, args.inspections)
+    return await load_fixture()
+
+
+def main(args):
+    use_bench_database()
+    fixture = asyncio.run(load(args))
+    if not fixture["manufacturers"] or not fixture["inspectors"]:
+        raise SystemExit("No bench data found; run python -m benchmarks.seed or pass --seed")
+
+    worker_counts = [int(n) for n in args.workers.split(",")]
+    report = {"cores": os.cpu_count(), "clients": args.clients, "concurrency": args.concurrency,
+              "duration_s": args.duration, "mixes": {}}
+    for mix_name in args.mix.split(","):
+        rows = [measure(args, fixture, n, mix_name) for n in worker_counts]
+        base = rows[0]["throughput_rps"] or 1
+        for row in rows:
+            row["speedup"] = round(row["throughput_rps"] / base, 2)
+        report["mixes"][mix_name] = rows
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default=",".join(str(n) for n in sorted({1, 2, os.cpu_count() or 1})))
+    parser.add_argument("--mix", default="scan,login")
+    parser.add_argument("--seed", action="store_true", help="(re)seed the bench database first")
+    parser.add_argument("--manufacturers", type=int, default=20)
+    parser.add_argument("--inspectors", type=int, default=50)
+    parser.add_argument("--components", type=int, default=100_000)
+    parser.add_argument("--inspections", type=int, default=20_000)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--clients", type=int, default=2)
+    parser.add_argument("--login-burst", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--rng-seed", type=int, default=1)
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    main(parser.parse_args())
@@ -0,0 +1,240 @@
+"""
+Drives the app with a mix of field and office traffic and reports throughput
+and latency per endpoint as JSON, for comparing commits against a baseline.
+
+    python -m benchmarks.workload [--mock] [--seed] [--components 1000000]
+                                  [--duration 30] [--concurrency 32]
+                                  [--mix scan=60,install=8,inspect=15,list=10,generate=2,login=5]
+                                  [--out results.json]
+
+Without --seed it expects data from `python -m benchmarks.seed`. --mock
+implies --seed (mongomock keeps nothing between processes); keep
+--components small there. Operations:
+
+    scan      GET  /inspection/component/{id}        QR scan in the field
+    install   POST /components/{id}/install
+    inspect   POST /inspection/report
+    list      GET  /manufacturer/components/list     first page and one more
+    generate  POST /manufacturer/components/generate_qr
+    login     a burst of --login-burst concurrent POST /auth/login
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+
+from benchmarks.common import use_bench_database, use_mock_mongo, app_client, summarize, sample_component
+
+DEFAULT_MIX = "scan=60,install=8,inspect=15,list=10,generate=2,login=5"
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise SystemExit(f"Unknown operation in --mix: {name}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+
+    async def call(self, endpoint: str, request):
+        start = time.perf_counter()
+        try:
+            r = await request
+            ok = r.status_code < 400
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        if ok:
+            self.samples.setdefault(endpoint, []).append(elapsed)
+        else:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        return r if ok else None
+
+
+class Session:
+    """Shared state for the virtual users: fixture, tokens and a seeded RNG."""
+
+    def __init__(self, client, fixture, recorder, rng, login_burst):
+        self.client = client
+        self.fixture = fixture
+        self.recorder = recorder
+        self.rng = rng
+        self.login_burst = login_burst
+        self.all_ids = [cid for ids in fixture["component_ids"].values() for cid in ids]
+        self.tokens = {}
+
+    async def token(self, username, role):
+        if username not in self.tokens:
+            r = await self.client.post("/auth/login", json={
+                "username": username, "password": self.fixture["password"], "role": role,
+            })
+            r.raise_for_status()
+            self.tokens[username] = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        return self.tokens[username]
+
+    def inspector(self):
+        return self.rng.choice(self.fixture["inspectors"])
+
+    def manufacturer(self):
+        return self.rng.choice(self.fixture["manufacturers"])
+
+    def component(self):
+        return self.rng.choice(self.all_ids)
+
+
+async def op_scan(s: Session):
+    await s.recorder.call("GET /inspection/component/{id}", s.client.get(f"/inspection/component/{s.component()}"))
+
+
+async def op_install(s: Session):
+    headers = await s.token(s.inspector(), "FIELD_INSPECTOR")
+    body = {"latitude": 8 + s.rng.random() * 20, "longitude": 72 + s.rng.random() * 16}
+    await s.recorder.call("POST /components/{id}/install",
+                          s.client.post(f"/components/{s.component()}/install", json=body, headers=headers))
+
+
+async def op_inspect(s: Session):
+    headers = await s.token(s.inspector(), "FIELD_INSPECTOR")
+    status = "DEFECTED" if s.rng.random() < 0.05 else "OK"
+    body = {"component_id": s.component(), "status": status, "comments": "bench"}
+    await s.recorder.call("POST /inspection/report", s.client.post("/inspection/report", json=body, headers=headers))
+
+
+async def op_list(s: Session):
+    headers = await s.token(s.manufacturer(), "MANUFACTURER")
+    r = await s.recorder.call("GET /manufacturer/components/list",
+                              s.client.get("/manufacturer/components/list", params={"limit": 100}, headers=headers))
+    cursor = r.json().get("next_cursor") if r is not None else None
+    if cursor:
+        await s.recorder.call("GET /manufacturer/components/list",
+                              s.client.get("/manufacturer/components/list",
+                                           params={"limit": 100, "cursor": cursor}, headers=headers))
+
+
+async def op_generate(s: Session):
+    headers = await s.token(s.manufacturer(), "MANUFACTURER")
+    body = sample_component(s.rng.randrange(1000))
+    await s.recorder.call("POST /manufacturer/components/generate_qr",
+                          s.client.post("/manufacturer/components/generate_qr", json=body, headers=headers))
+
+
+async def op_login(s: Session):
+    # shift change: several inspectors log in at once
+    async def one():
+        body = {"username": s.inspector(), "password": s.fixture["password"], "role": "FIELD_INSPECTOR"}
+        await s.recorder.call("POST /auth/login", s.client.post("/auth/login", json=body))
+    await asyncio.gather(*(one() for _ in range(s.login_burst)))
+
+
+OPERATIONS = {
+    "scan": op_scan,
+    "install": op_install,
+    "inspect": op_inspect,
+    "list": op_list,
+    "generate": op_generate,
+    "login": op_login,
+}
+
+
+async def run(session: Session, mix: dict, duration: float, concurrency: int, seed: int):
+    names, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + duration
+
+    async def user(n):
+        rng = random.Random(seed + n)
+        while time.perf_counter() < deadline:
+            await OPERATIONS[rng.choices(names, weights)[0]](session)
+
+    await asyncio.gather(*(user(n) for n in range(concurrency)))
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+async def main(args):
+    use_bench_database()
+    if args.mock:
+        use_mock_mongo()
+        args.seed = True
+    from benchmarks.seed import seed, load_fixture
+    from core.qr import shutdown_render_pool
+
+    mix = parse_mix(args.mix)
+    if args.seed:
+        fixture = await seed(args.manufacturers, args.inspectors, args.components, args.inspections)
+    else:
+        fixture = await load_fixture()
+    if not fixture["manufacturers"] or not fixture["inspectors"]:
+        raise SystemExit("No bench data found; run python -m benchmarks.seed or pass --seed")
+
+    recorder = Recorder()
+    async with app_client() as client:
+        session = Session(client, fixture, recorder, random.Random(args.rng_seed), args.login_burst)
+        # warm-up: log everyone in and touch each route once, outside the measurement
+        for op in mix:
+            await OPERATIONS[op](session)
+        session.recorder = recorder = Recorder()
+
+        start = time.perf_counter()
+        await run(session, mix, args.duration, args.concurrency, args.rng_seed)
+        elapsed = time.perf_counter() - start
+    shutdown_render_pool()
+
+    endpoints = {}
+    for endpoint in sorted(set(recorder.samples) | set(recorder.errors)):
+        samples = recorder.samples.get(endpoint, [])
+        endpoints[endpoint] = {
+            **(summarize(samples) if samples else {"count": 0}),
+            "errors": recorder.errors.get(endpoint, 0),
+            "throughput_rps": round(len(samples) / elapsed, 1),
+        }
+    total = sum(len(v) for v in recorder.samples.values())
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "backend": "mongomock" if args.mock else "mongodb",
+        "settings": {
+            "duration_s": args.duration, "concurrency": args.concurrency, "mix": mix,
+            "components": args.components if args.seed else None, "login_burst": args.login_burst,
+        },
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(total / elapsed, 1),
+        "endpoints": endpoints,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mock", action="store_true", help="use mongomock-motor instead of MONGODB_URI")
+    parser.add_argument("--seed", action="store_true", help="(re)seed the bench database first")
+    parser.add_argument("--manufacturers", type=int, default=20)
+    parser.add_argument("--inspectors", type=int, default=50)
+    parser.add_argument("--components", type=int, default=1_000_000)
+    parser.add_argument("--inspections", type=int, default=200_000)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--login-burst", type=int, default=10)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--rng-seed", type=int, default=1)
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    asyncio.run(main(parser.parse_args()))
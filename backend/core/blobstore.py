@@ -0,0 +1,80 @@
+import os
+import asyncio
+import hashlib
+from core.config import QR_STORE_BACKEND, QR_STORE_PATH
+
+
+def content_key(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class LocalBlobStore:
+    """Content-addressed blobs on the local filesystem, fanned out by hash prefix."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def _write(self, key: str, data: bytes):
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _read(self, key: str):
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    async def put(self, data: bytes) -> str:
+        key = content_key(data)
+        await asyncio.to_thread(self._write, key, data)
+        return key
+
+    async def get(self, key: str):
+        return await asyncio.to_thread(self._read, key)
+
+
+class GridFSBlobStore:
+    """Content-addressed blobs in a GridFS bucket; the hash is the filename."""
+
+    def __init__(self, database, bucket_name: str = "qr_images"):
+        from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+        self.bucket = AsyncIOMotorGridFSBucket(database, bucket_name=bucket_name)
+        self.files = database[f"{bucket_name}.files"]
+
+    async def put(self, data: bytes) -> str:
+        key = content_key(data)
+        if not await self.files.find_one({"filename": key}, {"_id": 1}):
+            await self.bucket.upload_from_stream(key, data)
+        return key
+
+    async def get(self, key: str):
+        from gridfs.errors import NoFile
+        try:
+            stream = await self.bucket.open_download_stream_by_name(key)
+        except NoFile:
+            return None
+        return await stream.read()
+
+
+_store = None
+
+
+def get_blob_store():
+    global _store
+    if _store is None:
+        if QR_STORE_BACKEND == "gridfs":
+            from db.client import get_database
+            _store = GridFSBlobStore(get_database())
+        else:
+            _store = LocalBlobStore(QR_STORE_PATH)
+    return _store
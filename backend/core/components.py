@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+import uuid as uuidlib
+from bson import ObjectId
+from fastapi import HTTPException
+from db.models.component import ComponentIn, ComponentOut
+from core.serialization import trusted_serializer
+
+# QR images live in the blob store; never pull legacy inline copies on reads.
+# install_sync_keys is bookkeeping for /inspection/sync and never leaves the API.
+COMPONENT_PROJECTION = {"qr_data": 0, "install_sync_keys": 0}
+
+# Fields a client may ask for with ?fields=
+COMPONENT_FIELDS = (set(ComponentOut.model_fields) - {"qr_data", "qr_url", "manufacturer"}) | {
+    "_id", "uuid", "updated_at", "installed_by", "installation_point",
+}
+
+# Keys listings can be ordered and paged by
+COMPONENT_SORT_FIELDS = ("_id", "generated_at")
+
+
+def check_sort(sort: str, order: str) -> bool:
+    """Validates listing sort params and returns True for descending order."""
+    if sort not in COMPONENT_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(COMPONENT_SORT_FIELDS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be asc or desc")
+    return order == "desc"
+
+
+def projected_view(doc: dict) -> dict:
+    return {**doc, "_id": str(doc["_id"])}
+
+
+# ComponentOut as a plain dict, straight from a components document
+component_out = trusted_serializer(ComponentOut)
+
+
+def qr_url(component_id) -> str:
+    return f"/qr/{component_id}.png"
+
+
+def build_component_doc(comp: ComponentIn, manufacturer_id: str, component_id: str) -> dict:
+    """
+    Builds the components document for a new component. The _id is assigned
+    up front so the QR payload can be rendered before the document is written.
+    """
+    comp_uuid = comp.uuid or str(uuidlib.uuid4())
+    today = datetime.now().strftime('%Y%m%d')
+
+    # Calculate expiry date based on warranty
+    expected_expiry = comp.production_date + timedelta(days=comp.warranty_period * 30)
+
+    now = datetime.utcnow()
+    return {
+        "_id": ObjectId(),
+        "component_id": component_id,
+        # derived from the allocated component_id, so it is unique like it
+        "qr_code": f"QR{component_id.removeprefix('COMP')}",
+        "item_code": comp.item_code,
+        "component_name": comp.component_name,
+        "specifications": comp.specifications,
+        "batch_number": comp.batch_number or f"BATCH{today}01",
+        "serial_number": comp.serial_number or f"SER{today}{comp_uuid[-6:]}",
+        "manufacturer_id": manufacturer_id,
+        "production_date": comp.production_date,
+        "warranty_period": comp.warranty_period,
+        "unit_weight": comp.unit_weight,
+        "irs_specification": comp.irs_specification,
+        "generated_at": now,
+        "updated_at": now,
+        "qc_status": "Pending",
+        "uuid": comp_uuid,
+        "expected_expiry": expected_expiry
+    }
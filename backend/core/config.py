@@ -5,6 +5,127 @@ import os
 load_dotenv()
 
 MONGODB_URI = os.getenv("MONGODB_URI")
+MONGODB_DB = os.getenv("MONGODB_DB", "railway_db")
 SECRET_KEY = os.getenv("SECRET_KEY")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
+
+# MongoDB connection pool, per worker process. MONGO_MIN_POOL_SIZE connections
+# are opened before the app reports ready; requests wait at most
+# MONGO_WAIT_QUEUE_TIMEOUT_MS for a free one (0 = no limit).
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 10))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 300000))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 0))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 5000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 0))
+# primary, primaryPreferred, secondary, secondaryPreferred or nearest
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+# How long startup waits for the database (ping, warm-up, indexes) before
+# serving anyway; /health/ready answers 503 until it is done
+MONGO_STARTUP_TIMEOUT = float(os.getenv("MONGO_STARTUP_TIMEOUT", 30))
+
+# Worker processes started by serve.py. CPU pools below default to an even
+# share of the cores per worker, so N workers don't oversubscribe the machine.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 1))
+CPUS_PER_WORKER = max(1, (os.cpu_count() or 1) // max(1, WEB_CONCURRENCY))
+# Seconds serve.py lets in-flight requests finish after SIGTERM
+SHUTDOWN_GRACE_SECONDS = int(os.getenv("SHUTDOWN_GRACE_SECONDS", 30))
+# Seconds between SIGTERM failing /health/ready and the server closing its
+# listener, so load balancers stop routing here first (0 = close at once)
+DRAIN_DELAY_SECONDS = float(os.getenv("DRAIN_DELAY_SECONDS", 5))
+# Cross-worker cache invalidation through a capped collection: "auto" turns
+# it on when WEB_CONCURRENCY > 1, "mongo" forces it, "off" disables it
+CACHE_INVALIDATION = os.getenv("CACHE_INVALIDATION", "auto")
+
+# Component IDs reserved per counter round-trip (1 = strictly gap-free)
+COMPONENT_ID_BLOCK_SIZE = int(os.getenv("COMPONENT_ID_BLOCK_SIZE", 1))
+
+# Process pool used for CPU-bound QR rendering (0 = CPUS_PER_WORKER)
+QR_RENDER_WORKERS = int(os.getenv("QR_RENDER_WORKERS", 0))
+# Largest batch accepted by the bulk generate_qr endpoint
+BULK_MAX_COMPONENTS = int(os.getenv("BULK_MAX_COMPONENTS", 10000))
+
+# Where rendered QR images are kept: "local" (filesystem) or "gridfs"
+QR_STORE_BACKEND = os.getenv("QR_STORE_BACKEND", "local")
+QR_STORE_PATH = os.getenv("QR_STORE_PATH", "qr_store")
+
+# Default QR symbol: error correction L/M/Q/H, version 1-40 (0 = smallest that
+# fits), pixels per module and quiet-zone modules. Requests may override them.
+QR_ERROR_CORRECTION = os.getenv("QR_ERROR_CORRECTION", "M")
+QR_VERSION = int(os.getenv("QR_VERSION", 0))
+QR_BOX_SIZE = int(os.getenv("QR_BOX_SIZE", 10))
+QR_BORDER = int(os.getenv("QR_BORDER", 4))
+# Rendered QR outputs memoized by (payload, format, options); 0 disables
+QR_RENDER_CACHE_SIZE = int(os.getenv("QR_RENDER_CACHE_SIZE", 2048))
+
+# Manufacturer principal cache used by get_current_manufacturer (0 disables)
+MANUFACTURER_CACHE_TTL = int(os.getenv("MANUFACTURER_CACHE_TTL", 300))
+MANUFACTURER_CACHE_SIZE = int(os.getenv("MANUFACTURER_CACHE_SIZE", 4096))
+
+# Largest batch accepted by POST /inspection/sync
+SYNC_MAX_ITEMS = int(os.getenv("SYNC_MAX_ITEMS", 1000))
+
+# bcrypt cost factor; hashes with a different cost are rehashed on login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# Threads doing bcrypt work (0 = run inline on the event loop) and how many
+# requests may wait for one before new ones are turned away with 503
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", CPUS_PER_WORKER))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 256))
+
+# Verified-JWT cache: entries never outlive the token's exp (size 0 disables)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", 300))
+
+# Weight of the newest inspection in a component's rolling defect_rate (EWMA)
+DEFECT_RATE_ALPHA = float(os.getenv("DEFECT_RATE_ALPHA", 0.2))
+
+# Rendered component views served to QR scans. The in-process tier is kept
+# short so other workers' writes show up quickly; VIEW_CACHE_SHARED adds a
+# tier shared by all workers: "mongo" (view_cache collection) or "local"
+# (in-process stand-in). Empty disables it. Size/TTL 0 disables the local tier.
+VIEW_CACHE_SIZE = int(os.getenv("VIEW_CACHE_SIZE", 10000))
+VIEW_CACHE_TTL = int(os.getenv("VIEW_CACHE_TTL", 30))
+VIEW_CACHE_SHARED = os.getenv("VIEW_CACHE_SHARED", "")
+VIEW_CACHE_SHARED_TTL = int(os.getenv("VIEW_CACHE_SHARED_TTL", 300))
+
+# Add a Server-Timing header (db, bcrypt, qr, total) to every response; clients
+# can also ask per request by sending an X-Server-Timing header
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+# Component lifecycle events: "auto" uses a change stream when the server
+# supports one (replica set) and falls back to in-process publishing;
+# "changestream" and "local" force one, "off" disables events
+EVENTS_SOURCE = os.getenv("EVENTS_SOURCE", "auto")
+# Events buffered per SSE/WebSocket subscriber before the oldest are dropped
+EVENTS_SUBSCRIBER_QUEUE = int(os.getenv("EVENTS_SUBSCRIBER_QUEUE", 256))
+
+# Background job queue (jobs collection). Each process runs JOB_WORKERS
+# coroutines claiming due jobs (0 = enqueue only); idle workers poll every
+# JOB_POLL_INTERVAL seconds. A claimed job holds a lease of JOB_LEASE_SECONDS,
+# renewed by progress updates, after which another worker may take it over.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 1.0))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 60))
+# Failed attempts are retried after JOB_RETRY_DELAY * 2^(attempt-1) seconds,
+# capped at JOB_RETRY_MAX_DELAY, up to JOB_MAX_ATTEMPTS attempts in all
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", 5))
+JOB_RETRY_MAX_DELAY = float(os.getenv("JOB_RETRY_MAX_DELAY", 300))
+# Finished jobs (and their results) are kept this long
+JOB_RETENTION_HOURS = int(os.getenv("JOB_RETENTION_HOURS", 24))
+
+# Replacement forecasts (/forecast) are computed from an in-memory copy of each
+# component's expiry, defect and location fields. It is topped up with the
+# components changed since the last refresh at most every
+# FORECAST_REFRESH_SECONDS, and reloaded in full every FORECAST_RELOAD_HOURS
+# to pick up writes that bypass updated_at (migrations).
+FORECAST_REFRESH_SECONDS = int(os.getenv("FORECAST_REFRESH_SECONDS", 60))
+FORECAST_RELOAD_HOURS = int(os.getenv("FORECAST_RELOAD_HOURS", 24))
+FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", 256))
+# Failure rates per (item_code, manufacturer) are shrunk towards the fleet-wide
+# rate as if each had this many extra component-days of average history
+FORECAST_PRIOR_DAYS = int(os.getenv("FORECAST_PRIOR_DAYS", 3650))
+# Installed components are grouped into square cells of this many degrees
+FORECAST_GRID_DEGREES = float(os.getenv("FORECAST_GRID_DEGREES", 0.5))
@@ -0,0 +1,216 @@
+"""
+Component lifecycle events, fanned out to SSE/WebSocket subscribers.
+
+Source of truth is a MongoDB change stream on `components` (every worker sees
+every write, whoever made it). Where change streams are unavailable (a
+standalone mongod, tests) the bus falls back to an in-process outbox: the
+routers' emit() calls publish directly, so subscribers only hear about writes
+made by the same worker.
+
+Event types:
+    component.created            generate_qr / bulk generation
+    component.installed          install / offline sync install
+    component.inspected          any inspection
+    component.needs_replacement  an inspection reported a defect
+"""
+import asyncio
+import itertools
+from datetime import datetime
+from typing import Optional
+from core.config import EVENTS_SOURCE, EVENTS_SUBSCRIBER_QUEUE, WEB_CONCURRENCY
+
+# Component fields copied onto every event
+EVENT_FIELDS = ("component_id", "component_name", "manufacturer_id", "status", "last_inspection_status",
+                "installation_point")
+
+
+def component_event(type: str, component: dict, **details) -> dict:
+    event = {"type": type, "at": datetime.utcnow().isoformat(), "_id": str(component["_id"])}
+    for field in EVENT_FIELDS:
+        if field in component:
+            event[field] = component[field]
+    event.update(details)
+    return event
+
+
+class EventFilter:
+    """Per-subscriber filter. Empty criteria match everything."""
+
+    def __init__(self, types: Optional[set] = None, manufacturer_id: Optional[str] = None,
+                 component_ids: Optional[set] = None, bbox: Optional[tuple] = None):
+        self.types = types
+        self.manufacturer_id = manufacturer_id
+        self.component_ids = component_ids
+        self.bbox = bbox  # (min_lon, min_lat, max_lon, max_lat)
+
+    def matches(self, event: dict) -> bool:
+        if self.types and event["type"] not in self.types:
+            return False
+        if self.manufacturer_id and event.get("manufacturer_id") != self.manufacturer_id:
+            return False
+        if self.component_ids and event["_id"] not in self.component_ids:
+            return False
+        if self.bbox:
+            point = event.get("installation_point")
+            if not point:
+                return False
+            lon, lat = point["coordinates"]
+            min_lon, min_lat, max_lon, max_lat = self.bbox
+            if not (min_lon <= lon <= max_lon and min_lat <= lat <= max_lat):
+                return False
+        return True
+
+
+class Subscription:
+    """
+    A bounded queue per subscriber. A subscriber that falls behind loses its
+    oldest events rather than slowing the publisher; the next event it gets
+    carries "dropped": n so the client knows to refetch.
+    """
+
+    def __init__(self, event_filter: EventFilter, maxsize: int):
+        self.filter = event_filter
+        self.queue = asyncio.Queue(maxsize=max(1, maxsize))
+        self.dropped = 0
+
+    def offer(self, event: dict):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Next event, or None if nothing arrived within timeout."""
+        try:
+            event = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if self.dropped:
+            event = {**event, "dropped": self.dropped}
+            self.dropped = 0
+        return event
+
+
+class EventBus:
+    def __init__(self):
+        self.source = None  # "changestream" | "local" once started
+        self.subscriptions = set()
+        self.published = 0
+        self.dropped = 0
+        self._ids = itertools.count(1)
+        self._task = None
+
+    def subscribe(self, event_filter: EventFilter) -> Subscription:
+        sub = Subscription(event_filter, EVENTS_SUBSCRIBER_QUEUE)
+        self.subscriptions.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        self.subscriptions.discard(sub)
+        self.dropped += sub.dropped
+
+    def publish(self, event: dict):
+        event = {"id": next(self._ids), **event}
+        self.published += 1
+        for sub in list(self.subscriptions):
+            if sub.filter.matches(event):
+                before = sub.dropped
+                sub.offer(event)
+                self.dropped += sub.dropped - before
+
+    def emit(self, type: str, component: dict, **details):
+        """Called by the routers after a write; only publishes when no change stream is running."""
+        if self.source == "local":
+            self.publish(component_event(type, component, **details))
+
+    async def start(self):
+        if EVENTS_SOURCE == "off":
+            return
+        if EVENTS_SOURCE in ("auto", "changestream"):
+            from db.client import components_collection
+            try:
+                stream = components_collection.watch(_CHANGE_PIPELINE, full_document="updateLookup")
+                # opens the stream (fails fast on a standalone server); may already return a change
+                first = await stream.try_next()
+            except Exception as e:
+                if EVENTS_SOURCE == "changestream":
+                    raise
+                print(f"Change streams unavailable ({e}); component events use the in-process outbox")
+            else:
+                self.source = "changestream"
+                if first:
+                    self._publish_change(first)
+                self._task = asyncio.create_task(self._consume(components_collection, stream, first))
+                return
+        self.source = "local"
+        if WEB_CONCURRENCY > 1:
+            print("Component events are per worker: subscribers only hear about writes made by their own worker")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def _publish_change(self, change: dict):
+        for event in events_from_change(change):
+            self.publish(event)
+
+    async def _consume(self, collection, stream, first=None):
+        resume_token = first["_id"] if first else None
+        while True:
+            try:
+                async with stream:
+                    async for change in stream:
+                        resume_token = change["_id"]
+                        self._publish_change(change)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Component change stream interrupted: {e}")
+                await asyncio.sleep(1)
+            stream = collection.watch(_CHANGE_PIPELINE, full_document="updateLookup", resume_after=resume_token)
+
+    def stats(self) -> dict:
+        return {
+            "source": self.source,
+            "subscribers": len(self.subscriptions),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+# Only the changes the lifecycle cares about, and only the fields events carry
+_CHANGE_PIPELINE = [
+    {"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}},
+    {"$project": {
+        "operationType": 1,
+        "updateDescription.updatedFields.installation_point": 1,
+        "updateDescription.updatedFields.inspection_count": 1,
+        "updateDescription.updatedFields.defect_count": 1,
+        "updateDescription.updatedFields.status": 1,
+        **{f"fullDocument.{f}": 1 for f in ("_id", *EVENT_FIELDS)},
+    }},
+]
+
+
+def events_from_change(change: dict) -> list:
+    doc = change.get("fullDocument")
+    if not doc:
+        return []  # deleted before the lookup ran
+    if change["operationType"] == "insert":
+        return [component_event("component.created", doc)]
+    updated = change.get("updateDescription", {}).get("updatedFields", {})
+    events = []
+    if "installation_point" in updated:
+        events.append(component_event("component.installed", doc))
+    if "inspection_count" in updated:
+        events.append(component_event("component.inspected", doc))
+    # pipeline updates only report fields whose value changed, so a non-zero
+    # defect_count here means this write counted a defect; a first OK
+    # inspection shows up as defect_count 0
+    if updated.get("defect_count") or updated.get("status") == "Needs Replacement":
+        events.append(component_event("component.needs_replacement", doc))
+    return events
+
+
+event_bus = EventBus()
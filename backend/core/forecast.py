@@ -0,0 +1,336 @@
+"""
+Replacement-demand forecasts over the whole component fleet.
+
+Each worker keeps a FleetFrame: the forecast inputs of every component
+(group, location cell, production and expiry day, defect count, flagged) as
+NumPy columns. It is loaded once, then topped up with just the components
+changed since the last refresh, found through the updated_at index, so a
+forecast never scans the collection. The forecast itself is vectorized:
+
+  - flagged ("Needs Replacement") and past-expiry components are due now
+  - every other component fails at its (item_code, manufacturer) group's
+    rate - defects per component-day of age, shrunk towards the fleet-wide
+    rate by FORECAST_PRIOR_DAYS - until its expected_expiry
+  - one that survives to its expected_expiry is replaced then
+
+so each component adds its probability of needing replacement to each
+bucket of the horizon.
+"""
+import math
+import time
+import asyncio
+import functools
+from datetime import datetime, timedelta
+import numpy as np
+from core.cache import TTLCache
+from core.config import (FORECAST_REFRESH_SECONDS, FORECAST_RELOAD_HOURS, FORECAST_CACHE_SIZE, FORECAST_PRIOR_DAYS,
+                         FORECAST_GRID_DEGREES)
+
+FORECAST_DIMENSIONS = ("item_code", "manufacturer_id", "location")
+UNINSTALLED = "uninstalled"
+
+_EPOCH = datetime(1970, 1, 1)
+_NEVER = np.iinfo(np.int32).max
+
+# updated_at comes from each worker's clock; re-read this far back so a write
+# stamped a little late by another worker is not skipped
+_REFRESH_OVERLAP = timedelta(seconds=30)
+_LOAD_BATCH = 5000
+# (group, output row, expiry day) combinations whose survival curves are built at once
+_COMBO_CHUNK = 65536
+
+_PROJECTION = {"item_code": 1, "manufacturer_id": 1, "production_date": 1, "generated_at": 1,
+               "expected_expiry": 1, "status": 1, "defect_count": 1, "installation_point": 1, "updated_at": 1}
+
+_COLUMNS = (("group", np.int32), ("cell", np.int32), ("produced", np.int32), ("expiry", np.int32),
+            ("defects", np.int32), ("flagged", np.bool_), ("lat", np.float32), ("lon", np.float32))
+
+
+def _day(dt: datetime) -> int:
+    return (dt - _EPOCH).days
+
+
+def location_cell(point) -> str:
+    """Grid cell of an installation_point, named by its south-west corner ("lat,lon")."""
+    if not point:
+        return UNINSTALLED
+    lon, lat = point["coordinates"]
+    size = FORECAST_GRID_DEGREES
+    return f"{math.floor(lat / size) * size:.2f},{math.floor(lon / size) * size:.2f}"
+
+
+class _Codes:
+    """Interns values as dense integer codes."""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def __call__(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.values)
+
+
+class FleetFrame:
+    """Forecast inputs for every component, one row per component."""
+
+    def __init__(self):
+        self.size = 0
+        self.rows = {}  # component _id -> row
+        self.groups = _Codes()  # (item_code, manufacturer_id)
+        self.cells = _Codes()
+        self.columns = {name: np.zeros(0, dtype) for name, dtype in _COLUMNS}
+        self.watermark = None  # newest updated_at applied
+        self.version = 0  # bumped whenever a row changes
+
+    def _grow(self, size: int):
+        capacity = len(self.columns["group"])
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 1024)
+        for name, column in self.columns.items():
+            grown = np.zeros(capacity, column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+
+    def apply(self, docs: list) -> bool:
+        """Writes the rows of these components documents; returns whether anything changed."""
+        if not docs:
+            return False
+        rows = []
+        values = {name: [] for name, _ in _COLUMNS}
+        added = 0
+        now = datetime.utcnow()
+        for doc in docs:
+            row = self.rows.get(doc["_id"])
+            if row is None:
+                row = self.rows[doc["_id"]] = self.size + added
+                added += 1
+            rows.append(row)
+            point = doc.get("installation_point")
+            lon, lat = point["coordinates"] if point else (np.nan, np.nan)
+            expiry = doc.get("expected_expiry")
+            values["group"].append(self.groups((doc.get("item_code"), doc.get("manufacturer_id"))))
+            values["cell"].append(self.cells(location_cell(point)))
+            values["produced"].append(_day(doc.get("production_date") or doc.get("generated_at") or now))
+            values["expiry"].append(_day(expiry) if expiry else _NEVER)
+            values["defects"].append(doc.get("defect_count") or 0)
+            values["flagged"].append(doc.get("status") == "Needs Replacement")
+            values["lat"].append(lat)
+            values["lon"].append(lon)
+            updated = doc.get("updated_at")
+            if updated and (self.watermark is None or updated > self.watermark):
+                self.watermark = updated
+
+        self._grow(self.size + added)
+        index = np.array(rows)
+        fresh = {name: np.array(values[name], dtype) for name, dtype in _COLUMNS}
+        changed = added > 0 or any(
+            not np.array_equal(self.columns[name][index], fresh[name], equal_nan=fresh[name].dtype.kind == "f")
+            for name in fresh
+        )
+        for name, column in fresh.items():
+            self.columns[name][index] = column
+        self.size += added
+        if changed:
+            self.version += 1
+        return changed
+
+
+def _decode(key: int, parts: list) -> dict:
+    row = {}
+    for dim, values in reversed(parts):
+        key, code = divmod(key, len(values))
+        row[dim] = values[code]
+    return {dim: row[dim] for dim, _ in parts}
+
+
+def _summary(components, flagged, overdue, expiring, failures) -> dict:
+    demand = expiring + failures
+    return {
+        "components": int(components),
+        "flagged": int(flagged),
+        "overdue": int(overdue),
+        "expiring": np.round(expiring, 2).tolist(),
+        "failures": np.round(failures, 2).tolist(),
+        "demand": np.round(demand, 2).tolist(),
+        "expected_total": round(float(flagged + overdue + demand.sum()), 2),
+    }
+
+
+def compute_forecast(frame: FleetFrame, today: int, horizon_days: int, bucket_days: int, group_by: tuple,
+                     manufacturer_id: str = None, item_code: str = None, bbox: tuple = None,
+                     limit: int = 100) -> dict:
+    """
+    Expected replacements per bucket_days over the next horizon_days, per
+    combination of the group_by dimensions, largest total first.
+    """
+    n = frame.size
+    col = {name: column[:n] for name, column in frame.columns.items()}
+    groups = frame.groups.values
+    group_count = len(groups)
+    group = col["group"]
+
+    # failure rate per (item_code, manufacturer): defects per component-day of
+    # age over the whole fleet, filters notwithstanding
+    age = np.maximum(today - col["produced"].astype(np.int64), 0).astype(np.float64)
+    exposure = np.bincount(group, weights=age, minlength=group_count)
+    defects = np.bincount(group, weights=col["defects"], minlength=group_count)
+    fleet_rate = defects.sum() / exposure.sum() if exposure.sum() else 0.0
+    rate = (defects + FORECAST_PRIOR_DAYS * fleet_rate) / (exposure + FORECAST_PRIOR_DAYS)
+
+    selected = np.ones(n, bool)
+    if manufacturer_id is not None or item_code is not None:
+        wanted = np.array([(item_code is None or i == item_code) and (manufacturer_id is None or m == manufacturer_id)
+                           for i, m in groups], bool)
+        selected &= wanted[group]
+    if bbox:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        # uninstalled components have NaN coordinates and fall outside any box
+        selected &= (col["lon"] >= min_lon) & (col["lon"] <= max_lon) & (col["lat"] >= min_lat) & (col["lat"] <= max_lat)
+
+    # one output row per combination of the group_by values, as a mixed-radix key
+    parts, key = [], np.zeros(n, np.int64)
+    for dim in group_by:
+        if dim == "location":
+            codes, values = col["cell"], frame.cells.values
+        else:
+            interned = _Codes()
+            position = FORECAST_DIMENSIONS.index(dim)
+            per_group = np.array([interned(g[position]) for g in groups], np.int64)
+            codes, values = per_group[group], interned.values
+        parts.append((dim, values))
+        key = key * max(len(values), 1) + codes
+
+    index = np.flatnonzero(selected)
+    keys, out = np.unique(key[index], return_inverse=True)
+    out = out.reshape(-1)
+    rows = len(keys)
+    buckets = -(-horizon_days // bucket_days)
+    edges = np.minimum(np.arange(buckets + 1) * bucket_days, horizon_days)
+
+    flagged = col["flagged"][index]
+    until_expiry = col["expiry"][index].astype(np.int64) - today
+    overdue = ~flagged & (until_expiry < 0)
+    active = ~flagged & ~overdue
+    components = np.bincount(out, minlength=rows)
+    flagged_count = np.bincount(out, weights=flagged, minlength=rows)
+    overdue_count = np.bincount(out, weights=overdue, minlength=rows)
+
+    # components sharing a group, output row and (clipped) expiry day have
+    # the same curve, so each distinct combination is computed once
+    ends = np.minimum(until_expiry[active], horizon_days)
+    combos, counts = np.unique(
+        (out[active] * max(group_count, 1) + group[index][active]) * (horizon_days + 1) + ends, return_counts=True
+    )
+    combo_end = combos % (horizon_days + 1)
+    combo_group = (combos // (horizon_days + 1)) % max(group_count, 1)
+    combo_out = combos // (horizon_days + 1) // max(group_count, 1)
+
+    failures = np.zeros((rows, buckets))
+    expiring = np.zeros((rows, buckets))
+    for start in range(0, len(combos), _COMBO_CHUNK):
+        chunk = slice(start, start + _COMBO_CHUNK)
+        lam, end, target, weight = rate[combo_group[chunk]], combo_end[chunk], combo_out[chunk], counts[chunk]
+        survival = np.exp(-lam[:, None] * np.minimum(edges[None, :], end[:, None]))
+        np.add.at(failures, target, (survival[:, :-1] - survival[:, 1:]) * weight[:, None])
+        expires = end < horizon_days
+        np.add.at(expiring, (target[expires], end[expires] // bucket_days),
+                  np.exp(-lam[expires] * end[expires]) * weight[expires])
+
+    totals = flagged_count + overdue_count + expiring.sum(axis=1) + failures.sum(axis=1)
+    order = np.argsort(-totals, kind="stable")[:limit]
+    selected_groups = np.bincount(group[index], minlength=group_count)
+    return {
+        "as_of": frame.watermark,
+        "horizon_days": horizon_days,
+        "bucket_days": bucket_days,
+        "buckets": [(_EPOCH + timedelta(days=today + int(e))).date().isoformat() for e in edges[:-1]],
+        "group_by": list(group_by),
+        "totals": _summary(len(index), flagged_count.sum(), overdue_count.sum(), expiring.sum(axis=0),
+                           failures.sum(axis=0)),
+        "group_count": rows,
+        "groups": [
+            {**_decode(int(keys[k]), parts),
+             **_summary(components[k], flagged_count[k], overdue_count[k], expiring[k], failures[k])}
+            for k in order
+        ],
+        "failure_rates": sorted(
+            ({"item_code": groups[g][0], "manufacturer_id": groups[g][1], "components": int(selected_groups[g]),
+              "annual_rate": round(float(rate[g]) * 365, 4)}
+             for g in np.flatnonzero(selected_groups)),
+            key=lambda r: -r["annual_rate"],
+        )[:limit],
+    }
+
+
+class ForecastService:
+    """Keeps this worker's FleetFrame fresh and memoizes forecasts per frame version."""
+
+    def __init__(self):
+        self.frame = FleetFrame()
+        self.loads = 0
+        self.refreshes = 0
+        self.cache = TTLCache(maxsize=FORECAST_CACHE_SIZE, ttl=FORECAST_RELOAD_HOURS * 3600)
+        self._lock = asyncio.Lock()
+        self._loaded_at = 0.0
+        self._refreshed_at = 0.0
+
+    async def _load(self):
+        from db.client import components_collection
+        frame = FleetFrame()
+        started = datetime.utcnow()
+        batch = []
+        async for doc in components_collection.find({}, _PROJECTION).batch_size(_LOAD_BATCH):
+            batch.append(doc)
+            if len(batch) == _LOAD_BATCH:
+                frame.apply(batch)
+                batch = []
+        frame.apply(batch)
+        # writes that landed during the scan are picked up by the next top-up
+        frame.watermark = started
+        self.frame = frame
+        self.cache.clear()
+        self.loads += 1
+
+    async def _top_up(self):
+        from db.client import components_collection
+        since = self.frame.watermark - _REFRESH_OVERLAP
+        batch = []
+        async for doc in components_collection.find({"updated_at": {"$gte": since}}, _PROJECTION).batch_size(_LOAD_BATCH):
+            batch.append(doc)
+            if len(batch) == _LOAD_BATCH:
+                self.frame.apply(batch)
+                batch = []
+        self.frame.apply(batch)
+        self.refreshes += 1
+
+    async def forecast(self, **params) -> dict:
+        """compute_forecast over a frame at most FORECAST_REFRESH_SECONDS old."""
+        async with self._lock:
+            now = time.monotonic()
+            if self.frame.watermark is None or now - self._loaded_at > FORECAST_RELOAD_HOURS * 3600:
+                await self._load()
+                self._loaded_at = self._refreshed_at = now
+            elif now - self._refreshed_at > FORECAST_REFRESH_SECONDS:
+                await self._top_up()
+                self._refreshed_at = now
+
+            today = _day(datetime.utcnow())
+            key = (self.frame.version, today, tuple(sorted(params.items())))
+            result = self.cache.get(key)
+            if result is None:
+                # the lock keeps refreshes off the frame while the worker thread reads it
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(None, functools.partial(compute_forecast, self.frame, today, **params))
+                self.cache.set(key, result)
+            return result
+
+
+forecast_service = ForecastService()
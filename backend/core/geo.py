@@ -0,0 +1,57 @@
+import math
+from typing import Optional
+
+EARTH_RADIUS_M = 6378100
+
+
+def geo_point(latitude, longitude) -> dict:
+    """GeoJSON Point for a latitude/longitude pair; raises ValueError if out of range."""
+    lat, lon = float(latitude), float(longitude)
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError("Coordinates out of range")
+    return {"type": "Point", "coordinates": [lon, lat]}
+
+
+def parse_location_string(value: str) -> Optional[dict]:
+    """Converts the legacy "lat,lon" installation_location string to a GeoJSON Point."""
+    try:
+        lat, lon = value.split(",")
+        return geo_point(lat.strip(), lon.strip())
+    except (AttributeError, ValueError):
+        return None
+
+
+def _offset(lon: float, lat: float, east_m: float, north_m: float) -> list:
+    # equirectangular offset; fine at the few-hundred-metre scale of a track corridor
+    dlat = math.degrees(north_m / EARTH_RADIUS_M)
+    dlon = math.degrees(east_m / (EARTH_RADIUS_M * max(math.cos(math.radians(lat)), 1e-6)))
+    return [lon + dlon, lat + dlat]
+
+
+def corridor_filter(field: str, line: list, buffer_m: float) -> dict:
+    """
+    Approximates "within buffer_m of a polyline" with $geoWithin clauses: one
+    rectangle per segment plus a circle at every vertex to cover the joints.
+    `line` is a list of [lon, lat] pairs.
+    """
+    clauses = []
+    for lon, lat in line:
+        clauses.append({field: {"$geoWithin": {"$centerSphere": [[lon, lat], buffer_m / EARTH_RADIUS_M]}}})
+    for (lon1, lat1), (lon2, lat2) in zip(line, line[1:]):
+        mid_lat = (lat1 + lat2) / 2
+        east = math.radians(lon2 - lon1) * EARTH_RADIUS_M * math.cos(math.radians(mid_lat))
+        north = math.radians(lat2 - lat1) * EARTH_RADIUS_M
+        length = math.hypot(east, north)
+        if length == 0:
+            continue
+        # unit normal to the segment, scaled to the buffer width
+        nx, ny = -north / length * buffer_m, east / length * buffer_m
+        ring = [
+            _offset(lon1, lat1, nx, ny),
+            _offset(lon2, lat2, nx, ny),
+            _offset(lon2, lat2, -nx, -ny),
+            _offset(lon1, lat1, -nx, -ny),
+        ]
+        ring.append(ring[0])
+        clauses.append({field: {"$geoWithin": {"$geometry": {"type": "Polygon", "coordinates": [ring]}}}})
+    return {"$or": clauses}
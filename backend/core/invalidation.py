@@ -0,0 +1,92 @@
+"""
+Cross-worker cache invalidation.
+
+In-process caches only hear about their own worker's writes. With several
+workers, every invalidation is also appended to the capped
+cache_invalidations collection, which each worker tails and applies to its
+own caches (skipping entries it wrote). Capped collections and tailable
+cursors work on a standalone mongod, so no replica set is needed.
+"""
+import asyncio
+import uuid as uuidlib
+from datetime import datetime
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+from core.config import CACHE_INVALIDATION, WEB_CONCURRENCY
+
+INVALIDATION_LOG_BYTES = 1 << 20
+
+# Identifies this process's own entries in the log
+WORKER_ID = uuidlib.uuid4().hex
+
+
+class InvalidationBus:
+    def __init__(self):
+        self.enabled = CACHE_INVALIDATION == "mongo" or (CACHE_INVALIDATION == "auto" and WEB_CONCURRENCY > 1)
+        self.published = 0
+        self.applied = 0
+        self._handlers = {}  # cache name -> fn(keys) dropping those keys locally
+        self._task = None
+
+    def register(self, cache: str, handler):
+        self._handlers[cache] = handler
+
+    async def publish(self, cache: str, *keys: str):
+        """Tells the other workers; the caller has already invalidated its own cache."""
+        if not self.enabled or not keys:
+            return
+        from db.client import db
+        try:
+            await db["cache_invalidations"].insert_one(
+                {"cache": cache, "keys": list(keys), "origin": WORKER_ID, "at": datetime.utcnow()}
+            )
+            self.published += 1
+        except Exception as e:
+            # other workers converge when their entries' TTLs run out
+            print(f"Could not publish {cache} invalidation: {e}")
+
+    async def start(self):
+        if not self.enabled:
+            return
+        from db.client import db
+        try:
+            await db.create_collection("cache_invalidations", capped=True, size=INVALIDATION_LOG_BYTES)
+            # a tailable cursor on an empty capped collection dies at once
+            await db["cache_invalidations"].insert_one({"cache": None, "origin": WORKER_ID, "at": datetime.utcnow()})
+        except CollectionInvalid:
+            pass
+        self._task = asyncio.create_task(self._tail(db["cache_invalidations"]))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _tail(self, collection):
+        since = datetime.utcnow()
+        while True:
+            try:
+                # replays after a reconnect are harmless: invalidating twice is a no-op
+                cursor = collection.find({"at": {"$gte": since}}, cursor_type=CursorType.TAILABLE_AWAIT)
+                while cursor.alive:
+                    async for entry in cursor:
+                        since = entry["at"]
+                        if entry["origin"] != WORKER_ID:
+                            self._apply(entry)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Cache invalidation log interrupted: {e}")
+            await asyncio.sleep(1)
+
+    def _apply(self, entry: dict):
+        handler = self._handlers.get(entry.get("cache"))
+        if handler:
+            handler(entry["keys"])
+            self.applied += 1
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "published": self.published, "applied": self.applied}
+
+
+invalidation_bus = InvalidationBus()
@@ -0,0 +1,260 @@
+"""
+Background jobs, queued in the `jobs` collection so any worker process can
+enqueue, run or report on them.
+
+Every process runs JOB_WORKERS coroutines that claim due jobs with
+find_one_and_update. A claimed job holds a lease that its progress updates
+renew; if the worker dies, the job is picked up again once the lease runs out.
+A handler that raises is retried with exponential backoff until its
+max_attempts are used up, so handlers must be safe to run again.
+
+    @job_handler("kind")
+    async def run(job):          # job.params, job.owner, job.state
+        await job.update(stage="working", done=10)
+        return {"result": ...}   # stored on the job
+"""
+import json
+import asyncio
+import weakref
+import uuid as uuidlib
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from core.config import (JOB_WORKERS, JOB_POLL_INTERVAL, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, JOB_RETRY_DELAY,
+                         JOB_RETRY_MAX_DELAY, JOB_RETENTION_HOURS)
+from core.metrics import Counter
+
+FINISHED = ("SUCCEEDED", "FAILED")
+
+# Fields returned by the status endpoints
+_VIEW_FIELDS = ("kind", "status", "stage", "done", "total", "attempts", "max_attempts", "error", "result",
+                "created_at", "run_at", "finished_at")
+
+jobs_finished = Counter("jobs_finished_total", "Job attempts by kind and outcome", ("kind", "outcome"))
+
+_handlers = {}  # kind -> (handler, max_attempts)
+_watchers = weakref.WeakValueDictionary()  # job_id -> asyncio.Event set on the next local update
+
+
+def job_handler(kind: str, max_attempts: int = JOB_MAX_ATTEMPTS):
+    """Registers the coroutine that runs jobs of this kind."""
+    def register(fn):
+        _handlers[kind] = (fn, max_attempts)
+        return fn
+    return register
+
+
+class LeaseLost(Exception):
+    """The job's lease expired and another worker has claimed it."""
+
+
+class Job:
+    """A claimed job, as seen by its handler."""
+
+    def __init__(self, doc: dict):
+        self.id = doc["_id"]
+        self.kind = doc["kind"]
+        self.owner = doc["owner"]
+        self.params = doc.get("params", {})
+        self.state = doc.get("state", {})
+        self.attempt = doc["attempts"]
+        self.lease = doc["lease"]
+
+    async def update(self, **fields):
+        """
+        Records progress (stage, done, total) or a checkpoint (state=...) and
+        renews the lease. Raises LeaseLost if another worker took the job over.
+        """
+        from db.client import jobs_collection
+        now = datetime.utcnow()
+        result = await jobs_collection.update_one(
+            {"_id": self.id, "lease": self.lease},
+            {"$set": {**fields, "updated_at": now, "lease_until": now + timedelta(seconds=JOB_LEASE_SECONDS)}},
+        )
+        if not result.matched_count:
+            raise LeaseLost(self.id)
+        if "state" in fields:
+            self.state = fields["state"]
+        _notify(self.id)
+
+
+def _notify(job_id: str):
+    event = _watchers.pop(job_id, None)
+    if event is not None:
+        event.set()
+
+
+def job_view(doc: dict) -> dict:
+    view = {"job_id": doc["_id"], **{f: doc.get(f) for f in _VIEW_FIELDS}}
+    # run_at only means something while a retry is waiting
+    if not (doc.get("status") == "PENDING" and doc.get("attempts")):
+        view.pop("run_at")
+    return view
+
+
+async def enqueue_job(kind: str, owner: str, params: dict, total: int = 0) -> dict:
+    from db.client import jobs_collection
+    if kind not in _handlers:
+        raise ValueError(f"No handler registered for job kind {kind!r}")
+    now = datetime.utcnow()
+    doc = {
+        "_id": uuidlib.uuid4().hex,
+        "kind": kind,
+        "owner": owner,
+        "params": params,
+        "status": "PENDING",
+        "stage": "queued",
+        "done": 0,
+        "total": total,
+        "attempts": 0,
+        "max_attempts": _handlers[kind][1],
+        "error": None,
+        "result": None,
+        "run_at": now,
+        "created_at": now,
+        "updated_at": now,
+    }
+    await jobs_collection.insert_one(doc)
+    job_queue.wake()
+    return doc
+
+
+async def get_job(job_id: str, owner: str):
+    from db.client import jobs_collection
+    return await jobs_collection.find_one({"_id": job_id, "owner": owner}, {"params": 0, "state": 0})
+
+
+async def list_jobs(owner: str, limit: int = 20) -> list:
+    from db.client import jobs_collection
+    cursor = jobs_collection.find({"owner": owner}, {"params": 0, "state": 0}).sort("created_at", -1)
+    return [job_view(doc) for doc in await cursor.to_list(max(1, min(limit, 100)))]
+
+
+async def progress_lines(job_id: str):
+    """
+    Yields one NDJSON line per change until the job finishes. Updates made in
+    this process wake the stream at once; others are seen on the next poll.
+    """
+    from db.client import jobs_collection
+    last = None
+    while True:
+        changed = _watchers.setdefault(job_id, asyncio.Event())
+        doc = await jobs_collection.find_one({"_id": job_id}, {"params": 0, "state": 0})
+        if doc is None:
+            return
+        view = job_view(doc)
+        if view != last:
+            yield json.dumps(view, default=str) + "\n"
+            last = view
+        if doc["status"] in FINISHED:
+            return
+        try:
+            await asyncio.wait_for(changed.wait(), JOB_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+def retry_delay(attempt: int) -> float:
+    return min(JOB_RETRY_MAX_DELAY, JOB_RETRY_DELAY * 2 ** (attempt - 1))
+
+
+class JobQueue:
+    def __init__(self):
+        self.running = 0
+        self._workers = []
+        self._wake = None
+
+    def start(self, workers: int = JOB_WORKERS):
+        self._wake = asyncio.Event()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(workers)]
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def wake(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _claim(self):
+        from db.client import jobs_collection
+        now = datetime.utcnow()
+        claim = {
+            "$set": {"status": "RUNNING", "lease": uuidlib.uuid4().hex, "started_at": now, "updated_at": now,
+                     "lease_until": now + timedelta(seconds=JOB_LEASE_SECONDS)},
+            "$inc": {"attempts": 1},
+        }
+        kinds = {"$in": list(_handlers)}
+        doc = await jobs_collection.find_one_and_update(
+            {"status": "PENDING", "run_at": {"$lte": now}, "kind": kinds}, claim,
+            sort=[("run_at", 1)], return_document=ReturnDocument.AFTER,
+        )
+        if doc is None:
+            # a worker died holding this one
+            doc = await jobs_collection.find_one_and_update(
+                {"status": "RUNNING", "lease_until": {"$lt": now}, "kind": kinds}, claim,
+                return_document=ReturnDocument.AFTER,
+            )
+        return doc
+
+    async def _work(self):
+        while True:
+            self._wake.clear()
+            try:
+                doc = await self._claim()
+            except Exception as e:
+                print(f"Could not claim a job: {e}")
+                doc = None
+            if doc is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self.running += 1
+            try:
+                await self._run(doc)
+            finally:
+                self.running -= 1
+
+    async def _run(self, doc: dict):
+        handler, _ = _handlers[doc["kind"]]
+        job = Job(doc)
+        if doc["attempts"] > doc["max_attempts"]:
+            # only reachable through lease expiry: the worker running the last attempt died
+            await self._settle(job, "FAILED", error="Worker lost during the final attempt")
+            return
+        try:
+            result = await handler(job)
+        except asyncio.CancelledError:
+            # shutting down; hand the job back without using up an attempt
+            await self._settle(job, "PENDING", stage="queued", run_at=datetime.utcnow(), attempts=doc["attempts"] - 1)
+            raise
+        except LeaseLost:
+            print(f"Job {job.id} ({job.kind}) was taken over by another worker")
+        except Exception as e:
+            print(f"Job {job.id} ({job.kind}) attempt {job.attempt} failed: {e}")
+            if job.attempt < doc["max_attempts"]:
+                jobs_finished.inc(job.kind, "retried")
+                run_at = datetime.utcnow() + timedelta(seconds=retry_delay(job.attempt))
+                await self._settle(job, "PENDING", stage="retrying", error=str(e), run_at=run_at)
+            else:
+                await self._settle(job, "FAILED", error=str(e))
+        else:
+            await self._settle(job, "SUCCEEDED", stage="done", error=None, result=result)
+
+    async def _settle(self, job: Job, status: str, **fields):
+        from db.client import jobs_collection
+        now = datetime.utcnow()
+        fields.update(status=status, updated_at=now)
+        if status in FINISHED:
+            jobs_finished.inc(job.kind, status.lower())
+            fields.update(finished_at=now, expires_at=now + timedelta(hours=JOB_RETENTION_HOURS))
+        await jobs_collection.update_one(
+            {"_id": job.id, "lease": job.lease}, {"$set": fields, "$unset": {"lease": "", "lease_until": ""}}
+        )
+        _notify(job.id)
+
+
+job_queue = JobQueue()
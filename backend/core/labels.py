@@ -0,0 +1,209 @@
+"""
+Printable QR label sheets as a streamed PDF.
+
+The PDF is written by hand, object by object: QR symbols become vector Form
+XObjects (one path of module runs each), captions use the standard Helvetica
+fonts, which need no embedding and are written once per document. Symbol
+paths for the next few pages are built in the QR process pool while earlier
+pages are being sent, and each page goes out as soon as it is complete; only
+the object offsets are kept until the xref table at the end.
+"""
+import zlib
+import asyncio
+from collections import deque
+from typing import NamedTuple
+from core.qr import QROptions, qr_matrix, dark_runs, get_render_pool
+from core.metrics import timed, qr_render_latency
+
+_MM = 72 / 25.4
+
+
+class LabelLayout(NamedTuple):
+    """Page and label geometry in points."""
+    page_width: float
+    page_height: float
+    columns: int
+    rows: int
+    margin_x: float  # page edge to the first column
+    margin_y: float  # page top to the first row
+    label_width: float
+    label_height: float
+    padding: float
+    font_size: float
+
+
+LABEL_LAYOUTS = {
+    # 24 labels of 70 x 36 mm per A4 sheet
+    "a4": LabelLayout(210 * _MM, 297 * _MM, 3, 8, 0, 4.5 * _MM, 70 * _MM, 36 * _MM, 2.5 * _MM, 7),
+    # one 50 x 30 mm label per page, for thermal roll printers
+    "thermal": LabelLayout(50 * _MM, 30 * _MM, 1, 1, 0, 0, 50 * _MM, 30 * _MM, 2 * _MM, 6),
+}
+
+# (field, bold) printed next to each symbol, top to bottom
+CAPTION_FIELDS = (("component_id", True), ("serial_number", False), ("item_code", False))
+
+# Pages whose symbols may be rendering ahead of the page being written
+LABEL_PAGES_AHEAD = 4
+
+# Helvetica's average advance width per point of size, for shrinking captions to fit
+_AVG_CHAR_WIDTH = 0.6
+_MIN_FONT_SIZE = 4
+
+
+def render_label_symbols(payloads: list, opts: QROptions) -> list:
+    """(modules, deflated path) per payload; runs in the process pool."""
+    symbols = []
+    for payload in payloads:
+        _, matrix = qr_matrix(payload, opts)
+        n = len(matrix)
+        path = " ".join(f"{x} {n - 1 - y} {length} 1 re" for y, x, length in dark_runs(matrix)) + " f"
+        symbols.append((n, zlib.compress(path.encode(), 6)))
+    return symbols
+
+
+def _pdf_string(text: str) -> str:
+    # encoded to cp1252 (the fonts' WinAnsiEncoding) with the rest of the content stream
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def _fmt(value: float) -> str:
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+class _PDFWriter:
+    """Numbers objects and remembers where each starts, for the closing xref table."""
+
+    def __init__(self):
+        self.position = 0
+        self.offsets = {}
+        self._next = 1
+
+    def reserve(self) -> int:
+        num = self._next
+        self._next += 1
+        return num
+
+    def raw(self, data: bytes) -> bytes:
+        self.position += len(data)
+        return data
+
+    def obj(self, num: int, body: str) -> bytes:
+        self.offsets[num] = self.position
+        return self.raw(f"{num} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+
+    def stream(self, num: int, data: bytes, entries: str = "") -> bytes:
+        self.offsets[num] = self.position
+        head = f"{num} 0 obj\n<< {entries} /Length {len(data)} /Filter /FlateDecode >>\nstream\n".encode("latin-1")
+        return self.raw(head + data + b"\nendstream\nendobj\n")
+
+    def trailer(self, root: int) -> bytes:
+        count = self._next
+        lines = [f"xref\n0 {count}\n", "0000000000 65535 f \n"]
+        lines += [f"{self.offsets[num]:010d} 00000 n \n" for num in range(1, count)]
+        lines.append(f"trailer\n<< /Size {count} /Root {root} 0 R >>\nstartxref\n{self.position}\n%%EOF\n")
+        return self.raw("".join(lines).encode("latin-1"))
+
+
+def _caption_ops(text: str, font: str, size: float, x: float, y: float, width: float) -> str:
+    if len(text) * size * _AVG_CHAR_WIDTH > width:
+        size = max(_MIN_FONT_SIZE, width / (len(text) * _AVG_CHAR_WIDTH))
+        text = text[:int(width / (size * _AVG_CHAR_WIDTH))]
+    return f"BT /{font} {_fmt(size)} Tf {_fmt(x)} {_fmt(y)} Td {_pdf_string(text)} Tj ET"
+
+
+def _tile_ops(layout: LabelLayout, slot: int, symbol: str, modules: int, component: dict) -> list:
+    column, row = slot % layout.columns, slot // layout.columns
+    left = layout.margin_x + column * layout.label_width
+    bottom = layout.page_height - layout.margin_y - (row + 1) * layout.label_height
+    side = layout.label_height - 2 * layout.padding
+    scale = side / modules
+    ops = [f"q {_fmt(scale)} 0 0 {_fmt(scale)} {_fmt(left + layout.padding)} {_fmt(bottom + layout.padding)} cm "
+           f"/{symbol} Do Q"]
+
+    text_x = left + 2 * layout.padding + side
+    text_width = layout.label_width - side - 3 * layout.padding
+    line_height = layout.font_size * 1.4
+    y = bottom + layout.label_height / 2 + line_height * (len(CAPTION_FIELDS) / 2) - layout.font_size
+    for field, bold in CAPTION_FIELDS:
+        value = component.get(field)
+        if value:
+            ops.append(_caption_ops(str(value), "F2" if bold else "F1", layout.font_size, text_x, y, text_width))
+        y -= line_height
+    return ops
+
+
+async def _pages(components, per_page: int, copies: int):
+    page = []
+    async for component in components:
+        for _ in range(copies):
+            page.append(component)
+            if len(page) == per_page:
+                yield page
+                page = []
+    if page:
+        yield page
+
+
+async def stream_label_pdf(components, layout: LabelLayout, opts: QROptions, copies: int = 1):
+    """
+    Yields a PDF of labels for the components (an async iterator of dicts with
+    _id and the caption fields), one chunk per page. A component printed more
+    than once (copies > 1, or repeated input) shares a single symbol object.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_render_pool()
+    pdf = _PDFWriter()
+    catalog, pages, regular, bold = (pdf.reserve() for _ in range(4))
+    fonts = f"/Font << /F1 {regular} 0 R /F2 {bold} 0 R >>"
+    symbols = {}  # payload -> XObject number
+    kids = []
+
+    yield (pdf.raw(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+           + pdf.obj(catalog, f"<< /Type /Catalog /Pages {pages} 0 R >>")
+           + pdf.obj(regular, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+           + pdf.obj(bold, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>"))
+
+    async def render(payloads):
+        with timed(qr_render_latency, "labels", stage="qr"):
+            return await loop.run_in_executor(pool, render_label_symbols, payloads, opts)
+
+    def write_page(page, payloads, rendered) -> bytes:
+        chunk = b""
+        for payload, (modules, path) in zip(payloads, rendered):
+            if payload not in symbols:
+                symbols[payload] = (pdf.reserve(), modules)
+                chunk += pdf.stream(symbols[payload][0], path,
+                                    f"/Type /XObject /Subtype /Form /BBox [0 0 {modules} {modules}]")
+        ops, used = [], {}
+        for slot, component in enumerate(page):
+            num, modules = symbols[str(component["_id"])]
+            name = used.setdefault(num, f"Q{num}")
+            ops += _tile_ops(layout, slot, name, modules, component)
+        xobjects = " ".join(f"/{name} {num} 0 R" for num, name in used.items())
+        content, page_num = pdf.reserve(), pdf.reserve()
+        chunk += pdf.stream(content, zlib.compress("\n".join(ops).encode("cp1252", "replace"), 6))
+        chunk += pdf.obj(page_num, (
+            f"<< /Type /Page /Parent {pages} 0 R "
+            f"/MediaBox [0 0 {_fmt(layout.page_width)} {_fmt(layout.page_height)}] "
+            f"/Resources << {fonts} /XObject << {xobjects} >> >> /Contents {content} 0 R >>"
+        ))
+        kids.append(page_num)
+        return chunk
+
+    pending = deque()
+    try:
+        async for page in _pages(components, layout.columns * layout.rows, copies):
+            payloads = list(dict.fromkeys(str(c["_id"]) for c in page if str(c["_id"]) not in symbols))
+            pending.append((page, payloads, asyncio.ensure_future(render(payloads))))
+            if len(pending) > LABEL_PAGES_AHEAD:
+                page, payloads, task = pending.popleft()
+                yield write_page(page, payloads, await task)
+        while pending:
+            page, payloads, task = pending.popleft()
+            yield write_page(page, payloads, await task)
+    finally:
+        for _, _, task in pending:
+            task.cancel()
+
+    yield (pdf.obj(pages, f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>")
+           + pdf.trailer(catalog))
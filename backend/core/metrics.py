@@ -0,0 +1,323 @@
+"""
+In-process metrics in the Prometheus text format, plus per-request stage timing.
+
+Everything here is per worker process; scrape each worker (or run one) to see
+the whole picture. Label values are route templates and collection names, so
+cardinality stays bounded.
+"""
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from pymongo import monitoring
+
+# Prometheus' default buckets with a 1ms bucket in front for cache/DB hits
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_registry = []
+_INF_LABEL = 'le="+Inf"'
+
+
+def _label_str(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_label_str(self.labels, k)} {_fmt(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, *label_values, value: float):
+        with self._lock:
+            self._values[label_values] = value
+
+
+class CallbackMetric(_Metric):
+    """
+    Value read at scrape time from stats kept elsewhere; fn returns a number
+    or {label_values_tuple: number}. kind is "gauge" or "counter".
+    """
+
+    def __init__(self, name: str, help: str, fn, labels: tuple = (), kind: str = "gauge"):
+        super().__init__(name, help, labels)
+        self.fn = fn
+        self.kind = kind
+
+    def render(self) -> list:
+        values = self.fn()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return self.header() + [f"{self.name}{_label_str(self.labels, k)} {_fmt(v)}" for k, v in values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, *label_values, value: float):
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                series = self._values[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._values.items()]
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                le = 'le="%s"' % _fmt(bound)
+                lines.append(f"{self.name}_bucket{_label_str(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_label_str(self.labels, key, _INF_LABEL)} {count}")
+            lines.append(f"{self.name}_sum{_label_str(self.labels, key)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{_label_str(self.labels, key)} {count}")
+        return lines
+
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in _registry for line in metric.render()) + "\n"
+
+
+http_requests = Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_latency = Histogram("http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+http_in_flight = Gauge("http_requests_in_flight", "Requests currently being served")
+mongo_latency = Histogram("mongo_command_duration_seconds", "MongoDB command latency", ("collection", "command"))
+mongo_failures = Counter("mongo_command_failures_total", "Failed MongoDB commands", ("collection", "command"))
+password_latency = Histogram("password_hash_duration_seconds", "bcrypt hash/verify time, excluding queueing",
+                             ("operation",), buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+qr_render_latency = Histogram("qr_render_duration_seconds", "QR rendering time per call, including pool handoff",
+                              ("kind",))
+
+
+# Per-request stage timings, for the optional Server-Timing header.
+# Motor copies the context into its executor threads, so DB time recorded by
+# the command listener lands on the request that issued the command.
+_trace = contextvars.ContextVar("request_trace", default=None)
+
+
+class RequestTrace:
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def server_timing(self, total: float) -> str:
+        parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.stages.items()]
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+def start_trace() -> RequestTrace:
+    trace = RequestTrace()
+    _trace.set(trace)
+    return trace
+
+
+def record_stage(stage: str, seconds: float):
+    trace = _trace.get()
+    if trace is not None:
+        trace.add(stage, seconds)
+
+
+@contextmanager
+def timed(histogram: Histogram, *label_values, stage: str = None):
+    """Observes the block's duration on histogram and, if given, adds it to the request's stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        histogram.observe(*label_values, value=elapsed)
+        if stage:
+            record_stage(stage, elapsed)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Feeds mongo_command_duration_seconds and the request's "db" stage."""
+
+    def __init__(self):
+        self._pending = {}  # (connection, request_id) -> collection
+
+    def started(self, event):
+        # {"find": "components"}, but {"getMore": <cursor id>, "collection": "components"}
+        target = event.command.get(event.command_name)
+        if not isinstance(target, str):
+            target = event.command.get("collection")
+        collection = target if isinstance(target, str) else "-"
+        self._pending[(event.connection_id, event.request_id)] = collection
+
+    def _finish(self, event):
+        collection = self._pending.pop((event.connection_id, event.request_id), "-")
+        seconds = event.duration_micros / 1e6
+        mongo_latency.observe(collection, event.command_name, value=seconds)
+        record_stage("db", seconds)
+        return collection
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        mongo_failures.inc(self._finish(event), event.command_name)
+
+
+mongo_listener = MongoCommandListener()
+
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """Connection counts across every server's pool, for pool utilization stats."""
+
+    def __init__(self):
+        self.counts = {"open": 0, "in_use": 0, "waiting": 0, "checkout_failures": 0}
+        self._lock = threading.Lock()
+
+    def _add(self, **deltas):
+        with self._lock:
+            for key, delta in deltas.items():
+                self.counts[key] += delta
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.counts)
+
+    def connection_created(self, event):
+        self._add(open=1)
+
+    def connection_closed(self, event):
+        self._add(open=-1)
+
+    def connection_check_out_started(self, event):
+        self._add(waiting=1)
+
+    def connection_checked_out(self, event):
+        self._add(waiting=-1, in_use=1)
+
+    def connection_check_out_failed(self, event):
+        self._add(waiting=-1, checkout_failures=1)
+
+    def connection_checked_in(self, event):
+        self._add(in_use=-1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+
+mongo_pool_listener = MongoPoolListener()
+
+
+def _route_label(scope) -> str:
+    """The path with matched parameters put back as {name}, e.g. /components/{component_id}."""
+    if "route" not in scope:
+        return "unmatched"
+    path = scope["path"]
+    for name, value in scope.get("path_params", {}).items():
+        head, sep, tail = path.rpartition(str(value))
+        if sep:
+            path = f"{head}{{{name}}}{tail}"
+    return path
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency, status counts and in-flight
+    requests. With server_timing on (or an X-Server-Timing request header) the
+    response carries a Server-Timing header breaking the time down by stage.
+    """
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        trace = start_trace()
+        want_timing = self.server_timing or any(k == b"x-server-timing" for k, _ in scope["headers"])
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if want_timing:
+                    header = trace.server_timing(time.perf_counter() - start)
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", header.encode())]
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec()
+            route = _route_label(scope)
+            elapsed = time.perf_counter() - start
+            http_latency.observe(scope["method"], route, value=elapsed)
+            http_requests.inc(scope["method"], route, str(status[0]))
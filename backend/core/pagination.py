@@ -0,0 +1,130 @@
+import json
+import base64
+from datetime import datetime
+from typing import Optional
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import ASCENDING, DESCENDING
+from core.serialization import dumps
+
+MAX_PAGE_SIZE = 1000
+
+
+def json_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def to_json_line(doc: dict) -> bytes:
+    return dumps(doc) + b"\n"
+
+
+def encode_cursor(doc: dict, sort_field: str) -> str:
+    """Opaque cursor holding the sort key and _id of the last document on a page."""
+    state = {"id": str(doc["_id"])}
+    if sort_field != "_id":
+        value = doc.get(sort_field)
+        state["v"] = value.isoformat() if isinstance(value, datetime) else value
+    return base64.urlsafe_b64encode(json.dumps(state).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_field: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded))
+        last_id = ObjectId(state["id"])
+        value = state.get("v")
+        if sort_field == "_id":
+            value = last_id
+        elif isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        return {"_id": last_id, "value": value}
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(sort_field: str, descending: bool, cursor: Optional[str]) -> dict:
+    """Filter selecting documents strictly after the cursor in (sort_field, _id) order."""
+    if not cursor:
+        return {}
+    last = decode_cursor(cursor, sort_field)
+    op = "$lt" if descending else "$gt"
+    if sort_field == "_id":
+        return {"_id": {op: last["_id"]}}
+    return {"$or": [
+        {sort_field: {op: last["value"]}},
+        {sort_field: last["value"], "_id": {op: last["_id"]}},
+    ]}
+
+
+def sort_spec(sort_field: str, descending: bool) -> list:
+    direction = DESCENDING if descending else ASCENDING
+    if sort_field == "_id":
+        return [("_id", direction)]
+    return [(sort_field, direction), ("_id", direction)]
+
+
+def parse_fields(fields: Optional[str], allowed: set, always: tuple = ("_id",)) -> Optional[dict]:
+    """Turns ?fields=a,b,c into a Mongo inclusion projection, or None for the default view."""
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    projection = {f: 1 for f in requested}
+    for f in always:
+        projection[f] = 1
+    return projection
+
+
+async def fetch_page(collection, query: dict, projection: Optional[dict], sort_field: str,
+                     descending: bool, limit: int, cursor: Optional[str]):
+    """
+    Returns (docs, next_cursor) for one keyset page. Reads limit + 1 documents
+    so the next cursor is only handed out when there really is another page.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    page_query = {**query, **keyset_filter(sort_field, descending, cursor)}
+    if projection and all(projection.values()) and sort_field not in projection:
+        # inclusion projections must still carry the key the cursor is built from
+        projection = {**projection, sort_field: 1}
+    docs = await collection.find(page_query, projection).sort(sort_spec(sort_field, descending)).limit(limit + 1).to_list(limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1], sort_field)
+    return docs, next_cursor
+
+
+def stream_ndjson(collection, query: dict, projection: Optional[dict], sort_field: str,
+                  descending: bool, cursor: Optional[str], transform, batch_size: int = 500,
+                  enrich=None):
+    """
+    Returns an async iterator of JSON lines straight off the Motor cursor. If
+    given, `await enrich(batch)` runs once per batch_size documents before they
+    are transformed, e.g. to resolve related names with one query per batch.
+    The cursor is decoded here, before the response starts, so a bad one is
+    still a 400.
+    """
+    query = {**query, **keyset_filter(sort_field, descending, cursor)}
+    docs = collection.find(query, projection).sort(sort_spec(sort_field, descending)).batch_size(batch_size)
+    return _ndjson_lines(docs, transform, batch_size, enrich)
+
+
+async def _ndjson_lines(docs, transform, batch_size: int, enrich):
+    batch = []
+    async for doc in docs:
+        batch.append(doc)
+        if len(batch) == batch_size:
+            if enrich:
+                await enrich(batch)
+            yield b"".join(to_json_line(transform(d)) for d in batch)
+            batch = []
+    if batch:
+        if enrich:
+            await enrich(batch)
+        yield b"".join(to_json_line(transform(d)) for d in batch)
@@ -0,0 +1,234 @@
+import io
+import os
+import zlib
+import json
+import base64
+import struct
+import asyncio
+from typing import NamedTuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+import qrcode
+from qrcode import constants
+from core.cache import TTLCache
+from core.config import (
+    QR_RENDER_WORKERS, CPUS_PER_WORKER, QR_ERROR_CORRECTION, QR_VERSION, QR_BOX_SIZE, QR_BORDER, QR_RENDER_CACHE_SIZE,
+)
+from core.metrics import timed, qr_render_latency
+
+_render_pool = None
+
+ERROR_CORRECTION_LEVELS = {
+    "L": constants.ERROR_CORRECT_L,
+    "M": constants.ERROR_CORRECT_M,
+    "Q": constants.ERROR_CORRECT_Q,
+    "H": constants.ERROR_CORRECT_H,
+}
+
+# format -> media type
+QR_FORMATS = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "matrix": "application/json",
+}
+
+
+class QROptions(NamedTuple):
+    error_correction: str = QR_ERROR_CORRECTION
+    version: int = QR_VERSION  # 0 = smallest that fits
+    box_size: int = QR_BOX_SIZE
+    border: int = QR_BORDER
+
+
+def qr_options(error_correction: Optional[str] = None, version: Optional[int] = None,
+               box_size: Optional[int] = None, border: Optional[int] = None) -> QROptions:
+    """Validated options, defaults filled from config; raises ValueError."""
+    defaults = QROptions()
+    opts = QROptions(
+        (error_correction or defaults.error_correction).upper(),
+        defaults.version if version is None else version,
+        defaults.box_size if box_size is None else box_size,
+        defaults.border if border is None else border,
+    )
+    if opts.error_correction not in ERROR_CORRECTION_LEVELS:
+        raise ValueError("error_correction must be one of L, M, Q, H")
+    if not 0 <= opts.version <= 40:
+        raise ValueError("version must be between 1 and 40 (0 = auto)")
+    if not 1 <= opts.box_size <= 50:
+        raise ValueError("box_size must be between 1 and 50")
+    if not 0 <= opts.border <= 16:
+        raise ValueError("border must be between 0 and 16")
+    return opts
+
+
+def qr_matrix(payload: str, opts: QROptions = QROptions()):
+    """(version, rows of booleans including the quiet zone); True is a dark module."""
+    qr = qrcode.QRCode(
+        version=opts.version or None,
+        error_correction=ERROR_CORRECTION_LEVELS[opts.error_correction],
+        box_size=1,
+        border=opts.border,
+    )
+    qr.add_data(str(payload))
+    qr.make(fit=not opts.version)
+    return qr.version, qr.get_matrix()
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
+def encode_png(matrix: list, box_size: int) -> bytes:
+    """
+    1-bit grayscale PNG straight from the module matrix. Each scaled row is
+    built once and repeated box_size times, so this needs no imaging library.
+    """
+    width = len(matrix[0]) * box_size
+    raw = bytearray()
+    for row in matrix:
+        bits = "".join(("0" if dark else "1") * box_size for dark in row)
+        bits += "1" * (-len(bits) % 8)
+        line = b"\x00" + int(bits, 2).to_bytes(len(bits) // 8, "big")
+        raw += line * box_size
+    header = struct.pack(">IIBBBBB", width, width, 1, 0, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + _png_chunk(b"IHDR", header)
+            + _png_chunk(b"IDAT", zlib.compress(bytes(raw), 9)) + _png_chunk(b"IEND", b""))
+
+
+def dark_runs(matrix: list):
+    """Yields (row, start, length) for every horizontal run of dark modules."""
+    n = len(matrix)
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < n:
+            if row[x]:
+                start = x
+                while x < n and row[x]:
+                    x += 1
+                yield y, start, x - start
+            else:
+                x += 1
+
+
+def encode_svg(matrix: list, box_size: int) -> bytes:
+    """Vector output: one path of horizontal runs in module units, scaled by the viewBox."""
+    n = len(matrix)
+    runs = "".join(f"M{x} {y}h{length}v1H{x}z" for y, x, length in dark_runs(matrix))
+    size = n * box_size
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" viewBox="0 0 {n} {n}" '
+        f'shape-rendering="crispEdges"><path fill="#fff" d="M0 0h{n}v{n}H0z"/>'
+        f'<path d="{runs}"/></svg>'
+    ).encode()
+
+
+def encode_matrix(matrix: list, version: int, opts: QROptions) -> bytes:
+    """
+    JSON for clients that draw the code themselves: rows are packed MSB-first,
+    each padded to a whole byte, then base64-encoded together.
+    """
+    packed = bytearray()
+    for row in matrix:
+        bits = "".join("1" if dark else "0" for dark in row)
+        bits += "0" * (-len(bits) % 8)
+        packed += int(bits, 2).to_bytes(len(bits) // 8, "big")
+    return json.dumps({
+        "version": version,
+        "error_correction": opts.error_correction,
+        "size": len(matrix),
+        "border": opts.border,
+        "bits": base64.b64encode(bytes(packed)).decode(),
+    }, separators=(",", ":")).encode()
+
+
+def render_qr(payload: str, format: str = "png", opts: QROptions = QROptions()) -> bytes:
+    version, matrix = qr_matrix(payload, opts)
+    if format == "svg":
+        return encode_svg(matrix, opts.box_size)
+    if format == "matrix":
+        return encode_matrix(matrix, version, opts)
+    return encode_png(matrix, opts.box_size)
+
+
+def render_qr_png(payload: str) -> bytes:
+    return render_qr(payload, "png")
+
+
+def render_qr_pngs(payloads: list) -> list:
+    return [render_qr_png(p) for p in payloads]
+
+
+def render_qr_png_pillow(payload: str) -> bytes:
+    """The original Pillow renderer, kept for comparison in benchmarks.qr_formats."""
+    qr = qrcode.QRCode(box_size=10, border=4)
+    qr.add_data(str(payload))
+    qr.make(fit=True)
+    img = qr.make_image(fill="black", back_color="white")
+
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def to_data_uri(png: bytes) -> str:
+    return "data:image/png;base64," + base64.b64encode(png).decode()
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor(max_workers=QR_RENDER_WORKERS or CPUS_PER_WORKER)
+    return _render_pool
+
+
+def _forget_render_pool():
+    # a forked child can't use its parent's pool (no manager thread); it makes its own
+    global _render_pool
+    _render_pool = None
+
+
+os.register_at_fork(after_in_child=_forget_render_pool)
+
+
+def shutdown_render_pool():
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=False, cancel_futures=True)
+        _render_pool = None
+
+
+# (payload, format, options) -> bytes; reprints of the same label skip rendering
+render_cache = TTLCache(maxsize=QR_RENDER_CACHE_SIZE, ttl=24 * 3600)
+
+
+async def render_qr_async(payload: str, format: str = "png", opts: QROptions = QROptions()) -> bytes:
+    key = (str(payload), format, opts)
+    data = render_cache.get(key)
+    if data is not None:
+        return data
+    loop = asyncio.get_running_loop()
+    with timed(qr_render_latency, format, stage="qr"):
+        data = await loop.run_in_executor(get_render_pool(), render_qr, payload, format, opts)
+    render_cache.set(key, data)
+    return data
+
+
+async def render_qr_png_async(payload: str) -> bytes:
+    return await render_qr_async(payload, "png")
+
+
+async def render_qr_pngs_async(payloads: list, chunk_size: int = 50):
+    """
+    Renders payloads in the process pool, yielding (start_index, pngs) per chunk
+    as soon as it completes so callers can report progress.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_render_pool()
+
+    async def render_chunk(start):
+        with timed(qr_render_latency, "chunk", stage="qr"):
+            pngs = await loop.run_in_executor(pool, render_qr_pngs, payloads[start:start + chunk_size])
+        return start, pngs
+
+    tasks = [render_chunk(i) for i in range(0, len(payloads), chunk_size)]
+    for next_done in asyncio.as_completed(tasks):
+        yield await next_done
@@ -1,14 +1,27 @@
+import os
+import time
+import hashlib
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from typing import Optional
 from fastapi import HTTPException, status, Request
-from core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from core.config import (
+    SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, MANUFACTURER_CACHE_TTL, MANUFACTURER_CACHE_SIZE,
+    BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE, TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL,
+)
+from core.cache import TTLCache
+from core.invalidation import invalidation_bus
+from core.metrics import timed, password_latency
+from db.client import manufacturers_collection
+from models.Manufacturer import ManufacturerPrincipal
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -16,6 +29,72 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+
+# bcrypt releases the GIL, so a small thread pool keeps it off the event loop
+# while still using every core. The semaphore bounds concurrent hashes and the
+# queue limit sheds load during login storms instead of queueing forever.
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt") if PASSWORD_HASH_WORKERS else None
+_password_slots = asyncio.Semaphore(max(1, PASSWORD_HASH_WORKERS))
+password_pool_stats = {"queued": 0, "in_flight": 0, "completed": 0, "rejected": 0}
+
+
+def _reset_password_pool():
+    # pool threads don't survive fork; a worker forked from a preloaded app needs its own
+    global _password_executor
+    if _password_executor is not None:
+        _password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+
+os.register_at_fork(after_in_child=_reset_password_pool)
+
+
+async def _run_password_work(operation: str, fn, *args):
+    if _password_executor is None:
+        with timed(password_latency, operation, stage="bcrypt"):
+            return fn(*args)
+    if password_pool_stats["queued"] >= PASSWORD_HASH_MAX_QUEUE:
+        password_pool_stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+    password_pool_stats["queued"] += 1
+    waiting = True
+    try:
+        async with _password_slots:
+            password_pool_stats["queued"] -= 1
+            waiting = False
+            password_pool_stats["in_flight"] += 1
+            try:
+                with timed(password_latency, operation, stage="bcrypt"):
+                    return await asyncio.get_running_loop().run_in_executor(_password_executor, fn, *args)
+            finally:
+                password_pool_stats["in_flight"] -= 1
+                password_pool_stats["completed"] += 1
+    finally:
+        # cancelled while still waiting for a slot
+        if waiting:
+            password_pool_stats["queued"] -= 1
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_password_work("hash", get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str):
+    """
+    Returns (ok, new_hash). new_hash is set when the stored hash was made with
+    an outdated cost factor and should be replaced.
+    """
+    def verify():
+        if not pwd_context.verify(plain_password, hashed_password):
+            return False, None
+        if pwd_context.needs_update(hashed_password):
+            return True, pwd_context.hash(plain_password)
+        return True, None
+    return await _run_password_work("verify", verify)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (
@@ -25,9 +104,19 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# sha256(token) -> verified payload; saves the signature check on repeat requests
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+
 def decode_access_token(token: str):
+    digest = hashlib.sha256(token.encode()).digest()
+    now = time.time()
+    payload = token_cache.get(digest)
+    if payload is not None and payload.get("exp", 0) > now:
+        return payload
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        # python-jose has already rejected expired tokens; cap the entry at exp
+        token_cache.set(digest, payload, ttl=min(TOKEN_CACHE_TTL, payload.get("exp", now) - now))
         return payload
     except JWTError:
         raise HTTPException(
@@ -41,7 +130,12 @@ def get_current_user(req: Request) -> dict:
     Works for both:
       - Browser: reads JWT from cookie
       - Mobile: reads JWT from Authorization header
+    The payload is kept on request.state so later dependencies reuse it.
     """
+    payload = getattr(req.state, "token_payload", None)
+    if payload is not None:
+        return payload
+
     token = None
 
     # 1. Check Authorization: Bearer header (mobile)
@@ -56,13 +150,41 @@ def get_current_user(req: Request) -> dict:
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
-    return decode_access_token(token)
+    payload = decode_access_token(token)
+    req.state.token_payload = payload
+    return payload
+
+# username -> ManufacturerPrincipal, so manufacturer routes skip the profile lookup
+manufacturer_cache = TTLCache(maxsize=MANUFACTURER_CACHE_SIZE, ttl=MANUFACTURER_CACHE_TTL)
 
-def get_current_manufacturer(req: Request) -> str:
+
+invalidation_bus.register("manufacturer", lambda keys: [manufacturer_cache.invalidate(k) for k in keys])
+
+
+async def invalidate_manufacturer(username: str):
+    """Call whenever a manufacturer's profile or approval status changes."""
+    manufacturer_cache.invalidate(username)
+    await invalidation_bus.publish("manufacturer", username)
+
+
+async def get_current_manufacturer(req: Request) -> ManufacturerPrincipal:
     payload = get_current_user(req)
     if payload.get("role") != "MANUFACTURER":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized as manufacturer"
         )
-    return payload.get("sub")
+    username = payload.get("sub")
+
+    # Tokens issued since the mid claim was added carry the manufacturer _id
+    if payload.get("mid"):
+        return ManufacturerPrincipal(id=payload["mid"], username=username)
+
+    principal = manufacturer_cache.get(username)
+    if principal is None:
+        manufacturer = await manufacturers_collection.find_one({"username": username}, {"_id": 1})
+        if not manufacturer:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Manufacturer not found")
+        principal = ManufacturerPrincipal(id=str(manufacturer["_id"]), username=username)
+        manufacturer_cache.set(username, principal)
+    return principal
@@ -0,0 +1,45 @@
+"""
+Fast JSON for read-heavy endpoints.
+
+Documents read back from Mongo already carry the types the response models
+declare, so these routes don't build a pydantic model per document and then
+have FastAPI's jsonable_encoder walk the result again. They pick the model's
+fields straight off the document (trusted_serializer) and return a
+FastJSONResponse, which orjson encodes in one pass. Routes opt in by
+returning a FastJSONResponse; response_model then only documents the shape.
+"""
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    # naive datetimes come out as isoformat() would write them, like the stdlib path
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def trusted_serializer(model):
+    """
+    Returns fn(doc, **extra) -> dict holding exactly the model's fields, in
+    model order, with defaults for missing ones and no validation. Only for
+    documents this app wrote itself.
+    """
+    fields = [(name, field.get_default(call_default_factory=True)) for name, field in model.model_fields.items()]
+
+    def serialize(doc: dict, **extra) -> dict:
+        out = {name: doc.get(name, default) for name, default in fields}
+        out.update(extra)
+        return out
+
+    return serialize
@@ -0,0 +1,168 @@
+import time
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+from fastapi import Request, Response
+from core.cache import TTLCache
+from core.config import VIEW_CACHE_SHARED
+
+
+class CachedView:
+    """A rendered JSON body plus the strong ETag derived from it."""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes, etag: str = None):
+        self.body = body
+        self.etag = etag or f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+class LocalSharedTier:
+    """
+    In-process stand-in for a shared cache (same interface as MongoSharedTier).
+    Stores serialized bytes only, so it behaves like a networked tier would.
+    """
+
+    def __init__(self):
+        self._data = {}  # key -> (expires_at, body)
+
+    async def get(self, key: str):
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return entry[1]
+
+    async def set(self, key: str, body: bytes, ttl: float):
+        self._data[key] = (time.monotonic() + ttl, body)
+
+    async def delete(self, key: str):
+        self._data.pop(key, None)
+
+
+class MongoSharedTier:
+    """Shared across workers via the view_cache collection (TTL index on expires_at)."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def get(self, key: str):
+        doc = await self.collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+        return doc["body"] if doc else None
+
+    async def set(self, key: str, body: bytes, ttl: float):
+        expires_at = datetime.utcnow() + timedelta(seconds=ttl)
+        await self.collection.update_one(
+            {"_id": key}, {"$set": {"body": body, "expires_at": expires_at}}, upsert=True
+        )
+
+    async def delete(self, key: str):
+        await self.collection.delete_one({"_id": key})
+
+
+class ReadThroughCache:
+    """
+    Two-tier read-through cache of rendered views: an in-process LRU in front
+    of an optional shared tier. Concurrent misses on one key share one load.
+    A shared-tier outage degrades to loading from the database.
+    """
+
+    def __init__(self, local: TTLCache, shared=None, shared_ttl: float = 300):
+        self.local = local
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.loads = 0
+        self._inflight = {}
+        self._invalidations = 0
+
+    async def get(self, key: str, loader):
+        """Returns the CachedView for key, calling `await loader()` on a miss. None is not cached."""
+        view = self.local.get(key)
+        if view is not None:
+            return view
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._fill(key, loader))
+            self._inflight[key] = pending
+        return await asyncio.shield(pending)
+
+    async def _fill(self, key: str, loader):
+        try:
+            return await self._load(key, loader)
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+
+    async def _load(self, key: str, loader):
+        if self.shared:
+            try:
+                body = await self.shared.get(key)
+            except Exception as e:
+                print(f"Shared cache read failed for {key}: {e}")
+                body = None
+            if body is not None:
+                self.shared_hits += 1
+                view = CachedView(bytes(body))
+                self.local.set(key, view)
+                return view
+            self.shared_misses += 1
+
+        self.loads += 1
+        started = self._invalidations
+        view = await loader()
+        # if anything was invalidated mid-load this copy may be stale; serve it, don't keep it
+        if view is None or self._invalidations != started:
+            return view
+        self.local.set(key, view)
+        if self.shared:
+            try:
+                await self.shared.set(key, view.body, self.shared_ttl)
+            except Exception as e:
+                print(f"Shared cache write failed for {key}: {e}")
+        return view
+
+    def invalidate_local(self, *keys: str):
+        """Drops keys from this process only (used for other workers' invalidations)."""
+        self._invalidations += 1
+        for key in keys:
+            self.local.invalidate(key)
+            self._inflight.pop(key, None)
+
+    async def invalidate(self, *keys: str):
+        self.invalidate_local(*keys)
+        for key in keys:
+            if self.shared:
+                try:
+                    await self.shared.delete(key)
+                except Exception as e:
+                    print(f"Shared cache delete failed for {key}: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "local": self.local.stats(),
+            "shared": {
+                "backend": VIEW_CACHE_SHARED or None,
+                "hits": self.shared_hits,
+                "misses": self.shared_misses,
+            },
+            "loads": self.loads,
+        }
+
+
+def view_response(view: CachedView, request: Request, cache_control: str = "private, no-cache") -> Response:
+    """200 with the cached body, or 304 when the client already holds this ETag."""
+    headers = {"ETag": view.etag, "Cache-Control": cache_control}
+    if view.etag in (t.strip() for t in request.headers.get("if-none-match", "").split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=view.body, media_type="application/json", headers=headers)
+
+
+def make_shared_tier():
+    if VIEW_CACHE_SHARED == "mongo":
+        from db.client import view_cache_collection
+        return MongoSharedTier(view_cache_collection)
+    if VIEW_CACHE_SHARED == "local":
+        return LocalSharedTier()
+    return None
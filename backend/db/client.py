@@ -1,14 +1,118 @@
+"""
+The Motor client and the collections the app uses.
+
+The client is created by connect() (called from the app's lifespan), or on
+first use by scripts that never run one. The module-level collections are
+proxies that bind to the current client when first touched, so modules can
+keep importing them at import time.
+"""
+import os
+import asyncio
 import motor.motor_asyncio
-from core.config import MONGODB_URI
-
-try:
-    MONGO_URI = MONGODB_URI
-    client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URI)
-    db = client["railway_db"]
-    
-    users_collection = db["users"]
-    manufacturers_collection = db["manufacturers"]
-    components_collection = db["components"]
-    inspections_collection = db["inspections"]
-except Exception as e:
-    print(f"Error connecting to MongoDB: {e}")
\ No newline at end of file
+from core.config import (
+    MONGODB_URI, MONGODB_DB, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS, MONGO_CONNECT_TIMEOUT_MS, MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_SOCKET_TIMEOUT_MS, MONGO_READ_PREFERENCE,
+)
+from core.metrics import mongo_listener, mongo_pool_listener
+
+client = None
+_generation = 0  # bumped whenever the client is replaced, so proxies rebind
+
+
+def connect():
+    """Creates the client if there isn't one; no I/O happens until first use."""
+    global client, _generation
+    if client is None:
+        client = motor.motor_asyncio.AsyncIOMotorClient(
+            MONGODB_URI,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+            waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS or None,
+            connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+            serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS or None,
+            readPreference=MONGO_READ_PREFERENCE,
+            appname="railway-qr",
+            event_listeners=[mongo_listener, mongo_pool_listener],
+        )
+        _generation += 1
+    return client
+
+
+def _forget_client():
+    # a MongoClient must not be used across fork; the child connects afresh
+    global client
+    client = None
+
+
+os.register_at_fork(after_in_child=_forget_client)
+
+
+def get_database():
+    return connect()[MONGODB_DB]
+
+
+async def warm_up(connections: int = MONGO_MIN_POOL_SIZE):
+    """Pings the server, then opens `connections` pooled connections with concurrent pings."""
+    database = get_database()
+    await database.command("ping")
+    if connections > 1:
+        await asyncio.gather(*(database.command("ping") for _ in range(connections)))
+
+
+def close():
+    """Closes every pooled connection; the next use creates a fresh client."""
+    global client
+    if client is not None:
+        client.close()
+        client = None
+
+
+def pool_stats() -> dict:
+    stats = mongo_pool_listener.snapshot()
+    stats["max_size"] = MONGO_MAX_POOL_SIZE
+    stats["utilization"] = round(stats["in_use"] / MONGO_MAX_POOL_SIZE, 3) if MONGO_MAX_POOL_SIZE else None
+    return stats
+
+
+class _DatabaseProxy:
+    def __getitem__(self, name: str):
+        return get_database()[name]
+
+    def __getattr__(self, attr):
+        return getattr(get_database(), attr)
+
+
+class _CollectionProxy:
+    """Stands in for a collection; the bound Motor collection is cached per client."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._bound = None
+        self._bound_generation = None
+
+    def _collection(self):
+        if self._bound_generation != _generation or client is None:
+            self._bound = get_database()[self._name]
+            self._bound_generation = _generation
+        return self._bound
+
+    def __getattr__(self, attr):
+        return getattr(self._collection(), attr)
+
+    def __repr__(self):
+        return f"<collection proxy {MONGODB_DB}.{self._name}>"
+
+
+db = _DatabaseProxy()
+
+users_collection = _CollectionProxy("users")
+manufacturers_collection = _CollectionProxy("manufacturers")
+components_collection = _CollectionProxy("components")
+inspections_collection = _CollectionProxy("inspections")
+counters_collection = _CollectionProxy("counters")
+component_daily_stats_collection = _CollectionProxy("component_daily_stats")
+view_cache_collection = _CollectionProxy("view_cache")
+jobs_collection = _CollectionProxy("jobs")
@@ -0,0 +1,94 @@
+import asyncio
+from datetime import datetime
+from pymongo import ReturnDocument, DESCENDING
+from db.client import counters_collection, components_collection
+from core.config import COMPONENT_ID_BLOCK_SIZE
+
+
+async def next_sequence(name: str, count: int = 1) -> int:
+    """
+    Atomically advances the counter `name` by `count` and returns the new value.
+    The caller owns the range (value - count, value].
+    """
+    doc = await counters_collection.find_one_and_update(
+        {"_id": name},
+        {"$inc": {"seq": count}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc["seq"]
+
+
+class SequenceAllocator:
+    """
+    Hands out sequence numbers from blocks reserved with a single $inc,
+    so with block_size > 1 most calls never touch the database.
+    Numbers are unique but may have gaps if the process restarts mid-block.
+    """
+
+    def __init__(self, block_size: int = 1):
+        self.block_size = max(1, block_size)
+        self._blocks = {}  # name -> [next, last]
+        self._locks = {}
+
+    async def next(self, name: str) -> int:
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            block = self._blocks.get(name)
+            if not block or block[0] > block[1]:
+                last = await next_sequence(name, self.block_size)
+                block = [last - self.block_size + 1, last]
+                self._blocks[name] = block
+            value = block[0]
+            block[0] += 1
+            return value
+
+    def reset(self):
+        self._blocks.clear()
+        self._locks.clear()
+
+
+component_id_allocator = SequenceAllocator(COMPONENT_ID_BLOCK_SIZE)
+_seeded_days = set()
+
+
+async def _seed_day_counter(name: str, prefix: str):
+    # IDs issued before the counter existed were numbered by collection size;
+    # start today's counter above the highest one so the unique index holds.
+    latest = await components_collection.find_one(
+        {"component_id": {"$regex": f"^{prefix}"}},
+        {"component_id": 1},
+        sort=[("component_id", DESCENDING)],
+    )
+    if latest:
+        try:
+            highest = int(latest["component_id"][len(prefix):])
+        except ValueError:
+            highest = 0
+        await counters_collection.update_one(
+            {"_id": name}, {"$max": {"seq": highest}}, upsert=True
+        )
+
+
+async def _day_counter(now: datetime):
+    day = now.strftime('%Y%m%d')
+    prefix = f"COMP{day}"
+    name = f"component_id:{day}"
+    if name not in _seeded_days:
+        await _seed_day_counter(name, prefix)
+        _seeded_days.add(name)
+    return name, prefix
+
+
+async def next_component_id(now: datetime = None) -> str:
+    name, prefix = await _day_counter(now or datetime.now())
+    seq = await component_id_allocator.next(name)
+    return f"{prefix}{seq:06d}"
+
+
+async def next_component_ids(count: int, now: datetime = None) -> list:
+    """Reserves `count` consecutive component IDs with one counter update."""
+    name, prefix = await _day_counter(now or datetime.now())
+    last = await next_sequence(name, count)
+    return [f"{prefix}{seq:06d}" for seq in range(last - count + 1, last + 1)]
+
@@ -0,0 +1,154 @@
+"""
+Declarative index registry, applied idempotently on startup.
+
+    python -m db.indexes            # create/verify indexes
+    python -m db.indexes --check    # explain() every hot query, exit 1 on COLLSCAN
+"""
+import sys
+import asyncio
+from datetime import datetime
+from bson import ObjectId
+from pymongo import IndexModel, ASCENDING, DESCENDING, GEOSPHERE
+from pymongo.errors import OperationFailure
+from db.client import db
+
+INDEXES = {
+    "users": [
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+    ],
+    "manufacturers": [
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+    ],
+    "components": [
+        IndexModel([("component_id", ASCENDING)], name="component_id_unique", unique=True),
+        IndexModel([("qr_code", ASCENDING)], name="qr_code_unique", unique=True),
+        IndexModel([("uuid", ASCENDING)], name="uuid_unique", unique=True),
+        IndexModel([("manufacturer_id", ASCENDING), ("_id", ASCENDING)], name="manufacturer_id"),
+        IndexModel([("manufacturer_id", ASCENDING), ("generated_at", ASCENDING), ("_id", ASCENDING)],
+                   name="manufacturer_generated_at"),
+        IndexModel([("generated_at", ASCENDING), ("_id", ASCENDING)], name="generated_at"),
+        IndexModel([("updated_at", ASCENDING), ("_id", ASCENDING)], name="updated_at"),
+        IndexModel([("installation_point", GEOSPHERE)], name="installation_point_2dsphere"),
+        IndexModel([("last_inspection_status", ASCENDING), ("last_inspected_at", DESCENDING), ("_id", DESCENDING)],
+                   name="last_inspection"),
+        IndexModel([("expected_expiry", ASCENDING), ("_id", ASCENDING)], name="expected_expiry"),
+    ],
+    "inspections": [
+        IndexModel([("component_id", ASCENDING), ("inspected_at", DESCENDING), ("_id", DESCENDING)],
+                   name="component_inspected_at_id"),
+        IndexModel([("idempotency_key", ASCENDING)], name="idempotency_key_unique", unique=True,
+                   partialFilterExpression={"idempotency_key": {"$type": "string"}}),
+    ],
+    "component_daily_stats": [
+        IndexModel([("manufacturer_id", ASCENDING), ("date", ASCENDING), ("component_name", ASCENDING)],
+                   name="manufacturer_date_name_unique", unique=True),
+    ],
+    "view_cache": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "jobs": [
+        IndexModel([("status", ASCENDING), ("run_at", ASCENDING)], name="status_run_at"),
+        IndexModel([("status", ASCENDING), ("lease_until", ASCENDING)], name="status_lease_until"),
+        IndexModel([("owner", ASCENDING), ("created_at", DESCENDING)], name="owner_created_at"),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+# Indexes superseded by entries above; dropped on startup if still present
+DROPPED_INDEXES = {
+    "inspections": ["component_inspected_at"],
+}
+
+# The queries the routers run on every request, with representative values.
+# (name, collection, filter, sort)
+_SAMPLE_ID = ObjectId()
+_SAMPLE_MANUFACTURER = str(ObjectId())
+HOT_QUERIES = [
+    ("auth.login", "users", {"username": "sample", "role": "FIELD_INSPECTOR"}, None),
+    ("auth.register", "users", {"username": "sample"}, None),
+    ("manufacturer.by_username", "manufacturers", {"username": "sample"}, None),
+    ("manufacturer.list_components", "components", {"manufacturer_id": _SAMPLE_MANUFACTURER}, [("_id", ASCENDING)]),
+    ("manufacturer.list_components.by_date", "components", {"manufacturer_id": _SAMPLE_MANUFACTURER},
+     [("generated_at", ASCENDING), ("_id", ASCENDING)]),
+    ("manufacturer.daily_stats.live", "components",
+     {"manufacturer_id": _SAMPLE_MANUFACTURER, "generated_at": {"$gte": datetime(2024, 1, 1)}}, None),
+    ("manufacturer.daily_stats", "component_daily_stats",
+     {"manufacturer_id": _SAMPLE_MANUFACTURER, "date": {"$gte": "2024-01-01"}}, [("date", ASCENDING)]),
+    ("counters.seed_day", "components", {"component_id": {"$regex": "^COMP20240101"}}, [("component_id", DESCENDING)]),
+    ("components.get", "components", {"_id": _SAMPLE_ID}, None),
+    ("components.list", "components", {}, [("_id", ASCENDING)]),
+    ("inspection.history", "inspections", {"component_id": str(_SAMPLE_ID)},
+     [("inspected_at", DESCENDING), ("_id", DESCENDING)]),
+    ("inspection.fleet", "components", {"last_inspection_status": "DEFECTED"},
+     [("last_inspected_at", DESCENDING), ("_id", DESCENDING)]),
+    ("components.within", "components",
+     {"installation_point": {"$geoWithin": {"$centerSphere": [[77.59, 12.97], 0.0003]}}}, [("_id", ASCENDING)]),
+    ("migrations.inspection_stats", "inspections", {},
+     [("component_id", DESCENDING), ("inspected_at", ASCENDING), ("_id", ASCENDING)]),
+    ("inspection.sync.duplicates", "inspections", {"idempotency_key": {"$in": ["sample"]}}, None),
+    ("inspection.sync.changes", "components", {"updated_at": {"$gt": datetime(2024, 1, 1)}},
+     [("updated_at", ASCENDING), ("_id", ASCENDING)]),
+    ("forecast.refresh", "components", {"updated_at": {"$gte": datetime(2024, 1, 1)}}, None),
+    ("forecast.expiring", "components",
+     {"expected_expiry": {"$gte": datetime(2024, 1, 1), "$lt": datetime(2024, 4, 1)}},
+     [("expected_expiry", ASCENDING), ("_id", ASCENDING)]),
+    ("jobs.claim", "jobs", {"status": "PENDING", "run_at": {"$lte": datetime(2024, 1, 1)}}, [("run_at", ASCENDING)]),
+    ("jobs.reclaim", "jobs", {"status": "RUNNING", "lease_until": {"$lt": datetime(2024, 1, 1)}}, None),
+    ("jobs.list", "jobs", {"owner": _SAMPLE_MANUFACTURER}, [("created_at", DESCENDING)]),
+]
+
+
+async def ensure_indexes():
+    """Creates every registered index. Existing identical indexes are a no-op."""
+    for collection, names in DROPPED_INDEXES.items():
+        existing = await db[collection].index_information()
+        for name in names:
+            if name in existing:
+                await db[collection].drop_index(name)
+    for collection, models in INDEXES.items():
+        for model in models:
+            try:
+                await db[collection].create_indexes([model])
+            except OperationFailure as e:
+                # e.g. duplicates in old data blocking a unique index; keep serving
+                print(f"Could not create index {collection}.{model.document['name']}: {e}")
+
+
+def _plan_stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+async def explain_hot_queries() -> list:
+    """Returns (name, stages, ok) for every hot query's winning plan."""
+    results = []
+    for name, collection, query, sort in HOT_QUERIES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explained = await cursor.explain()
+        stages = list(_plan_stages(explained["queryPlanner"]["winningPlan"]))
+        results.append((name, stages, "COLLSCAN" not in stages))
+    return results
+
+
+async def _main(check: bool) -> int:
+    await ensure_indexes()
+    if not check:
+        print("Indexes ensured")
+        return 0
+    failed = 0
+    for name, stages, ok in await explain_hot_queries():
+        print(f"{'ok  ' if ok else 'FAIL'} {name:<40} {' > '.join(stages)}")
+        failed += not ok
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main("--check" in sys.argv)))
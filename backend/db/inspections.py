@@ -0,0 +1,42 @@
+from datetime import datetime
+from pymongo import UpdateOne
+from core.config import DEFECT_RATE_ALPHA
+
+# Components carry a summary of their inspections so fleet-wide views never
+# touch the inspections collection:
+#   last_inspected_at, last_inspection_status  - newest inspection (by inspected_at)
+#   inspection_count, defect_count             - running totals
+#   defect_rate                                - EWMA of DEFECTED (1) / anything else (0)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def is_defect(status: str) -> bool:
+    return status.upper() == "DEFECTED"
+
+
+def inspection_stats_update(status: str, inspected_at: datetime, now: datetime) -> list:
+    """
+    Update pipeline folding one inspection into a component's summary. Out-of-order
+    arrivals (offline sync) still count, but only move last_* if they are newer.
+    """
+    defect = 1 if is_defect(status) else 0
+    newer = {"$gt": [inspected_at, {"$ifNull": ["$last_inspected_at", _EPOCH]}]}
+    stage = {
+        "inspection_count": {"$add": [{"$ifNull": ["$inspection_count", 0]}, 1]},
+        "defect_count": {"$add": [{"$ifNull": ["$defect_count", 0]}, defect]},
+        "defect_rate": {"$add": [
+            {"$multiply": [1 - DEFECT_RATE_ALPHA, {"$ifNull": ["$defect_rate", 0]}]},
+            DEFECT_RATE_ALPHA * defect,
+        ]},
+        "last_inspected_at": {"$cond": [newer, inspected_at, "$last_inspected_at"]},
+        "last_inspection_status": {"$cond": [newer, {"$literal": status.upper()}, "$last_inspection_status"]},
+        "updated_at": now,
+    }
+    if defect:
+        stage["status"] = "Needs Replacement"
+    return [{"$set": stage}]
+
+
+def inspection_stats_op(component_oid, status: str, inspected_at: datetime, now: datetime) -> UpdateOne:
+    return UpdateOne({"_id": component_oid}, inspection_stats_update(status, inspected_at, now))
@@ -0,0 +1,93 @@
+"""
+Database startup and shutdown, run from the app's lifespan.
+
+Startup connects, opens the minimum pool and ensures indexes before the app
+reports ready. If the database can't be reached within MONGO_STARTUP_TIMEOUT
+the app starts serving anyway and keeps retrying in the background, with
+/health/ready answering 503 until it succeeds. On SIGTERM readiness turns to
+"draining" DRAIN_DELAY_SECONDS before the server stops accepting.
+"""
+import signal
+import asyncio
+import threading
+from datetime import datetime
+from core.config import MONGO_STARTUP_TIMEOUT, DRAIN_DELAY_SECONDS
+from db.client import connect, warm_up, close, get_database
+
+PREPARE_RETRY_SECONDS = 5
+READY_PING_TIMEOUT = 2
+
+readiness = {"ready": False, "draining": False, "error": None, "ready_at": None}
+_preparing = None
+
+
+async def _prepare():
+    from db.indexes import ensure_indexes
+    while True:
+        try:
+            await warm_up()
+            await ensure_indexes()
+        except Exception as e:
+            readiness["error"] = str(e)
+            print(f"Database not ready, retrying in {PREPARE_RETRY_SECONDS}s: {e}")
+            await asyncio.sleep(PREPARE_RETRY_SECONDS)
+        else:
+            readiness.update(ready=True, error=None, ready_at=datetime.utcnow())
+            return
+
+
+async def start_database():
+    global _preparing
+    connect()
+    _preparing = asyncio.create_task(_prepare())
+    try:
+        await asyncio.wait_for(asyncio.shield(_preparing), MONGO_STARTUP_TIMEOUT)
+    except asyncio.TimeoutError:
+        print(f"Database still not ready after {MONGO_STARTUP_TIMEOUT}s; serving while it retries")
+
+
+def begin_drain():
+    """Fails readiness so load balancers stop routing here while shutdown finishes."""
+    readiness.update(ready=False, draining=True)
+
+
+def drain_on_sigterm(delay: float = DRAIN_DELAY_SECONDS):
+    """
+    Makes SIGTERM fail readiness at once and passes it on to the server's own
+    handler (which stops accepting) `delay` seconds later. Call from the
+    lifespan: uvicorn has installed its handlers with signal.signal by then.
+    A second SIGTERM during the delay goes straight to the server.
+    """
+    if delay <= 0 or threading.current_thread() is not threading.main_thread():
+        return
+    server_handler = signal.getsignal(signal.SIGTERM)
+    if not callable(server_handler):
+        return
+    loop = asyncio.get_running_loop()
+
+    def on_sigterm(signum, frame):
+        begin_drain()
+        signal.signal(signal.SIGTERM, server_handler)
+        print(f"SIGTERM received; draining for {delay}s before shutdown")
+        loop.call_soon_threadsafe(loop.call_later, delay, server_handler, signum, frame)
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+
+
+async def stop_database():
+    if _preparing and not _preparing.done():
+        _preparing.cancel()
+    close()
+
+
+async def check_ready() -> bool:
+    """Ready once startup finished and the server still answers a ping."""
+    if not readiness["ready"]:
+        return False
+    try:
+        await asyncio.wait_for(get_database().command("ping"), READY_PING_TIMEOUT)
+    except Exception as e:
+        readiness["error"] = str(e)
+        return False
+    readiness["error"] = None
+    return True
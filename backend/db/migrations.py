@@ -0,0 +1,107 @@
+"""
+One-off data migrations. Each is idempotent and safe to re-run.
+
+    python -m db.migrations <name>
+"""
+import sys
+import asyncio
+from pymongo import UpdateOne
+from bson import ObjectId
+from bson.errors import InvalidId
+from db.client import components_collection, inspections_collection
+from db.inspections import is_defect
+from core.config import DEFECT_RATE_ALPHA
+from core.geo import parse_location_string
+
+
+async def backfill_updated_at():
+    """Components written before updated_at existed get it from generated_at, for delta sync."""
+    result = await components_collection.update_many(
+        {"updated_at": {"$exists": False}},
+        [{"$set": {"updated_at": {"$ifNull": ["$generated_at", "$$NOW"]}}}],
+    )
+    return result.modified_count
+
+
+async def installation_points():
+    """Adds a GeoJSON installation_point for every legacy "lat,lon" installation_location."""
+    ops = []
+    updated = 0
+    cursor = components_collection.find(
+        {"installation_location": {"$type": "string"}, "installation_point": {"$exists": False}},
+        {"installation_location": 1},
+    ).batch_size(1000)
+    async for c in cursor:
+        point = parse_location_string(c["installation_location"])
+        if point is None:
+            print(f"Skipping {c['_id']}: unparseable installation_location {c['installation_location']!r}")
+            continue
+        ops.append(UpdateOne({"_id": c["_id"]}, {"$set": {"installation_point": point}}))
+        if len(ops) == 1000:
+            updated += (await components_collection.bulk_write(ops, ordered=False)).modified_count
+            ops = []
+    if ops:
+        updated += (await components_collection.bulk_write(ops, ordered=False)).modified_count
+    return updated
+
+
+async def inspection_stats():
+    """Recomputes the per-component inspection summary from the inspections collection."""
+    ops = []
+    updated = 0
+
+    async def flush():
+        nonlocal ops, updated
+        if ops:
+            updated += (await components_collection.bulk_write(ops, ordered=False)).modified_count
+            ops = []
+
+    def queue(component_id, summary):
+        try:
+            oid = ObjectId(component_id) if component_id else None
+        except (InvalidId, TypeError):
+            oid = None
+        if oid is None:
+            print(f"Skipping {summary['inspection_count']} inspections with unusable component_id {component_id!r}")
+            return
+        ops.append(UpdateOne({"_id": oid}, {"$set": summary}))
+
+    # the exact reverse of the component_inspected_at_id index, so the sort
+    # walks the index instead of sorting the whole collection in memory;
+    # inspections still come oldest first within each component
+    current, summary = None, None
+    cursor = inspections_collection.find({}, {"component_id": 1, "status": 1, "inspected_at": 1}).sort(
+        [("component_id", -1), ("inspected_at", 1), ("_id", 1)]
+    ).batch_size(1000)
+    async for insp in cursor:
+        if insp.get("component_id") != current:
+            if summary:
+                queue(current, summary)
+            current = insp.get("component_id")
+            summary = {"inspection_count": 0, "defect_count": 0, "defect_rate": 0.0}
+        defect = 1 if is_defect(insp.get("status", "")) else 0
+        summary["inspection_count"] += 1
+        summary["defect_count"] += defect
+        summary["defect_rate"] = (1 - DEFECT_RATE_ALPHA) * summary["defect_rate"] + DEFECT_RATE_ALPHA * defect
+        summary["last_inspected_at"] = insp.get("inspected_at")
+        summary["last_inspection_status"] = insp.get("status", "").upper()
+        if len(ops) >= 1000:
+            await flush()
+    if summary:
+        queue(current, summary)
+    await flush()
+    return updated
+
+
+MIGRATIONS = {
+    "backfill_updated_at": backfill_updated_at,
+    "installation_points": installation_points,
+    "inspection_stats": inspection_stats,
+}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] not in MIGRATIONS:
+        print(f"usage: python -m db.migrations {{{','.join(MIGRATIONS)}}}")
+        sys.exit(2)
+    print(f"{sys.argv[1]}: {asyncio.run(MIGRATIONS[sys.argv[1]]())} documents updated")
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List, Tuple, Annotated
 from datetime import datetime
 
 class ComponentIn(BaseModel):
@@ -31,11 +31,27 @@ class ComponentOut(BaseModel):
     unit_weight: float
     irs_specification: str
     qr_data: Optional[str] = None
+    qr_url: Optional[str] = None
     generated_at: datetime
     qc_status: str = "Pending"
     qc_date: Optional[datetime] = None
     inspector_id: Optional[str] = None
     warehouse_id: Optional[str] = None
     installation_location: Optional[str] = None
+    installation_point: Optional[Dict[str, Any]] = None
     last_maintenance: Optional[datetime] = None
     expected_expiry: Optional[datetime] = None
+    last_inspected_at: Optional[datetime] = None
+    last_inspection_status: Optional[str] = None
+    inspection_count: Optional[int] = None
+    defect_count: Optional[int] = None
+    defect_rate: Optional[float] = None
+
+# A [lon, lat] position
+LonLat = Tuple[Annotated[float, Field(ge=-180, le=180)], Annotated[float, Field(ge=-90, le=90)]]
+
+class GeoWithinQuery(BaseModel):
+    # Either a closed area or a track polyline plus corridor width
+    polygon: Optional[List[LonLat]] = None
+    polyline: Optional[List[LonLat]] = None
+    buffer_m: float = Field(50, gt=0, le=10000)
@@ -0,0 +1,86 @@
+from bson import ObjectId
+from bson.errors import InvalidId
+from core.cache import TTLCache
+from core.config import (
+    MANUFACTURER_CACHE_TTL, MANUFACTURER_CACHE_SIZE,
+    VIEW_CACHE_SIZE, VIEW_CACHE_TTL, VIEW_CACHE_SHARED_TTL,
+)
+from core.components import COMPONENT_PROJECTION, qr_url, component_out
+from core.serialization import dumps
+from core.viewcache import CachedView, ReadThroughCache, make_shared_tier
+from core.invalidation import invalidation_bus
+from db.client import manufacturers_collection, components_collection
+
+UNKNOWN_MANUFACTURER = "Unknown"
+
+# manufacturer _id (str) -> company name, shared by every component read
+manufacturer_name_cache = TTLCache(maxsize=MANUFACTURER_CACHE_SIZE, ttl=MANUFACTURER_CACHE_TTL)
+
+
+async def resolve_manufacturer_names(manufacturer_ids) -> dict:
+    """
+    Maps manufacturer ids to company names with at most one $in query for
+    whatever the cache doesn't already know. Unknown or malformed ids map
+    to "Unknown".
+    """
+    names = {}
+    missing = {}
+    for mid in set(filter(None, manufacturer_ids)):
+        name = manufacturer_name_cache.get(mid)
+        if name is not None:
+            names[mid] = name
+            continue
+        try:
+            missing[ObjectId(mid)] = mid
+        except (InvalidId, TypeError):
+            names[mid] = UNKNOWN_MANUFACTURER
+
+    if missing:
+        cursor = manufacturers_collection.find({"_id": {"$in": list(missing)}}, {"company_name": 1})
+        async for m in cursor:
+            mid = missing.pop(m["_id"])
+            names[mid] = m.get("company_name") or UNKNOWN_MANUFACTURER
+            manufacturer_name_cache.set(mid, names[mid])
+        # ids with no manufacturer document; cache those too so they stay cheap
+        for mid in missing.values():
+            names[mid] = UNKNOWN_MANUFACTURER
+            manufacturer_name_cache.set(mid, UNKNOWN_MANUFACTURER)
+    return names
+
+
+async def resolve_manufacturer_name(manufacturer_id) -> str:
+    if not manufacturer_id:
+        return UNKNOWN_MANUFACTURER
+    return (await resolve_manufacturer_names([manufacturer_id]))[manufacturer_id]
+
+
+def invalidate_manufacturer_name(manufacturer_id: str):
+    manufacturer_name_cache.invalidate(manufacturer_id)
+
+
+# component _id (str) -> rendered ComponentOut JSON, the body of every QR scan.
+# Manufacturer renames reach cached views within VIEW_CACHE_SHARED_TTL.
+component_view_cache = ReadThroughCache(
+    TTLCache(maxsize=VIEW_CACHE_SIZE, ttl=VIEW_CACHE_TTL), make_shared_tier(), VIEW_CACHE_SHARED_TTL
+)
+invalidation_bus.register("component_view", lambda keys: component_view_cache.invalidate_local(*keys))
+
+
+async def get_component_view(object_id: ObjectId):
+    """Cached ComponentOut JSON for a component, or None if it doesn't exist."""
+
+    async def load():
+        component = await components_collection.find_one({"_id": object_id}, COMPONENT_PROJECTION)
+        if not component:
+            return None
+        manufacturer = await resolve_manufacturer_name(component.get("manufacturer_id"))
+        return CachedView(dumps(component_out(component, manufacturer=manufacturer, qr_url=qr_url(object_id))))
+
+    return await component_view_cache.get(str(object_id), load)
+
+
+async def invalidate_component_views(*object_ids):
+    """Call after any write that changes what ComponentOut shows for these components."""
+    keys = [str(i) for i in object_ids]
+    await component_view_cache.invalidate(*keys)
+    await invalidation_bus.publish("component_view", *keys)
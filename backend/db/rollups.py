@@ -0,0 +1,112 @@
+from collections import Counter
+from datetime import datetime
+from typing import Optional, List
+from pymongo import UpdateOne
+from db.client import components_collection, component_daily_stats_collection
+
+# component_daily_stats holds one document per (manufacturer, UTC day, component
+# name) with a running count and a per-qc_status breakdown, maintained on insert.
+
+
+def _day(dt: datetime) -> str:
+    return dt.date().isoformat()
+
+
+def _stats_updates(docs: list) -> list:
+    grouped = Counter(
+        (d["manufacturer_id"], _day(d["generated_at"]), d["component_name"], d.get("qc_status", "Pending"))
+        for d in docs
+    )
+    totals = Counter()
+    by_status = {}
+    for (mid, day, name, qc), n in grouped.items():
+        totals[(mid, day, name)] += n
+        by_status.setdefault((mid, day, name), {})[f"qc_status.{qc}"] = n
+    return [
+        UpdateOne(
+            {"manufacturer_id": mid, "date": day, "component_name": name},
+            {"$inc": {"count": n, **by_status[(mid, day, name)]}},
+            upsert=True,
+        )
+        for (mid, day, name), n in totals.items()
+    ]
+
+
+async def record_components_created(docs: list):
+    """Folds freshly inserted component documents into the daily rollup."""
+    ops = _stats_updates(docs)
+    if ops:
+        await component_daily_stats_collection.bulk_write(ops, ordered=False)
+
+
+def daily_counts_pipeline(manufacturer_id: Optional[str] = None, start: Optional[datetime] = None,
+                          end: Optional[datetime] = None, names: Optional[List[str]] = None) -> list:
+    """$group pipeline over components producing rollup-shaped rows."""
+    match = {}
+    if manufacturer_id:
+        match["manufacturer_id"] = manufacturer_id
+    if start or end:
+        match["generated_at"] = {}
+        if start:
+            match["generated_at"]["$gte"] = start
+        if end:
+            match["generated_at"]["$lt"] = end
+    if names:
+        match["component_name"] = {"$in": names}
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "manufacturer_id": "$manufacturer_id",
+                "date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$generated_at"}},
+                "component_name": "$component_name",
+                "qc_status": {"$ifNull": ["$qc_status", "Pending"]},
+            },
+            "n": {"$sum": 1},
+        }},
+        {"$group": {
+            "_id": {
+                "manufacturer_id": "$_id.manufacturer_id",
+                "date": "$_id.date",
+                "component_name": "$_id.component_name",
+            },
+            "count": {"$sum": "$n"},
+            "qc_status": {"$push": {"k": "$_id.qc_status", "v": "$n"}},
+        }},
+        {"$project": {
+            "_id": 0,
+            "manufacturer_id": "$_id.manufacturer_id",
+            "date": "$_id.date",
+            "component_name": "$_id.component_name",
+            "count": 1,
+            "qc_status": {"$arrayToObject": "$qc_status"},
+        }},
+        {"$sort": {"date": 1, "component_name": 1}},
+    ]
+
+
+async def rebuild_daily_stats(manufacturer_id: Optional[str] = None) -> int:
+    """Recomputes the rollup from the components collection (backfill / repair)."""
+    query = {"manufacturer_id": manufacturer_id} if manufacturer_id else {}
+    await component_daily_stats_collection.delete_many(query)
+    ops = []
+    written = 0
+    async for row in components_collection.aggregate(daily_counts_pipeline(manufacturer_id), allowDiskUse=True):
+        ops.append(UpdateOne(
+            {"manufacturer_id": row["manufacturer_id"], "date": row["date"], "component_name": row["component_name"]},
+            {"$set": {"count": row["count"], "qc_status": row["qc_status"]}},
+            upsert=True,
+        ))
+        if len(ops) == 1000:
+            await component_daily_stats_collection.bulk_write(ops, ordered=False)
+            written += len(ops)
+            ops = []
+    if ops:
+        await component_daily_stats_collection.bulk_write(ops, ordered=False)
+        written += len(ops)
+    return written
+
+
+if __name__ == "__main__":
+    import asyncio
+    print(f"Rebuilt {asyncio.run(rebuild_daily_stats())} daily stat rows")
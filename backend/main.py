@@ -1,11 +1,37 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import auth,manufacturer,components,inspection
+from routers import auth,manufacturer,components,inspection,qr,metrics,events,health,forecast
+from db.lifecycle import start_database, stop_database, begin_drain, drain_on_sigterm
+from core.qr import shutdown_render_pool
+from core.metrics import MetricsMiddleware
+from core.events import event_bus
+from core.jobs import job_queue
+from core.invalidation import invalidation_bus
+from core.config import SERVER_TIMING
 import os
 
 MONGO_URI = os.getenv("MONGODB_URI")
 
-app = FastAPI(title="Railway QR System", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # connect, warm the pool and ensure indexes before reporting ready
+    await start_database()
+    await invalidation_bus.start()
+    await event_bus.start()
+    job_queue.start()
+    # SIGTERM reports "draining" on /health/ready before uvicorn stops accepting
+    drain_on_sigterm()
+    yield
+    # uvicorn has stopped accepting and drained in-flight requests by now
+    begin_drain()
+    await job_queue.stop()
+    await event_bus.stop()
+    await invalidation_bus.stop()
+    shutdown_render_pool()
+    await stop_database()
+
+app = FastAPI(title="Railway QR System", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -14,14 +40,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
+# Per-route latency and in-flight gauges for /metrics; outermost so it times everything
+app.add_middleware(MetricsMiddleware, server_timing=SERVER_TIMING)
+
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(manufacturer.router, prefix="/manufacturer", tags=["Manufacturer"])
 app.include_router(components.router, prefix="/components", tags=["Components"])
 app.include_router(inspection.router, prefix="/inspection", tags=["Inspection"])
+app.include_router(qr.router, prefix="/qr", tags=["QR"])
+app.include_router(events.router, prefix="/events", tags=["Events"])
+app.include_router(forecast.router, prefix="/forecast", tags=["Forecast"])
+app.include_router(metrics.router, tags=["Metrics"])
+app.include_router(health.router, prefix="/health", tags=["Health"])
 
+# Development server, one process; production runs serve.py
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -22,4 +22,9 @@ class ManufacturerOut(BaseModel):
     address: str 
     license_number: str
     approval_status: str
-    registration_date: datetime
\ No newline at end of file
+    registration_date: datetime
+
+class ManufacturerPrincipal(BaseModel):
+    """The authenticated manufacturer, as resolved by get_current_manufacturer."""
+    id: str
+    username: str
@@ -0,0 +1,35 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional, List
+from models.Inspection import InspectionCreate
+
+
+class SyncInspection(InspectionCreate):
+    idempotency_key: str
+    inspected_at: Optional[datetime] = None  # when the inspector recorded it offline
+
+
+class SyncInstall(BaseModel):
+    idempotency_key: str
+    component_id: str
+    latitude: float
+    longitude: float
+    installed_at: Optional[datetime] = None
+
+
+class SyncRequest(BaseModel):
+    inspections: List[SyncInspection] = []
+    installs: List[SyncInstall] = []
+
+
+class SyncItemResult(BaseModel):
+    idempotency_key: str
+    status: str  # "created", "applied", "duplicate", "not_found" or "invalid"
+    id: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class SyncResponse(BaseModel):
+    inspections: List[SyncItemResult]
+    installs: List[SyncItemResult]
+    server_time: datetime
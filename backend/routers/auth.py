@@ -3,8 +3,8 @@ from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from db.client import users_collection, manufacturers_collection  # your db access
 from models.User import UserCreate, UserLogin
-from core.security import get_current_user
-from core.security import create_access_token, get_password_hash,verify_password
+from core.security import get_current_user, invalidate_manufacturer
+from core.security import create_access_token, get_password_hash_async, verify_password_async
 
 SECRET_KEY = "your-secret"
 ALGORITHM = "HS256"
@@ -22,7 +22,7 @@ async def register_user(user: UserCreate):
     if existing:
         raise HTTPException(status_code=400, detail="Username already exists")
 
-    hashed_pwd = get_password_hash(user.password)
+    hashed_pwd = await get_password_hash_async(user.password)
     now = datetime.utcnow()
 
     # Always keep core user data
@@ -61,6 +61,7 @@ async def register_user(user: UserCreate):
             "registration_date": user.registration_date or '',
         }
         await manufacturers_collection.insert_one(manufacturer_profile)
+        await invalidate_manufacturer(user.username)
     
     return {"message": "User registered successfully"}
 
@@ -71,12 +72,21 @@ async def login(response: Response, login_data: UserLogin):
     if not user:
         raise HTTPException(status_code=400, detail="Invalid credentials")
     
-    if not verify_password(login_data.password, user["password"]):
+    ok, new_hash = await verify_password_async(login_data.password, user["password"])
+    if not ok:
         raise HTTPException(status_code=400, detail="Invalid credentials")
+    if new_hash:
+        # stored hash used an outdated bcrypt cost; upgrade it while we have the password
+        await users_collection.update_one({"_id": user["_id"]}, {"$set": {"password": new_hash, "updated_at": datetime.utcnow()}})
 
-    access_token = create_access_token(
-        data={"sub": user["username"], "role": user["role"]}
-    )
+    claims = {"sub": user["username"], "role": user["role"]}
+    if user["role"] == "MANUFACTURER":
+        # Embed the manufacturer _id so manufacturer routes need no profile lookup
+        manufacturer = await manufacturers_collection.find_one({"username": user["username"]}, {"_id": 1})
+        if manufacturer:
+            claims["mid"] = str(manufacturer["_id"])
+
+    access_token = create_access_token(data=claims)
 
     # Set HttpOnly cookie (for browsers)
     response.set_cookie(
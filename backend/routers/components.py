@@ -1,26 +1,144 @@
-from fastapi import APIRouter, HTTPException, Depends
+import json
+import base64
+from fastapi import APIRouter, HTTPException, Depends, Request, Query
+from fastapi.responses import StreamingResponse
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from bson import ObjectId
-from db.models.component import ComponentIn, ComponentOut
-from db.client import components_collection,manufacturers_collection
+from pymongo.errors import OperationFailure
+from db.models.component import ComponentIn, ComponentOut, GeoWithinQuery
+from db.client import components_collection
+from db.resolvers import resolve_manufacturer_names, get_component_view, component_view_cache, invalidate_component_views
 from core.security import get_current_user
+from core.components import COMPONENT_PROJECTION, COMPONENT_FIELDS, qr_url, check_sort, projected_view, component_out
+from core.pagination import fetch_page, parse_fields, stream_ndjson, MAX_PAGE_SIZE
+from core.geo import geo_point, corridor_filter
+from core.viewcache import view_response
+from core.serialization import FastJSONResponse
+from core.events import event_bus
 
 router = APIRouter()
 
 
+def _encode_near_cursor(distance: float, ids: list) -> str:
+    state = {"d": distance, "ids": [str(i) for i in ids]}
+    return base64.urlsafe_b64encode(json.dumps(state).encode()).decode().rstrip("=")
+
+
+def _decode_near_cursor(cursor: str):
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return float(state["d"]), [ObjectId(i) for i in state["ids"]]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def _component_views(comps: list, projection: Optional[dict]) -> list:
+    if projection:
+        return [projected_view(c) for c in comps]
+    names = await resolve_manufacturer_names(c.get("manufacturer_id") for c in comps)
+    views = []
+    for c in comps:
+        view = component_out(c, manufacturer=names.get(c.get("manufacturer_id")), qr_url=qr_url(c["_id"]))
+        if "distance_m" in c:
+            view["distance_m"] = c["distance_m"]
+        views.append(view)
+    return views
+
+
+# Largest radius /near searches, in metres
+MAX_NEAR_RADIUS_M = 50000
+
+
+# Installed components within radius_m of a point, nearest first
+@router.get("/near")
+async def components_near(
+    lat: float,
+    lon: float,
+    radius_m: float = Query(2000, gt=0, le=MAX_NEAR_RADIUS_M),
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    try:
+        point = geo_point(lat, lon)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid location coordinates")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    projection = parse_fields(fields, COMPONENT_FIELDS)
+
+    # Page by distance: resume at the last distance, skipping ids already
+    # returned at exactly that distance
+    geo_near = {"near": point, "distanceField": "distance_m", "maxDistance": radius_m,
+                "spherical": True, "key": "installation_point"}
+    if cursor:
+        min_distance, seen_ids = _decode_near_cursor(cursor)
+        geo_near["minDistance"] = min_distance
+        geo_near["query"] = {"_id": {"$nin": seen_ids}}
+    pipeline = [
+        {"$geoNear": geo_near},
+        {"$limit": limit + 1},
+        {"$project": {**projection, "distance_m": 1} if projection else COMPONENT_PROJECTION},
+    ]
+    comps = await components_collection.aggregate(pipeline).to_list(limit + 1)
+
+    next_cursor = None
+    if len(comps) > limit:
+        comps = comps[:limit]
+        last = comps[-1]["distance_m"]
+        next_cursor = _encode_near_cursor(last, [c["_id"] for c in comps if c["distance_m"] == last])
+    return FastJSONResponse({"components": await _component_views(comps, projection), "next_cursor": next_cursor})
+
+
+# Installed components inside a polygon or along a track polyline
+@router.post("/within")
+async def components_within(
+    area: GeoWithinQuery,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    if area.polygon and len(area.polygon) >= 3:
+        ring = [list(p) for p in area.polygon]
+        if ring[0] != ring[-1]:
+            ring.append(ring[0])
+        query = {"installation_point": {"$geoWithin": {"$geometry": {"type": "Polygon", "coordinates": [ring]}}}}
+    elif area.polyline and len(area.polyline) >= 1:
+        query = corridor_filter("installation_point", area.polyline, area.buffer_m)
+    else:
+        raise HTTPException(status_code=400, detail="Provide a polygon (3+ points) or a polyline")
+
+    projection = parse_fields(fields, COMPONENT_FIELDS)
+    try:
+        comps, next_cursor = await fetch_page(
+            components_collection, query, projection or COMPONENT_PROJECTION, "_id", False, limit, cursor
+        )
+    except OperationFailure as e:
+        if e.code != 2:  # BadValue, e.g. a self-intersecting polygon
+            raise
+        raise HTTPException(status_code=400, detail=f"Invalid area: {(e.details or {}).get('errmsg', e)}")
+    return FastJSONResponse({"components": await _component_views(comps, projection), "next_cursor": next_cursor})
+
+
+# Hit/miss counters for the component view cache
+@router.get("/cache/stats")
+async def view_cache_stats(current_user: dict = Depends(get_current_user)):
+    return component_view_cache.stats()
+
+
 @router.get("/{component_id}", response_model=ComponentOut)
-async def get_component(component_id: str, current_user: dict = Depends(get_current_user)):
+async def get_component(component_id: str, request: Request, current_user: dict = Depends(get_current_user)):
     try:
         object_id = ObjectId(component_id)
     except:
         raise HTTPException(status_code=400, detail="Invalid component ID format")
-    
-    component = await components_collection.find_one({"_id": object_id})
-    manufacturer = await manufacturers_collection.find_one({"_id": ObjectId(component["manufacturer_id"])}) if component else None
-    if not component:
+
+    view = await get_component_view(object_id)
+    if view is None:
         raise HTTPException(status_code=404, detail="Component not found")
-    return ComponentOut(**component,manufacturer=manufacturer["company_name"] if manufacturer else "Unknown")
+    return view_response(view, request)
 
 # Install component (update installation location)
 @router.post("/{component_id}/install", response_model=ComponentOut)
@@ -35,22 +153,71 @@ async def install_component(component_id: str, data: dict, current_user: dict =
     except:
         raise HTTPException(status_code=400, detail="Invalid component ID format")
 
-    component = await components_collection.find_one({"_id": object_id})
+    component = await components_collection.find_one({"_id": object_id}, COMPONENT_PROJECTION)
     if not component:
         raise HTTPException(status_code=404, detail="Component not found")
 
+    try:
+        point = geo_point(latitude, longitude)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid location coordinates")
+
     updated = {
         "installation_location": f"{latitude},{longitude}",
+        "installation_point": point,
         "status": "Installed",
         "updated_at": datetime.utcnow(),
         "installed_by": current_user.get("sub")
     }
     await components_collection.update_one({"_id": object_id}, {"$set": updated})
+    await invalidate_component_views(object_id)
     component.update(updated)
-    return ComponentOut(**component)
+    event_bus.emit("component.installed", component)
+    return ComponentOut(**component, qr_url=qr_url(object_id))
+
+# List components, one keyset page at a time
+@router.get("/")
+async def list_components(
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: str = "_id",
+    order: str = "asc",
+    fields: Optional[str] = None,
+    format: str = "json",
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Returns a JSON list of components; the cursor for the next page comes back
+    in the X-Next-Cursor header. fields=a,b limits the returned fields and
+    format=ndjson streams every remaining component instead of one page.
+    """
+    descending = check_sort(sort, order)
+    projection = parse_fields(fields, COMPONENT_FIELDS)
+
+    names = {}
+
+    async def resolve_names(batch):
+        names.update(await resolve_manufacturer_names(c.get("manufacturer_id") for c in batch))
+
+    def full_view(c):
+        return component_out(c, manufacturer=names.get(c.get("manufacturer_id")), qr_url=qr_url(c["_id"]))
+
+    if format == "ndjson":
+        if projection:
+            transform, enrich = projected_view, None
+        else:
+            transform, enrich = full_view, resolve_names
+        return StreamingResponse(
+            stream_ndjson(components_collection, {}, projection or COMPONENT_PROJECTION, sort, descending, cursor,
+                          transform, enrich=enrich),
+            media_type="application/x-ndjson",
+        )
 
-# List all components
-@router.get("/", response_model=List[ComponentOut])
-async def list_components(current_user: dict = Depends(get_current_user)):
-    comps = await components_collection.find({}).to_list(100)
-    return [ComponentOut(**c) for c in comps]
\ No newline at end of file
+    comps, next_cursor = await fetch_page(
+        components_collection, {}, projection or COMPONENT_PROJECTION, sort, descending, limit, cursor
+    )
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    if projection:
+        return FastJSONResponse([projected_view(c) for c in comps], headers=headers)
+    await resolve_names(comps)
+    return FastJSONResponse([full_view(c) for c in comps], headers=headers)
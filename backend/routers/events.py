@@ -0,0 +1,117 @@
+import json
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from core.security import get_current_user, decode_access_token
+from core.events import event_bus, EventFilter
+from core.pagination import json_default
+from db.client import manufacturers_collection
+
+router = APIRouter()
+
+EVENT_TYPES = {"component.created", "component.installed", "component.inspected", "component.needs_replacement"}
+KEEPALIVE_SECONDS = 15
+
+
+async def _build_filter(payload: dict, types: Optional[str], manufacturer_id: Optional[str],
+                        component_ids: Optional[str], bbox: Optional[str]) -> EventFilter:
+    """Manufacturers only ever see their own components; staff may filter by anything."""
+    wanted = {t.strip() for t in types.split(",") if t.strip()} if types else None
+    if wanted and not wanted <= EVENT_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown event types: {', '.join(sorted(wanted - EVENT_TYPES))}")
+
+    if payload.get("role") == "MANUFACTURER":
+        manufacturer_id = payload.get("mid")
+        if not manufacturer_id:
+            m = await manufacturers_collection.find_one({"username": payload.get("sub")}, {"_id": 1})
+            if not m:
+                raise HTTPException(status_code=404, detail="Manufacturer not found")
+            manufacturer_id = str(m["_id"])
+
+    box = None
+    if bbox:
+        try:
+            box = tuple(float(v) for v in bbox.split(","))
+            assert len(box) == 4
+        except (ValueError, AssertionError):
+            raise HTTPException(status_code=400, detail="bbox must be min_lon,min_lat,max_lon,max_lat")
+
+    ids = {i.strip() for i in component_ids.split(",") if i.strip()} if component_ids else None
+    return EventFilter(types=wanted, manufacturer_id=manufacturer_id, component_ids=ids, bbox=box)
+
+
+def _dumps(event: dict) -> str:
+    return json.dumps(event, default=json_default)
+
+
+# Server-sent events: EventSource("/events/stream?types=component.needs_replacement")
+@router.get("/stream")
+async def event_stream(
+    request: Request,
+    types: Optional[str] = None,
+    manufacturer_id: Optional[str] = None,
+    component_ids: Optional[str] = None,
+    bbox: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Streams component lifecycle events matching the filters. A comment line
+    is sent every 15s of silence so proxies keep the connection open.
+    """
+    event_filter = await _build_filter(current_user, types, manufacturer_id, component_ids, bbox)
+
+    async def lines():
+        sub = event_bus.subscribe(event_filter)
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                event = await sub.get(timeout=KEEPALIVE_SECONDS)
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {_dumps(event)}\n\n"
+        finally:
+            event_bus.unsubscribe(sub)
+
+    return StreamingResponse(
+        lines(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# WebSocket variant; browsers can't set headers here, so ?token= is accepted too
+@router.websocket("/ws")
+async def event_socket(
+    websocket: WebSocket,
+    token: Optional[str] = None,
+    types: Optional[str] = None,
+    manufacturer_id: Optional[str] = None,
+    component_ids: Optional[str] = None,
+    bbox: Optional[str] = None,
+):
+    try:
+        payload = decode_access_token(token) if token else get_current_user(websocket)
+        event_filter = await _build_filter(payload, types, manufacturer_id, component_ids, bbox)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+        return
+
+    await websocket.accept()
+    sub = event_bus.subscribe(event_filter)
+    try:
+        while True:
+            event = await sub.get(timeout=KEEPALIVE_SECONDS)
+            if event is None:
+                await websocket.send_text(_dumps({"type": "keepalive"}))
+            else:
+                await websocket.send_text(_dumps(event))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        event_bus.unsubscribe(sub)
+
+
+@router.get("/stats")
+async def event_stats(current_user: dict = Depends(get_current_user)):
+    return event_bus.stats()
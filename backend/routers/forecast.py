@@ -0,0 +1,111 @@
+from fastapi import APIRouter, HTTPException, Depends, Request
+from datetime import datetime, timedelta
+from typing import Optional
+from db.client import components_collection
+from core.security import get_current_user, get_current_manufacturer
+from core.components import COMPONENT_PROJECTION, COMPONENT_FIELDS, qr_url, projected_view
+from core.forecast import forecast_service, FORECAST_DIMENSIONS
+from core.pagination import fetch_page, parse_fields
+from core.serialization import FastJSONResponse
+
+router = APIRouter()
+
+MAX_HORIZON_DAYS = 730
+MAX_GROUPS = 1000
+
+
+async def _manufacturer_scope(request: Request, current_user: dict, manufacturer_id: Optional[str]):
+    # manufacturers only ever see their own components
+    if current_user.get("role") == "MANUFACTURER":
+        return (await get_current_manufacturer(request)).id
+    return manufacturer_id
+
+
+def _parse_bbox(bbox: str) -> tuple:
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be min_lon,min_lat,max_lon,max_lat")
+    if not (min_lon <= max_lon and min_lat <= max_lat):
+        raise HTTPException(status_code=400, detail="bbox corners are out of order")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+# Expected replacements (expiry plus projected failures) per time bucket
+@router.get("/replacements")
+async def replacement_forecast(
+    request: Request,
+    horizon_days: int = 90,
+    bucket_days: int = 7,
+    group_by: str = "location,item_code",
+    manufacturer_id: Optional[str] = None,
+    item_code: Optional[str] = None,
+    bbox: Optional[str] = None,
+    limit: int = 100,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    group_by is any of item_code, manufacturer_id, location (a grid cell, or
+    "uninstalled"); bbox (min_lon,min_lat,max_lon,max_lat) keeps installed
+    components inside it. Served from memory, at most FORECAST_REFRESH_SECONDS
+    behind the database (see as_of).
+    """
+    if not 1 <= horizon_days <= MAX_HORIZON_DAYS:
+        raise HTTPException(status_code=400, detail=f"horizon_days must be between 1 and {MAX_HORIZON_DAYS}")
+    if not 1 <= bucket_days <= horizon_days:
+        raise HTTPException(status_code=400, detail="bucket_days must be between 1 and horizon_days")
+    dims = tuple(dict.fromkeys(d.strip() for d in group_by.split(",") if d.strip()))
+    unknown = [d for d in dims if d not in FORECAST_DIMENSIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot group by: {', '.join(unknown)}")
+
+    forecast = await forecast_service.forecast(
+        horizon_days=horizon_days,
+        bucket_days=bucket_days,
+        group_by=dims,
+        manufacturer_id=await _manufacturer_scope(request, current_user, manufacturer_id),
+        item_code=item_code,
+        bbox=_parse_bbox(bbox) if bbox else None,
+        limit=max(1, min(limit, MAX_GROUPS)),
+    )
+    return FastJSONResponse(forecast)
+
+
+# Components whose warranty runs out in a window, soonest first
+@router.get("/expiring")
+async def expiring_components(
+    request: Request,
+    within_days: int = 90,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    manufacturer_id: Optional[str] = None,
+    item_code: Optional[str] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Defaults to the next within_days; start/end pick any other window. One
+    range scan of the expected_expiry index per page.
+    """
+    start = start or datetime.utcnow()
+    end = end or start + timedelta(days=within_days)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    query = {"expected_expiry": {"$gte": start, "$lt": end}}
+    manufacturer_id = await _manufacturer_scope(request, current_user, manufacturer_id)
+    if manufacturer_id:
+        query["manufacturer_id"] = manufacturer_id
+    if item_code:
+        query["item_code"] = item_code
+
+    projection = parse_fields(fields, COMPONENT_FIELDS)
+    comps, next_cursor = await fetch_page(
+        components_collection, query, projection or COMPONENT_PROJECTION, "expected_expiry", False, limit, cursor
+    )
+    if projection:
+        views = [projected_view(c) for c in comps]
+    else:
+        views = [{**projected_view(c), "qr_url": qr_url(c["_id"])} for c in comps]
+    return FastJSONResponse({"components": views, "next_cursor": next_cursor})
@@ -0,0 +1,25 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from db.client import pool_stats
+from db.lifecycle import readiness, check_ready
+
+router = APIRouter()
+
+
+# Liveness: the process is up and its event loop is responsive
+@router.get("/live")
+async def live():
+    return {"status": "ok"}
+
+
+# Readiness: startup (pool warm-up, indexes) finished and MongoDB answers
+@router.get("/ready")
+async def ready():
+    ok = await check_ready()
+    body = {
+        "status": "ready" if ok else "draining" if readiness["draining"] else "not ready",
+        "error": readiness["error"],
+        "ready_at": readiness["ready_at"].isoformat() if readiness["ready_at"] else None,
+        "pool": pool_stats(),
+    }
+    return JSONResponse(body, status_code=200 if ok else 503)
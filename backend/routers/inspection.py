@@ -1,37 +1,47 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime
-from db.client import components_collection, inspections_collection, manufacturers_collection
+from typing import Optional
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError
+from db.client import components_collection, inspections_collection
+from db.resolvers import resolve_manufacturer_names, get_component_view, invalidate_component_views
+from db.inspections import inspection_stats_update, inspection_stats_op, is_defect
 from models.Inspection import InspectionCreate, InspectionOut
+from models.Sync import SyncRequest, SyncResponse, SyncItemResult
 from db.models.component import ComponentOut
 from core.security import get_current_user
+from core.components import COMPONENT_PROJECTION, COMPONENT_FIELDS, qr_url, projected_view
+from core.config import SYNC_MAX_ITEMS
+from core.geo import geo_point
+from core.viewcache import view_response
+from core.events import event_bus, EVENT_FIELDS
+from core.pagination import fetch_page, encode_cursor, parse_fields
+from core.serialization import FastJSONResponse, trusted_serializer
 
 router = APIRouter()
 
-# Fetch installed component by ID
-@router.get("/component/{component_id}")
-async def get_component(component_id: str):
+inspection_out = trusted_serializer(InspectionOut)
+
+# Fetch installed component by ID (the QR scan lookup)
+@router.get("/component/{component_id}", response_model=ComponentOut)
+async def get_component(component_id: str, request: Request):
     try:
         object_id = ObjectId(component_id)
     except:
         raise HTTPException(status_code=400, detail="Invalid component ID format")
     
-    component = await components_collection.find_one({"_id": object_id})
-    if not component:
+    view = await get_component_view(object_id)
+    if view is None:
         raise HTTPException(status_code=404, detail="Component not found")
-    
-    # Fetch manufacturer information
-    manufacturer = None
-    if component.get("manufacturer_id"):
-        try:
-            manufacturer = await manufacturers_collection.find_one({"_id": ObjectId(component["manufacturer_id"])})
-        except:
-            pass
-    
-    return ComponentOut(
-        **component,
-        manufacturer=manufacturer["company_name"] if manufacturer else "Unknown"
-    )
+    return view_response(view, request)
+
+
+def _emit_inspection_events(component: dict, status: str):
+    event_bus.emit("component.inspected", component)
+    if is_defect(status):
+        event_bus.emit("component.needs_replacement", component)
 
 
 # Submit inspection report
@@ -45,7 +55,7 @@ async def submit_inspection(
     except:
         raise HTTPException(status_code=400, detail="Invalid component ID format")
     
-    component = await components_collection.find_one({"_id": component_object_id})
+    component = await components_collection.find_one({"_id": component_object_id}, {"_id": 1})
     if not component:
         raise HTTPException(status_code=404, detail="Component not found")
     
@@ -57,27 +67,224 @@ async def submit_inspection(
     # Insert inspection report
     result = await inspections_collection.insert_one(report_dict)
 
-    # If defective → update component status
-    if report.status.upper() == "DEFECTED":
-        await components_collection.update_one(
-            {"_id": component_object_id},
-            {"$set": {"status": "Needs Replacement", "updated_at": datetime.utcnow()}}
-        )
+    # Fold it into the component's inspection summary (marks defective ones for replacement)
+    updated = await components_collection.find_one_and_update(
+        {"_id": component_object_id},
+        inspection_stats_update(report.status, report_dict["inspected_at"], datetime.utcnow()),
+        projection={f: 1 for f in EVENT_FIELDS},
+        return_document=ReturnDocument.AFTER,
+    )
+    await invalidate_component_views(component_object_id)
+    if updated:
+        _emit_inspection_events(updated, report.status)
 
     return {"message": "Inspection submitted", "inspection_id": str(result.inserted_id)}
 
 
-# Fetch inspection history for a component
+# Fetch inspection history for a component, newest first, one page at a time
 @router.get("/history/{component_id}", response_model=list[InspectionOut])
-async def inspection_history(component_id: str):
+async def inspection_history(component_id: str, limit: int = 50, cursor: Optional[str] = None):
+    """The cursor for the next (older) page comes back in the X-Next-Cursor header."""
     try:
         object_id = ObjectId(component_id)
     except:
         raise HTTPException(status_code=400, detail="Invalid component ID format")
     
-    inspections = []
-    async for insp in inspections_collection.find({"component_id": str(object_id)}).sort("inspected_at", -1):
-        insp["inspection_id"] = str(insp["_id"])
-        inspections.append(InspectionOut(**insp))
-    
-    return inspections
+    docs, next_cursor = await fetch_page(
+        inspections_collection, {"component_id": str(object_id)}, None, "inspected_at", True, limit, cursor
+    )
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return FastJSONResponse([inspection_out(insp, inspection_id=str(insp["_id"])) for insp in docs], headers=headers)
+
+
+# Components by latest inspection result, most recently inspected first
+@router.get("/fleet")
+async def fleet_status(
+    status: str = "DEFECTED",
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Reads the summary kept on each component, so a fleet-wide defect board is
+    one indexed query regardless of how many inspections exist.
+    """
+    projection = parse_fields(fields, COMPONENT_FIELDS)
+    comps, next_cursor = await fetch_page(
+        components_collection, {"last_inspection_status": status.upper()}, projection or COMPONENT_PROJECTION,
+        "last_inspected_at", True, limit, cursor
+    )
+    if projection:
+        views = [projected_view(c) for c in comps]
+    else:
+        names = await resolve_manufacturer_names(c.get("manufacturer_id") for c in comps)
+        views = [
+            {**projected_view(c), "manufacturer": names.get(c.get("manufacturer_id")), "qr_url": qr_url(c["_id"])}
+            for c in comps
+        ]
+    return FastJSONResponse({"components": views, "next_cursor": next_cursor})
+
+
+def _object_id(value: str):
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return None
+
+
+# Bulk upload of inspections and installs queued on the device while offline
+@router.post("/sync", response_model=SyncResponse)
+async def sync(batch: SyncRequest, current_user: dict = Depends(get_current_user)):
+    """
+    Every item carries a client-generated idempotency_key; replaying a batch
+    after a dropped connection reports "duplicate" instead of writing twice.
+    Results come back per item, in request order.
+    """
+    if len(batch.inspections) + len(batch.installs) > SYNC_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {SYNC_MAX_ITEMS} items per sync")
+
+    now = datetime.utcnow()
+    username = current_user.get("sub")
+
+    # One $in query validates every referenced component
+    requested = {item.component_id: _object_id(item.component_id) for item in [*batch.inspections, *batch.installs]}
+    known = {}
+    valid_ids = [oid for oid in requested.values() if oid]
+    if valid_ids:
+        async for c in components_collection.find({"_id": {"$in": valid_ids}}, {"install_sync_keys": 1}):
+            known[str(c["_id"])] = c
+
+    def precheck(item):
+        if requested[item.component_id] is None:
+            return SyncItemResult(idempotency_key=item.idempotency_key, status="invalid", detail="Invalid component ID format")
+        if item.component_id not in known:
+            return SyncItemResult(idempotency_key=item.idempotency_key, status="not_found", detail="Component not found")
+        return None
+
+    # Inspections: one insert_many; the unique idempotency_key index rejects
+    # replays of earlier requests. A key repeated within this batch is only
+    # written for its first item; the later ones are duplicates of that.
+    inspection_results = [precheck(item) for item in batch.inspections]
+    docs = []
+    doc_index = {}  # idempotency_key -> position in docs
+    for item, result in zip(batch.inspections, inspection_results):
+        if result is None and item.idempotency_key not in doc_index:
+            doc = item.dict()
+            doc["_id"] = ObjectId()
+            doc["inspected_by"] = username
+            doc["inspected_at"] = item.inspected_at or now
+            doc["received_at"] = now
+            doc_index[item.idempotency_key] = len(docs)
+            docs.append(doc)
+
+    replayed = set()  # positions in docs the index rejected
+    if docs:
+        try:
+            await inspections_collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for err in e.details.get("writeErrors", []):
+                if err.get("code") != 11000:
+                    raise
+                replayed.add(err["index"])
+
+    existing = {}
+    if replayed:
+        keys = [docs[n]["idempotency_key"] for n in replayed]
+        async for insp in inspections_collection.find({"idempotency_key": {"$in": keys}}, {"idempotency_key": 1}):
+            existing[insp["idempotency_key"]] = str(insp["_id"])
+
+    stats_ops = []
+    touched = set()
+    written = set()
+    for i, item in enumerate(batch.inspections):
+        if inspection_results[i] is not None:
+            continue
+        n = doc_index[item.idempotency_key]
+        doc = docs[n]
+        if n in replayed:
+            inspection_results[i] = SyncItemResult(idempotency_key=item.idempotency_key, status="duplicate",
+                                                   id=existing.get(item.idempotency_key))
+        elif n in written:
+            inspection_results[i] = SyncItemResult(idempotency_key=item.idempotency_key, status="duplicate", id=str(doc["_id"]))
+        else:
+            written.add(n)
+            inspection_results[i] = SyncItemResult(idempotency_key=item.idempotency_key, status="created", id=str(doc["_id"]))
+            stats_ops.append(inspection_stats_op(requested[item.component_id], item.status, doc["inspected_at"], now))
+            touched.add(requested[item.component_id])
+
+    # One bulk_write folds every new inspection into its component's summary
+    if stats_ops:
+        await components_collection.bulk_write(stats_ops, ordered=False)
+
+    # Installs: one bulk_write; each update is guarded by its idempotency key
+    install_results = [precheck(item) for item in batch.installs]
+    ops = []
+    for i, item in enumerate(batch.installs):
+        if install_results[i] is not None:
+            continue
+        component = known[item.component_id]
+        if item.idempotency_key in component.get("install_sync_keys", []):
+            install_results[i] = SyncItemResult(idempotency_key=item.idempotency_key, status="duplicate", id=item.component_id)
+            continue
+        try:
+            point = geo_point(item.latitude, item.longitude)
+        except ValueError:
+            install_results[i] = SyncItemResult(idempotency_key=item.idempotency_key, status="invalid", detail="Invalid location coordinates")
+            continue
+        ops.append(UpdateOne(
+            {"_id": requested[item.component_id], "install_sync_keys": {"$ne": item.idempotency_key}},
+            {
+                "$set": {
+                    "installation_location": f"{item.latitude},{item.longitude}",
+                    "installation_point": point,
+                    "status": "Installed",
+                    "installed_at": item.installed_at or now,
+                    "updated_at": now,
+                    "installed_by": username,
+                },
+                "$addToSet": {"install_sync_keys": item.idempotency_key},
+            },
+        ))
+        install_results[i] = SyncItemResult(idempotency_key=item.idempotency_key, status="applied", id=item.component_id)
+        touched.add(requested[item.component_id])
+    if ops:
+        await components_collection.bulk_write(ops, ordered=False)
+
+    if touched:
+        await invalidate_component_views(*touched)
+
+    # Without a change stream the events come from here: one read for every touched component
+    if touched and event_bus.source == "local":
+        changed = {}
+        async for c in components_collection.find({"_id": {"$in": list(touched)}}, {f: 1 for f in EVENT_FIELDS}):
+            changed[c["_id"]] = c
+        for item, result in zip(batch.inspections, inspection_results):
+            component = changed.get(requested[item.component_id])
+            if result.status == "created" and component:
+                _emit_inspection_events(component, item.status)
+        for item, result in zip(batch.installs, install_results):
+            component = changed.get(requested[item.component_id])
+            if result.status == "applied" and component:
+                event_bus.emit("component.installed", component)
+
+    return SyncResponse(inspections=inspection_results, installs=install_results, server_time=now)
+
+
+# Components changed since the cursor, for refreshing the app's local cache
+@router.get("/sync/changes")
+async def sync_changes(cursor: Optional[str] = None, limit: int = 500, current_user: dict = Depends(get_current_user)):
+    """
+    Pages through components in (updated_at, _id) order. Keep the returned
+    cursor and send it on the next pull; it is returned even on the last page.
+    """
+    comps, next_cursor = await fetch_page(components_collection, {}, COMPONENT_PROJECTION, "updated_at", False, limit, cursor)
+    names = await resolve_manufacturer_names(c.get("manufacturer_id") for c in comps)
+    return {
+        "components": [
+            {**projected_view(c), "manufacturer": names.get(c.get("manufacturer_id")), "qr_url": qr_url(c["_id"])}
+            for c in comps
+        ],
+        "cursor": next_cursor or (encode_cursor(comps[-1], "updated_at") if comps else cursor),
+        "has_more": next_cursor is not None,
+    }
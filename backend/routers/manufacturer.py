@@ -1,20 +1,38 @@
 import io
-import base64
-from datetime import datetime, timedelta
+import re
+import csv
+import json
+from datetime import date, datetime, timedelta
+from typing import Optional
+from urllib.parse import quote
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-import qrcode
-from db.client import components_collection, manufacturers_collection
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from db.client import components_collection, manufacturers_collection, component_daily_stats_collection, inspections_collection
 from db.models.component import ComponentIn, ComponentOut
+from db.counters import next_component_id, next_component_ids
+from db.rollups import record_components_created, daily_counts_pipeline
 from core.security import get_current_manufacturer
+from core.config import BULK_MAX_COMPONENTS
+from core.components import build_component_doc, qr_url, COMPONENT_PROJECTION, COMPONENT_FIELDS, check_sort, projected_view
+from core.pagination import fetch_page, parse_fields, stream_ndjson
+from core.qr import render_qr_pngs_async, qr_options
+from core.labels import LABEL_LAYOUTS, CAPTION_FIELDS, stream_label_pdf
+from core.blobstore import get_blob_store
+from core.jobs import job_handler, enqueue_job, get_job, list_jobs, job_view, progress_lines, Job
+from core.export import EXPORT_FORMATS, stream_export
+from core.serialization import FastJSONResponse
+from core.events import event_bus
 from bson import ObjectId
-import uuid as uuidlib
-from models.Manufacturer import ManufacturerOut
+from models.Manufacturer import ManufacturerOut, ManufacturerPrincipal
 
 router = APIRouter()
 
 @router.get("/mydetails", response_model=ManufacturerOut)
-async def get_my_details(username: str = Depends(get_current_manufacturer)):
-    manufacturer = await manufacturers_collection.find_one({"username": username})
+async def get_my_details(principal: ManufacturerPrincipal = Depends(get_current_manufacturer)):
+    manufacturer = await manufacturers_collection.find_one({"_id": ObjectId(principal.id)})
     if not manufacturer:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Manufacturer not found")
     
@@ -30,116 +48,517 @@ async def get_my_details(username: str = Depends(get_current_manufacturer)):
     )
 
 @router.post("/components/generate_qr")
-async def generate_qr(comp: ComponentIn, username: str = Depends(get_current_manufacturer)):
-    manufacturer = await manufacturers_collection.find_one({"username": username})
-    if not manufacturer:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Manufacturer not found")
-    
-    manufacturer_id = str(manufacturer["_id"])
-    comp_uuid = comp.uuid or str(uuidlib.uuid4())
-    
-    # Generate QR code and component ID
-    qr_code = f"QR{datetime.now().strftime('%Y%m%d')}{comp_uuid[-8:]}"
+async def generate_qr(comp: ComponentIn, manufacturer: ManufacturerPrincipal = Depends(get_current_manufacturer)):
+    manufacturer_id = manufacturer.id
+    doc = build_component_doc(comp, manufacturer_id, await next_component_id())
 
-    # Calculate expiry date based on warranty
-    expected_expiry = comp.production_date + timedelta(days=comp.warranty_period * 30)
-    
-    doc = {
-        "component_id": f"COMP{datetime.now().strftime('%Y%m%d')}{len(await components_collection.find().to_list(None)) + 1:06d}",
-        "qr_code": qr_code,
-        "item_code": comp.item_code,
-        "component_name": comp.component_name,
-        "specifications": comp.specifications,
-        "batch_number": comp.batch_number or f"BATCH{datetime.now().strftime('%Y%m%d')}01",
-        "serial_number": comp.serial_number or f"SER{datetime.now().strftime('%Y%m%d')}{comp_uuid[-6:]}",
-        "manufacturer_id": manufacturer_id,
-        "production_date": comp.production_date,
-        "warranty_period": comp.warranty_period,
-        "unit_weight": comp.unit_weight,
-        "irs_specification": comp.irs_specification,
-        "generated_at": datetime.utcnow(),
-        "qc_status": "Pending",
-        "uuid": comp_uuid,
-        "expected_expiry": expected_expiry
+    # The QR image is rendered lazily by GET /qr/{id}.png
+    try:
+        await components_collection.insert_one(doc)
+    except DuplicateKeyError:
+        # component_id and qr_code are allocated here; only a client-supplied uuid can clash
+        raise HTTPException(status_code=409, detail="A component with this uuid already exists")
+    await record_components_created([doc])
+    event_bus.emit("component.created", doc)
+
+    comp_out = {**doc, "_id": str(doc["_id"]), "qr_url": qr_url(doc["_id"])}
+    return {"component": comp_out, "message": "Component generated successfully"}
+
+
+def _parse_bulk_rows(body: bytes, content_type: str) -> list:
+    text = body.decode("utf-8-sig")
+    if "csv" in content_type:
+        rows = []
+        for row in csv.DictReader(io.StringIO(text)):
+            specs = json.loads(row.pop("specifications", "") or "{}")
+            for key in [k for k in row if k.startswith("specifications.")]:
+                specs[key.split(".", 1)[1]] = row.pop(key)
+            rows.append({**{k: v for k, v in row.items() if v not in ("", None)}, "specifications": specs})
+        return rows
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    rows = json.loads(text)
+    if isinstance(rows, dict):
+        rows = rows.get("components", [])
+    return rows
+
+
+@router.post("/components/generate_qr/bulk", status_code=status.HTTP_202_ACCEPTED)
+async def generate_qr_bulk(request: Request, prerender: bool = False, manufacturer: ManufacturerPrincipal = Depends(get_current_manufacturer)):
+    """
+    Accepts a JSON array (or {"components": [...]}), NDJSON or CSV of ComponentIn
+    and queues their registration as a background job. Returns a job ID; follow progress at
+    /manufacturer/jobs/{job_id}/progress. With prerender=true the QR images are
+    rendered into the blob store up front instead of on first request.
+    """
+    manufacturer_id = manufacturer.id
+
+    try:
+        rows = _parse_bulk_rows(await request.body(), request.headers.get("content-type", ""))
+    except (ValueError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse components: {e}")
+    if not isinstance(rows, list) or not rows:
+        raise HTTPException(status_code=400, detail="No components supplied")
+    if len(rows) > BULK_MAX_COMPONENTS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_COMPONENTS} components per batch")
+
+    comps = []
+    for i, row in enumerate(rows):
+        try:
+            comps.append(ComponentIn(**row))
+        except (ValidationError, TypeError) as e:
+            raise HTTPException(status_code=422, detail={"row": i, "errors": str(e)})
+
+    params = {"components": [c.model_dump() for c in comps], "prerender": prerender}
+    job = await enqueue_job("bulk_generate_qr", manufacturer_id, params, total=len(comps))
+    return {"job_id": job["_id"], "total": len(comps), "message": "Bulk generation queued"}
+
+
+async def _insert_new(docs: list, owner: str):
+    """
+    Inserts docs and returns (written, failed). A component_id clash is only
+    taken as "written by an earlier attempt of this job" once that row is
+    found; any other duplicate (e.g. a client-supplied uuid) is a failed row.
+    """
+    try:
+        await components_collection.insert_many(docs, ordered=False)
+        return docs, []
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(err["code"] != 11000 for err in errors):
+            raise
+    retried = {err["index"] for err in errors if err.get("keyPattern") == {"component_id": 1}}
+    found = set()
+    if retried:
+        ids = [docs[i]["component_id"] for i in retried]
+        async for c in components_collection.find({"component_id": {"$in": ids}, "manufacturer_id": owner},
+                                                  {"component_id": 1}):
+            found.add(c["component_id"])
+    failed = [
+        {"row": err["index"], "component_id": docs[err["index"]]["component_id"],
+         "error": f"Duplicate {', '.join(err.get('keyPattern') or {}) or 'key'}: {err.get('keyValue') or err.get('errmsg')}"}
+        for err in errors if not (err["index"] in retried and docs[err["index"]]["component_id"] in found)
+    ]
+    rejected = {err["index"] for err in errors}
+    return [doc for i, doc in enumerate(docs) if i not in rejected], failed
+
+
+@job_handler("bulk_generate_qr")
+async def _register_components(job: Job):
+    comps = [ComponentIn(**c) for c in job.params["components"]]
+    # reserved on the first attempt, so a retry rewrites the same component IDs
+    # and the unique index turns whatever was already inserted into a no-op
+    component_ids = job.state.get("component_ids")
+    if not component_ids:
+        component_ids = await next_component_ids(len(comps))
+        await job.update(state={"component_ids": component_ids})
+    docs = [build_component_doc(c, job.owner, cid) for c, cid in zip(comps, component_ids)]
+
+    if job.params.get("prerender"):
+        await job.update(stage="rendering")
+        store = get_blob_store()
+        rendered = 0
+        async for start, pngs in render_qr_pngs_async([str(d["_id"]) for d in docs]):
+            for offset, png in enumerate(pngs):
+                docs[start + offset]["qr_ref"] = await store.put(png)
+            rendered += len(pngs)
+            await job.update(done=rendered)
+
+    await job.update(stage="writing")
+    inserted, failed = await _insert_new(docs, job.owner)
+    if failed:
+        print(f"Job {job.id}: {len(failed)} rows not written")
+    await record_components_created(inserted)
+    for doc in inserted:
+        event_bus.emit("component.created", doc)
+    await job.update(done=len(docs))
+    return {"inserted": len(inserted), "failed": failed, "component_ids": component_ids}
+
+
+PRERENDER_BATCH_SIZE = 500
+
+
+@router.post("/components/prerender_qr", status_code=status.HTTP_202_ACCEPTED)
+async def prerender_qr(batch_number: Optional[str] = None, manufacturer: ManufacturerPrincipal = Depends(get_current_manufacturer)):
+    """
+    Renders the QR image of every component (optionally one batch) that has
+    none stored yet, so printing a run of labels doesn't render on demand.
+    """
+    query = _prerender_query(manufacturer.id, batch_number)
+    total = await components_collection.count_documents(query)
+    job = await enqueue_job("prerender_qr", manufacturer.id, {"batch_number": batch_number}, total=total)
+    return {"job_id": job["_id"], "total": total, "message": "QR prerender queued"}
+
+
+def _prerender_query(manufacturer_id: str, batch_number: Optional[str]) -> dict:
+    query = {"manufacturer_id": manufacturer_id, "qr_ref": {"$exists": False}}
+    if batch_number:
+        query["batch_number"] = batch_number
+    return query
+
+
+@job_handler("prerender_qr")
+async def _prerender_components(job: Job):
+    # only components still without an image are selected, so a retry resumes where the last attempt stopped
+    query = _prerender_query(job.owner, job.params.get("batch_number"))
+    store = get_blob_store()
+    await job.update(stage="rendering")
+    rendered = 0
+    while True:
+        batch = await components_collection.find(query, {"_id": 1}).sort("_id", 1).to_list(PRERENDER_BATCH_SIZE)
+        if not batch:
+            break
+        ops = []
+        async for start, pngs in render_qr_pngs_async([str(c["_id"]) for c in batch]):
+            for offset, png in enumerate(pngs):
+                key = await store.put(png)
+                ops.append(UpdateOne({"_id": batch[start + offset]["_id"]},
+                                     {"$set": {"qr_ref": key}, "$unset": {"qr_data": ""}}))
+        await components_collection.bulk_write(ops, ordered=False)
+        rendered += len(ops)
+        await job.update(done=rendered)
+    return {"rendered": rendered}
+
+
+@router.get("/jobs")
+async def get_jobs(limit: int = 20, manufacturer: ManufacturerPrincipal = Depends(get_current_manufacturer)):
+    """This manufacturer's most recent jobs, newest first."""
+    return {"jobs": await list_jobs(manufacturer.id, limit)}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str, manufacturer: ManufacturerPrincipal = Depends(get_current_manufacturer)):
+    job = await get_job(job_id, manufacturer.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_view(job)
+
+
+@router.get("/jobs/{job_id}/progress")
+async def stream_job_progress(job_id: str, manufacturer: ManufacturerPrincipal = Depends(get_current_manufacturer)):
+    if not await get_job(job_id, manufacturer.id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(progress_lines(job_id), media_type="application/x-ndjson")
+
+def _component_summary(c: dict) -> dict:
+    return {
+        "_id": str(c["_id"]),
+        "component_id": c.get("component_id"),
+        "qr_code": c.get("qr_code"),
+        "item_code": c.get("item_code"),
+        "component_name": c.get("component_name"),
+        "specifications": c.get("specifications", {}),
+        "batch_number": c.get("batch_number"),
+        "serial_number": c.get("serial_number"),
+        "manufacturer_id": c.get("manufacturer_id"),
+        "production_date": c.get("production_date"),
+        "warranty_period": c.get("warranty_period", 24),
+        "unit_weight": c.get("unit_weight"),
+        "irs_specification": c.get("irs_specification"),
+        "qr_url": qr_url(c["_id"]),
+        "generated_at": c.get("generated_at"),
+        "qc_status": c.get("qc_status", "Pending"),
+        "uuid": c.get("uuid")
     }
 
-    result = await components_collection.insert_one(doc)
-    new_id = str(result.inserted_id)
 
-    # Generate QR payload
-    payload = new_id
-    qr = qrcode.QRCode(box_size=10, border=4)
-    qr.add_data(str(payload))
-    qr.make(fit=True)
-    img = qr.make_image(fill="black", back_color="white")
+@router.get("/components/list")
+async def list_components(
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: str = "_id",
+    order: str = "asc",
+    fields: Optional[str] = None,
+    format: str = "json",
+    manufacturer: ManufacturerPrincipal = Depends(get_current_manufacturer),
+):
+    """
+    One keyset page of this manufacturer's components plus next_cursor (null on
+    the last page). format=ndjson streams all remaining components instead.
+    """
+    manufacturer_id = manufacturer.id
+    query = {"manufacturer_id": manufacturer_id}
+    descending = check_sort(sort, order)
+    projection = parse_fields(fields, COMPONENT_FIELDS)
+    transform = projected_view if projection else _component_summary
 
-    buf = io.BytesIO()
-    img.save(buf, format="PNG")
-    qr_base64 = "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode()
+    if format == "ndjson":
+        return StreamingResponse(
+            stream_ndjson(components_collection, query, projection or COMPONENT_PROJECTION, sort, descending, cursor, transform),
+            media_type="application/x-ndjson",
+        )
 
-    await components_collection.update_one(
-        {"_id": ObjectId(new_id)},
-        {"$set": {"qr_data": qr_base64}}
+    comps, next_cursor = await fetch_page(
+        components_collection, query, projection or COMPONENT_PROJECTION, sort, descending, limit, cursor
     )
+    return FastJSONResponse({"components": [transform(c) for c in comps], "next_cursor": next_cursor})
 
-    comp_out = {**doc, "_id": new_id, "qr_data": qr_base64}
-    return {"component": comp_out, "message": "Component generated successfully"}
+def _parse_day(value: Optional[str], field: str) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{field} must be YYYY-MM-DD")
 
-@router.get("/components/list")
-async def list_components(username: str = Depends(get_current_manufacturer)):
-    manufacturer = await manufacturers_collection.find_one({"username": username})
-    if not manufacturer:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Manufacturer not found")
-    
-    manufacturer_id = str(manufacturer["_id"])
-    cursor = components_collection.find({"manufacturer_id": manufacturer_id})
-    components = []
-    
-    async for c in cursor:
-        components.append({
-            "_id": str(c["_id"]),
-            "component_id": c.get("component_id"),
-            "qr_code": c.get("qr_code"),
-            "item_code": c.get("item_code"),
-            "component_name": c.get("component_name"),
-            "specifications": c.get("specifications", {}),
-            "batch_number": c.get("batch_number"),
-            "serial_number": c.get("serial_number"),
-            "manufacturer_id": c.get("manufacturer_id"),
-            "production_date": c.get("production_date"),
-            "warranty_period": c.get("warranty_period", 24),
-            "unit_weight": c.get("unit_weight"),
-            "irs_specification": c.get("irs_specification"),
-            "qr_data": c.get("qr_data"),
-            "generated_at": c.get("generated_at"),
-            "qc_status": c.get("qc_status", "Pending"),
-            "uuid": c.get("uuid")
-        })
-    
-    return {"components": components}
+
+EXPORT_COMPONENT_COLUMNS = [
+    "component_id", "item_code", "component_name", "batch_number", "serial_number", "qr_code", "uuid",
+    "production_date", "generated_at", "warranty_period", "expected_expiry", "unit_weight", "irs_specification",
+    "qc_status", "qc_date", "status", "installation_location", "installed_by",
+    "last_inspected_at", "last_inspection_status", "inspection_count", "defect_count", "specifications",
+]
+EXPORT_INSPECTION_COLUMNS = [
+    "inspection_id", "component_id", "component_name", "batch_number", "status", "defect_type", "comments",
+    "inspected_by", "inspected_at",
+]
+EXPORT_BATCH_SIZE = 1000
+
+
+def _day_range(start: Optional[str], end: Optional[str]) -> Optional[dict]:
+    """Inclusive YYYY-MM-DD bounds as a datetime range filter, or None if neither is given."""
+    start_day, end_day = _parse_day(start, "start"), _parse_day(end, "end")
+    if not (start_day or end_day):
+        return None
+    bounds = {}
+    if start_day:
+        bounds["$gte"] = datetime.combine(start_day, datetime.min.time())
+    if end_day:
+        bounds["$lt"] = datetime.combine(end_day + timedelta(days=1), datetime.min.time())
+    return bounds
+
+
+def _export_query(manufacturer_id: str, start: Optional[str], end: Optional[str],
+                  batch_number: Optional[str], qc_status: Optional[str]) -> dict:
+    query = {"manufacturer_id": manufacturer_id}
+    generated = _day_range(start, end)
+    if generated:
+        query["generated_at"] = generated
+    if batch_number:
+        query["batch_number"] = batch_number
+    if qc_status:
+        query["qc_status"] = qc_status
+    return query
+
+
+def _attachment(filename: str) -> str:
+    """Content-Disposition for a filename that may hold user text: an ASCII fallback plus RFC 5987 UTF-8."""
+    fallback = re.sub(r"[^A-Za-z0-9._-]", "_", filename)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+def _export_response(chunks, format: str, basename: str) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{basename}.{format}"'},
+    )
+
+
+def _check_export_format(format: str):
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+
+
+# Full component register as CSV or XLSX, streamed straight off the cursor
+@router.get("/components/export")
+async def export_components(
+    format: str = "csv",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    batch_number: Optional[str] = None,
+    qc_status: Optional[str] = None,
+    manufacturer: ManufacturerPrincipal = Depends(get_current_manufacturer),
+):
+    """start/end (YYYY-MM-DD, inclusive) filter on generation date."""
+    _check_export_format(format)
+    query = _export_query(manufacturer.id, start, end, batch_number, qc_status)
+    cursor = components_collection.find(query, {c: 1 for c in EXPORT_COMPONENT_COLUMNS}).sort(
+        [("generated_at", 1), ("_id", 1)]
+    ).batch_size(EXPORT_BATCH_SIZE)
+    return _export_response(stream_export(cursor, EXPORT_COMPONENT_COLUMNS, format, "Components"), format, "components")
+
+
+# Inspection log for this manufacturer's components, grouped by component
+@router.get("/inspections/export")
+async def export_inspections(
+    format: str = "csv",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    batch_number: Optional[str] = None,
+    qc_status: Optional[str] = None,
+    status: Optional[str] = None,
+    manufacturer: ManufacturerPrincipal = Depends(get_current_manufacturer),
+):
+    """
+    start/end filter on inspection date; batch_number and qc_status pick the
+    components. Components are read in batches and each batch's inspections
+    fetched with one $in query, so memory is bounded by the batch size.
+    """
+    _check_export_format(format)
+    component_query = _export_query(manufacturer.id, None, None, batch_number, qc_status)
+    inspection_query = {}
+    inspected = _day_range(start, end)
+    if inspected:
+        inspection_query["inspected_at"] = inspected
+    if status:
+        inspection_query["status"] = status.upper()
+
+    async def rows():
+        components = components_collection.find(
+            component_query, {"component_id": 1, "component_name": 1, "batch_number": 1}
+        ).sort("_id", 1).batch_size(EXPORT_BATCH_SIZE)
+        batch = {}
+        async for comp in components:
+            batch[str(comp["_id"])] = comp
+            if len(batch) == EXPORT_BATCH_SIZE:
+                async for row in inspection_rows(batch):
+                    yield row
+                batch = {}
+        if batch:
+            async for row in inspection_rows(batch):
+                yield row
+
+    async def inspection_rows(batch):
+        cursor = inspections_collection.find(
+            {**inspection_query, "component_id": {"$in": list(batch)}}
+        ).sort([("component_id", 1), ("inspected_at", -1)]).batch_size(EXPORT_BATCH_SIZE)
+        async for insp in cursor:
+            comp = batch[insp["component_id"]]
+            yield {
+                **insp,
+                "inspection_id": insp["_id"],
+                "component_id": comp.get("component_id"),
+                "component_name": comp.get("component_name"),
+                "batch_number": comp.get("batch_number"),
+            }
+
+    return _export_response(stream_export(rows(), EXPORT_INSPECTION_COLUMNS, format, "Inspections"), format, "inspections")
+
+
+# Print-ready QR labels for a production batch or a generation date range
+@router.get("/components/labels.pdf")
+async def component_labels(
+    batch_number: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    layout: str = "a4",
+    copies: int = 1,
+    error_correction: Optional[str] = None,
+    border: int = 2,
+    manufacturer: ManufacturerPrincipal = Depends(get_current_manufacturer),
+):
+    """
+    layout=a4 (24 per sheet) or thermal (one 50 x 30 mm label per page). Pages
+    are streamed as they are laid out, in generation order.
+    """
+    if layout not in LABEL_LAYOUTS:
+        raise HTTPException(status_code=400, detail=f"layout must be one of {', '.join(LABEL_LAYOUTS)}")
+    if not (batch_number or start or end):
+        raise HTTPException(status_code=400, detail="Give a batch_number or a start/end date range")
+    if not 1 <= copies <= 10:
+        raise HTTPException(status_code=400, detail="copies must be between 1 and 10")
+    try:
+        opts = qr_options(error_correction, border=border)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    query = _export_query(manufacturer.id, start, end, batch_number, None)
+    if not await components_collection.find_one(query, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="No components match")
+    cursor = components_collection.find(query, {f: 1 for f, _ in CAPTION_FIELDS}).sort(
+        [("generated_at", 1), ("_id", 1)]
+    ).batch_size(EXPORT_BATCH_SIZE)
+    filename = f"labels-{batch_number or 'range'}.pdf"
+    return StreamingResponse(
+        stream_label_pdf(cursor, LABEL_LAYOUTS[layout], opts, copies),
+        media_type="application/pdf",
+        headers={"Content-Disposition": _attachment(filename)},
+    )
+
+
+@router.get("/components/daily_stats")
+async def daily_stats(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    names: Optional[str] = None,
+    live: bool = False,
+    manufacturer: ManufacturerPrincipal = Depends(get_current_manufacturer),
+):
+    """
+    Per-day, per-component-name counts with a qc_status breakdown for an
+    inclusive [start, end] range of YYYY-MM-DD days. Served from the
+    component_daily_stats rollup; live=true runs the $group pipeline over
+    components instead.
+    """
+    manufacturer_id = manufacturer.id
+
+    start_day = _parse_day(start, "start")
+    end_day = _parse_day(end, "end")
+    name_list = [n.strip() for n in names.split(",") if n.strip()] if names else None
+
+    if live:
+        pipeline = daily_counts_pipeline(
+            manufacturer_id,
+            datetime.combine(start_day, datetime.min.time()) if start_day else None,
+            datetime.combine(end_day + timedelta(days=1), datetime.min.time()) if end_day else None,
+            name_list,
+        )
+        rows = await components_collection.aggregate(pipeline).to_list(None)
+    else:
+        query = {"manufacturer_id": manufacturer_id}
+        if start_day or end_day:
+            query["date"] = {}
+            if start_day:
+                query["date"]["$gte"] = start_day.isoformat()
+            if end_day:
+                query["date"]["$lte"] = end_day.isoformat()
+        if name_list:
+            query["component_name"] = {"$in": name_list}
+        rows = await component_daily_stats_collection.find(
+            query, {"_id": 0, "manufacturer_id": 0}
+        ).sort([("date", 1), ("component_name", 1)]).to_list(None)
+
+    for row in rows:
+        row.pop("manufacturer_id", None)
+    return {"stats": rows}
+
+
+@router.get("/components/daily_counts_by_date", response_model=dict)
+async def daily_counts_by_date(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    names: Optional[str] = None,
+    manufacturer: ManufacturerPrincipal = Depends(get_current_manufacturer),
+):
+    """
+    Returns a dict of {date: {component_name: count, ...}, ...} for this manufacturer,
+    optionally limited to a start/end day range and a comma-separated list of names.
+    """
+    stats = await daily_stats(start=start, end=end, names=names, live=False, manufacturer=manufacturer)
+    counts_by_date = {}
+    for row in stats["stats"]:
+        counts_by_date.setdefault(row["date"], {})[row["component_name"]] = row["count"]
+    return {"counts_by_date": counts_by_date}
 
 @router.get("/components/{component_id}")
-async def get_component(component_id: str, username: str = Depends(get_current_manufacturer)):
-    manufacturer = await manufacturers_collection.find_one({"username": username})
-    if not manufacturer:
-        raise HTTPException(status_code=404, detail="Manufacturer not found")
-    
+async def get_component(component_id: str, manufacturer: ManufacturerPrincipal = Depends(get_current_manufacturer)):
     try:
         component = await components_collection.find_one({
             "_id": ObjectId(component_id),
-            "manufacturer_id": str(manufacturer["_id"])
-        })
+            "manufacturer_id": manufacturer.id
+        }, COMPONENT_PROJECTION)
         if not component:
             raise HTTPException(status_code=404, detail="Component not found")
         
-        return {"component": {**component, "_id": str(component["_id"])}}
+        return {"component": {**component, "_id": str(component["_id"]), "qr_url": qr_url(component["_id"])}}
     except Exception as e:
         raise HTTPException(status_code=400, detail="Invalid component ID")
         raise HTTPException(status_code=404, detail="Manufacturer not found")
     try:
         component = await components_collection.find_one({
             "_id": ObjectId(component_id),
-            "manufacturerId": ObjectId(str(manufacturer["_id"]))
+            "manufacturerId": ObjectId(manufacturer.id)
         })
         if not component:
             raise HTTPException(status_code=404, detail="Component not found")
@@ -166,8 +585,8 @@ async def get_component(component_id: str, username: str = Depends(get_current_m
         raise HTTPException(status_code=400, detail="Invalid component ID")
 
 @router.get("/profile", response_model=dict)
-async def get_manufacturer_profile(email: str = Depends(get_current_manufacturer)):
-    manufacturer = await manufacturers_collection.find_one({"email": email})
+async def get_manufacturer_profile(principal: ManufacturerPrincipal = Depends(get_current_manufacturer)):
+    manufacturer = await manufacturers_collection.find_one({"email": principal.username})
     if not manufacturer:
         raise HTTPException(status_code=404, detail="Manufacturer not found")
     return {
@@ -180,34 +599,3 @@ async def get_manufacturer_profile(email: str = Depends(get_current_manufacturer
             "createdAt": manufacturer["createdAt"],
         }
     }
-
-@router.get("/components/daily_counts_by_date?date={date}", response_model=dict)
-async def daily_counts_by_date(date: str, username: str = Depends(get_current_manufacturer)):
-    """
-    Returns a dict of {date: {component_name: count, ...}, ...} for all days for this manufacturer.
-    """
-    manufacturer = await manufacturers_collection.find_one({"username": username})
-    if not manufacturer:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Manufacturer not found")
-    manufacturer_id = str(manufacturer["_id"])
-
-    component_types = [
-        "Rail Clip",
-        "Fish Plate",
-        "Rail Pad",
-        "Base Plate"
-    ]
-    counts_by_date = {}
-    cursor = components_collection.find({"manufacturer_id": manufacturer_id})
-    async for c in cursor:
-        comp_name = c.get("component_name")
-        gen_at = c.get("generated_at")
-        if comp_name in component_types and gen_at:
-            try:
-                date_str = gen_at.date().isoformat() if hasattr(gen_at, 'date') else str(gen_at)[:10]
-            except Exception:
-                continue
-            if date_str not in counts_by_date:
-                counts_by_date[date_str] = {name: 0 for name in component_types}
-            counts_by_date[date_str][comp_name] += 1
-    return {"counts_by_date": counts_by_date}
\ No newline at end of file
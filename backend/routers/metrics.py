@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Response
+from core.metrics import CallbackMetric, render_metrics
+from core.security import password_pool_stats, token_cache, manufacturer_cache
+from db.resolvers import manufacturer_name_cache, component_view_cache
+from core.events import event_bus
+from core.qr import render_cache
+from core.jobs import job_queue
+from core.invalidation import invalidation_bus
+from core.forecast import forecast_service
+from db.client import pool_stats
+
+router = APIRouter()
+
+_CACHES = {
+    "token": token_cache,
+    "manufacturer": manufacturer_cache,
+    "manufacturer_name": manufacturer_name_cache,
+    "component_view": component_view_cache.local,
+    "qr_render": render_cache,
+    "forecast": forecast_service.cache,
+}
+
+
+def _cache_requests():
+    values = {}
+    for name, cache in _CACHES.items():
+        values[(name, "hit")] = cache.hits
+        values[(name, "miss")] = cache.misses
+    values[("component_view_shared", "hit")] = component_view_cache.shared_hits
+    values[("component_view_shared", "miss")] = component_view_cache.shared_misses
+    return values
+
+
+CallbackMetric("cache_requests_total", "Cache lookups by cache and result", _cache_requests,
+               ("cache", "result"), kind="counter")
+CallbackMetric("cache_entries", "Entries held per in-process cache",
+               lambda: {(name, ): len(cache) for name, cache in _CACHES.items()}, ("cache",))
+CallbackMetric("password_pool_tasks", "bcrypt work queued for or running on the hashing pool",
+               lambda: {("queued",): password_pool_stats["queued"], ("in_flight",): password_pool_stats["in_flight"]},
+               ("state",))
+CallbackMetric("password_pool_rejected_total", "Password checks shed with 503 because the queue was full",
+               lambda: password_pool_stats["rejected"], kind="counter")
+
+CallbackMetric("event_subscribers", "Open SSE/WebSocket event subscriptions", lambda: len(event_bus.subscriptions))
+CallbackMetric("events_published_total", "Component lifecycle events published", lambda: event_bus.published,
+               kind="counter")
+CallbackMetric("events_dropped_total", "Events dropped because a subscriber fell behind", lambda: event_bus.dropped,
+               kind="counter")
+CallbackMetric("mongo_pool_connections", "Pooled MongoDB connections by state",
+               lambda: {(state,): value for state, value in pool_stats().items()
+                        if state in ("open", "in_use", "waiting")}, ("state",))
+CallbackMetric("mongo_pool_max_size", "Configured maxPoolSize per worker", lambda: pool_stats()["max_size"])
+CallbackMetric("mongo_pool_checkout_failures_total", "Connection check-outs that failed or timed out",
+               lambda: pool_stats()["checkout_failures"], kind="counter")
+CallbackMetric("cache_invalidations_total", "Cross-worker cache invalidations by direction",
+               lambda: {("published",): invalidation_bus.published, ("applied",): invalidation_bus.applied},
+               ("direction",), kind="counter")
+CallbackMetric("jobs_running", "Background jobs running in this process", lambda: job_queue.running)
+CallbackMetric("forecast_frame_components", "Components held in this worker's forecast frame",
+               lambda: forecast_service.frame.size)
+CallbackMetric("forecast_frame_refreshes_total", "Forecast frame full loads and incremental top-ups",
+               lambda: {("load",): forecast_service.loads, ("top_up",): forecast_service.refreshes},
+               ("kind",), kind="counter")
+
+
+# Prometheus scrape target; values are per worker process
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,131 @@
+import base64
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from bson import ObjectId
+from qrcode.exceptions import DataOverflowError
+from db.client import components_collection
+from core.security import get_current_user
+from core.blobstore import get_blob_store, content_key
+from core.qr import render_qr_png_async, render_qr_async, qr_options, QROptions, QR_FORMATS
+
+router = APIRouter()
+
+# The image for a component never changes, so clients may keep it indefinitely
+QR_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+async def ensure_qr_image(component: dict):
+    """
+    Returns (key, png) for a component's QR image, rendering and storing it on
+    first request. Legacy inline qr_data is moved into the store on the way.
+    """
+    store = get_blob_store()
+    key = component.get("qr_ref")
+    png = await store.get(key) if key else None
+    if png is not None:
+        return key, png
+
+    legacy = component.get("qr_data")
+    if legacy:
+        png = base64.b64decode(legacy.split(",", 1)[-1])
+    else:
+        png = await render_qr_png_async(str(component["_id"]))
+    key = await store.put(png)
+    await components_collection.update_one(
+        {"_id": component["_id"]},
+        {"$set": {"qr_ref": key}, "$unset": {"qr_data": ""}}
+    )
+    return key, png
+
+
+def _object_id(component_id: str) -> ObjectId:
+    try:
+        return ObjectId(component_id)
+    except:
+        raise HTTPException(status_code=400, detail="Invalid component ID format")
+
+
+def _options(error_correction, version, box_size, border) -> QROptions:
+    try:
+        return qr_options(error_correction, version, box_size, border)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _rendered_response(component_id: str, format: str, opts: QROptions, request: Request) -> Response:
+    """Any format/options other than the stored default PNG, rendered through the render cache."""
+    object_id = _object_id(component_id)
+    if not await components_collection.find_one({"_id": object_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Component not found")
+
+    # the output is a pure function of these, so the ETag is known before rendering
+    etag = f'"{content_key(f"{object_id}|{format}|{tuple(opts)}".encode())}"'
+    headers = {"ETag": etag, "Cache-Control": QR_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    try:
+        data = await render_qr_async(str(object_id), format, opts)
+    except DataOverflowError:
+        raise HTTPException(status_code=400, detail="Payload does not fit the requested QR version")
+    return Response(content=data, media_type=QR_FORMATS[format], headers=headers)
+
+
+@router.get("/{component_id}.png")
+async def get_qr_image(
+    component_id: str,
+    request: Request,
+    error_correction: Optional[str] = None,
+    version: Optional[int] = None,
+    box_size: Optional[int] = None,
+    border: Optional[int] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    """The default rendering comes from the blob store; any option override is rendered on demand."""
+    opts = _options(error_correction, version, box_size, border)
+    if opts != QROptions():
+        return await _rendered_response(component_id, "png", opts, request)
+
+    object_id = _object_id(component_id)
+    component = await components_collection.find_one({"_id": object_id}, {"qr_ref": 1, "qr_data": 1})
+    if not component:
+        raise HTTPException(status_code=404, detail="Component not found")
+
+    key = component.get("qr_ref")
+    if key and request.headers.get("if-none-match") == f'"{key}"':
+        return Response(status_code=304, headers={"ETag": f'"{key}"', "Cache-Control": QR_CACHE_CONTROL})
+
+    key, png = await ensure_qr_image(component)
+    return Response(
+        content=png,
+        media_type="image/png",
+        headers={"ETag": f'"{key}"', "Cache-Control": QR_CACHE_CONTROL},
+    )
+
+
+# Vector label, scales to any print size
+@router.get("/{component_id}.svg")
+async def get_qr_svg(
+    component_id: str,
+    request: Request,
+    error_correction: Optional[str] = None,
+    version: Optional[int] = None,
+    box_size: Optional[int] = None,
+    border: Optional[int] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    opts = _options(error_correction, version, box_size, border)
+    return await _rendered_response(component_id, "svg", opts, request)
+
+
+# Packed module matrix for clients that draw the code themselves
+@router.get("/{component_id}.matrix")
+async def get_qr_matrix(
+    component_id: str,
+    request: Request,
+    error_correction: Optional[str] = None,
+    version: Optional[int] = None,
+    border: Optional[int] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    opts = _options(error_correction, version, None, border)
+    return await _rendered_response(component_id, "matrix", opts, request)
@@ -0,0 +1,42 @@
+"""
+Production entry point: N uvicorn worker processes sharing one listening socket.
+
+    python serve.py [--workers N] [--host 0.0.0.0] [--port 8000]
+
+Workers are spawned rather than forked, so each one imports the app itself
+and creates its own Motor client, caches and CPU pools in its lifespan.
+The supervisor restarts workers that die. On SIGTERM each worker first
+answers 503 "draining" on /health/ready for DRAIN_DELAY_SECONDS, then stops
+accepting and gets SHUTDOWN_GRACE_SECONDS to finish in-flight requests.
+--workers defaults to WEB_CONCURRENCY, else the number of cores.
+"""
+import os
+import argparse
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with several worker processes")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", 0)) or os.cpu_count() or 1)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    # every worker's core.config reads this to size its share of the CPU pools
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    from core.config import SHUTDOWN_GRACE_SECONDS
+
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level,
+        proxy_headers=True,
+        timeout_graceful_shutdown=SHUTDOWN_GRACE_SECONDS,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Tests run against mongomock-motor (see benchmarks.common.use_mock_mongo), so
+they need no MongoDB server.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("JOB_WORKERS", "0")
+
+from benchmarks.common import use_mock_mongo
+
+use_mock_mongo()
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="session")
+def client():
+    import main
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def login(client, username: str, role: str) -> dict:
+    client.post("/auth/register", json={"username": username, "email": f"{username}@example.com", "password": "pw",
+                                        "phone": "1", "role": role, "company_name": "ACME"})
+    response = client.post("/auth/login", json={"username": username, "password": "pw", "role": role})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture(scope="session")
+def manufacturer(client):
+    return login(client, "manufacturer_1", "MANUFACTURER")
+
+
+@pytest.fixture(scope="session")
+def inspector(client):
+    return login(client, "inspector_1", "FIELD_INSPECTOR")
+
+
+@pytest.fixture
+def component(client, manufacturer):
+    response = client.post("/manufacturer/components/generate_qr", headers=manufacturer, json={
+        "item_code": "ERC-MK-V", "component_name": "Rail Clip", "specifications": {"material": "steel"},
+        "production_date": "2026-01-01T00:00:00", "unit_weight": 1.2, "irs_specification": "IRS-T-31",
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["component"]
@@ -0,0 +1,32 @@
+COMPONENT = {
+    "item_code": "ERC-MK-V", "component_name": "Rail Clip", "specifications": {"material": "steel"},
+    "production_date": "2026-01-01T00:00:00", "unit_weight": 1.2, "irs_specification": "IRS-T-31",
+}
+
+
+def test_generate_qr_codes_are_unique_for_shared_uuid_suffixes(client, manufacturer):
+    codes = set()
+    for uuid in ("aaaaaaaa-0000-0000-0000-000012345678", "bbbbbbbb-0000-0000-0000-000012345678"):
+        response = client.post("/manufacturer/components/generate_qr", headers=manufacturer, json={**COMPONENT, "uuid": uuid})
+        assert response.status_code == 200, response.text
+        codes.add(response.json()["component"]["qr_code"])
+    assert len(codes) == 2
+
+
+def test_generate_qr_rejects_existing_uuid(client, manufacturer):
+    body = {**COMPONENT, "uuid": "cccccccc-0000-0000-0000-000000000001"}
+    assert client.post("/manufacturer/components/generate_qr", headers=manufacturer, json=body).status_code == 200
+    assert client.post("/manufacturer/components/generate_qr", headers=manufacturer, json=body).status_code == 409
+
+
+def test_bulk_insert_reports_rows_with_an_existing_uuid(client, manufacturer, component):
+    from db.models.component import ComponentIn
+    from core.components import build_component_doc
+    from routers.manufacturer import _insert_new
+
+    owner = component["manufacturer_id"]
+    clash = build_component_doc(ComponentIn(**COMPONENT, uuid=component["uuid"]), owner, "COMP20260101990001")
+    fresh = build_component_doc(ComponentIn(**COMPONENT), owner, "COMP20260101990002")
+    written, failed = client.portal.call(_insert_new, [clash, fresh], owner)
+    assert [d["component_id"] for d in written] == ["COMP20260101990002"]
+    assert [(f["row"], f["component_id"]) for f in failed] == [(0, "COMP20260101990001")]
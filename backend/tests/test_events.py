@@ -0,0 +1,25 @@
+from core.events import events_from_change
+
+COMPONENT = {"_id": "665f1c2e9b1e8a3d4c2b1a01", "component_id": "COMP20260101000001", "status": "Installed"}
+
+
+def _update(**fields) -> dict:
+    return {"operationType": "update", "fullDocument": COMPONENT, "updateDescription": {"updatedFields": fields}}
+
+
+def _types(change: dict) -> list:
+    return [e["type"] for e in events_from_change(change)]
+
+
+def test_first_ok_inspection_is_not_a_replacement():
+    change = _update(inspection_count=1, defect_count=0, defect_rate=0.0, last_inspection_status="OK")
+    assert _types(change) == ["component.inspected"]
+
+
+def test_defect_inspection_needs_replacement():
+    change = _update(inspection_count=3, defect_count=1, status="Needs Replacement")
+    assert _types(change) == ["component.inspected", "component.needs_replacement"]
+
+
+def test_repeat_defect_on_flagged_component_needs_replacement():
+    assert _types(_update(inspection_count=4, defect_count=2)) == ["component.inspected", "component.needs_replacement"]
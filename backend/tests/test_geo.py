@@ -0,0 +1,23 @@
+import pytest
+
+
+@pytest.mark.parametrize("area", [
+    {"polyline": [[77.59]]},
+    {"polyline": [[77.59, 12.97, 0]]},
+    {"polyline": [[77.59, 95.0]]},
+    {"polygon": [[181, 0], [0, 1], [1, 1]]},
+    {"polyline": [[77.59, 12.97]], "buffer_m": -5},
+    {"polyline": [[77.59, 12.97]], "buffer_m": 0},
+])
+def test_within_rejects_malformed_areas(client, inspector, area):
+    assert client.post("/components/within", headers=inspector, json=area).status_code == 422
+
+
+def test_within_requires_an_area(client, inspector):
+    assert client.post("/components/within", headers=inspector, json={"polygon": [[77.5, 12.9]]}).status_code == 400
+
+
+@pytest.mark.parametrize("radius_m", ["-5", "0", "nan", "inf", "1e9"])
+def test_near_rejects_bad_radii(client, inspector, radius_m):
+    params = {"lat": 12.97, "lon": 77.59, "radius_m": radius_m}
+    assert client.get("/components/near", headers=inspector, params=params).status_code == 422
@@ -0,0 +1,18 @@
+import re
+import zlib
+from tests.test_components import COMPONENT
+
+
+def test_label_pdf_encodes_winansi_captions_and_filename(client, manufacturer):
+    batch = "बैच–7"
+    body = {**COMPONENT, "serial_number": "SER–01 “€”", "batch_number": batch}
+    assert client.post("/manufacturer/components/generate_qr", headers=manufacturer, json=body).status_code == 200
+
+    response = client.get("/manufacturer/components/labels.pdf", headers=manufacturer, params={"batch_number": batch})
+    assert response.status_code == 200, response.text
+    assert response.content.rstrip().endswith(b"%%EOF")
+    disposition = response.headers["content-disposition"]
+    assert 'filename="labels-' in disposition and "filename*=UTF-8''labels-" in disposition
+
+    streams = [zlib.decompress(m) for m in re.findall(rb"stream\n(.*?)\nendstream", response.content, re.S)]
+    assert any("(SER–01 “€”)".encode("cp1252") in s for s in streams)
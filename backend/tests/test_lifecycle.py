@@ -0,0 +1,29 @@
+import os
+import signal
+import asyncio
+
+
+def test_sigterm_fails_readiness_before_the_server_handler_runs():
+    from db.lifecycle import drain_on_sigterm, readiness
+
+    calls = []
+    original = signal.signal(signal.SIGTERM, lambda signum, frame: calls.append(signum))
+    saved = dict(readiness)
+
+    async def run():
+        drain_on_sigterm(0.2)
+        os.kill(os.getpid(), signal.SIGTERM)
+        await asyncio.sleep(0.05)
+        draining_early = (readiness["draining"], list(calls))
+        await asyncio.sleep(0.3)
+        return draining_early
+
+    try:
+        readiness.update(ready=True, draining=False)
+        draining, calls_before = asyncio.run(run())
+        assert draining is True
+        assert calls_before == []
+        assert calls == [signal.SIGTERM]
+    finally:
+        signal.signal(signal.SIGTERM, original)
+        readiness.update(saved)
@@ -0,0 +1,20 @@
+from datetime import datetime
+
+
+def test_inspection_stats_skips_unusable_component_ids(client, component):
+    from bson import ObjectId
+    from db.client import inspections_collection, components_collection
+    from db.migrations import inspection_stats
+
+    oid = ObjectId(component["_id"])
+    client.portal.call(inspections_collection.insert_many, [
+        {"component_id": "legacy-42", "status": "OK", "inspected_at": datetime(2026, 1, 1)},
+        {"component_id": str(oid), "status": "DEFECTED", "inspected_at": datetime(2026, 1, 2)},
+        {"component_id": str(oid), "status": "OK", "inspected_at": datetime(2026, 1, 3)},
+    ])
+    client.portal.call(inspection_stats)
+
+    summary = client.portal.call(components_collection.find_one, {"_id": oid})
+    assert summary["inspection_count"] == 2
+    assert summary["defect_count"] == 1
+    assert summary["last_inspection_status"] == "OK"
@@ -0,0 +1,14 @@
+import json
+
+
+def test_ndjson_listing_rejects_a_bad_cursor_before_streaming(client, inspector):
+    response = client.get("/components/", headers=inspector, params={"format": "ndjson", "cursor": "garbage"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_ndjson_listing_streams_components(client, inspector, component):
+    response = client.get("/components/", headers=inspector, params={"format": "ndjson"})
+    assert response.status_code == 200
+    ids = [json.loads(line)["component_id"] for line in response.text.splitlines()]
+    assert component["component_id"] in ids
@@ -0,0 +1,28 @@
+def _inspection(component_id: str, key: str, status: str = "OK") -> dict:
+    return {"component_id": component_id, "status": status, "comments": "", "idempotency_key": key}
+
+
+def _component(client, headers, component_id: str) -> dict:
+    response = client.get(f"/components/{component_id}", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_sync_repeated_key_within_batch_is_written_once(client, inspector, component):
+    cid = component["_id"]
+    items = [_inspection(cid, "dup-1", "DEFECTED"), _inspection(cid, "dup-1", "DEFECTED")]
+
+    response = client.post("/inspection/sync", headers=inspector, json={"inspections": items})
+    assert response.status_code == 200, response.text
+    first, second = response.json()["inspections"]
+    assert first["status"] == "created"
+    assert second["status"] == "duplicate"
+    assert second["id"] == first["id"]
+
+    history = client.get(f"/inspection/history/{cid}", headers=inspector).json()
+    assert [h["inspection_id"] for h in history] == [first["id"]]
+    summary = _component(client, inspector, cid)
+    assert summary["inspection_count"] == 1
+    assert summary["defect_count"] == 1
+    assert summary["status"] == "Needs Replacement"
+
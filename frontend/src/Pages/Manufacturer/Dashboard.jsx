@@ -150,10 +150,43 @@ const ManufacturerDashboard = () => {
     fetchManufacturerDetails();
   }, []);
 
+  // Live updates instead of polling: patch the row an event is about, or
+  // refetch when it's a component we don't have or events were dropped
+  useEffect(() => {
+    const source = new EventSource(`${api.defaults.baseURL}/events/stream`, { withCredentials: true });
+    const onEvent = (e) => {
+      const event = JSON.parse(e.data);
+      setComponents((prev) => {
+        if (event.dropped || !prev.some((c) => c._id === event._id)) {
+          fetchComponents();
+          return prev;
+        }
+        return prev.map((c) =>
+          c._id === event._id
+            ? { ...c, status: event.status, last_inspection_status: event.last_inspection_status }
+            : c
+        );
+      });
+    };
+    ["component.created", "component.installed", "component.inspected", "component.needs_replacement"].forEach(
+      (type) => source.addEventListener(type, onEvent)
+    );
+    return () => source.close();
+  }, []);
+
   const fetchComponents = async () => {
     try {
-      const response = await api.get("/manufacturer/components/list");
-      setComponents(response.data.components || []);
+      // The list endpoint is paged; follow next_cursor until the last page
+      let all = [];
+      let cursor = null;
+      do {
+        const response = await api.get("/manufacturer/components/list", {
+          params: { limit: 500, ...(cursor ? { cursor } : {}) },
+        });
+        all = all.concat(response.data.components || []);
+        cursor = response.data.next_cursor;
+      } while (cursor);
+      setComponents(all);
     } catch (error) {
       toast.error("Failed to fetch components");
     }
@@ -731,7 +764,13 @@ const ManufacturerDashboard = () => {
                         </td>
                         <td className="px-6 py-4">
                           <button
-                            onClick={() => setQrModal(component.qr_data)}
+                            onClick={() =>
+                              setQrModal(
+                                component.qr_url
+                                  ? `${api.defaults.baseURL}${component.qr_url}`
+                                  : component.qr_data
+                              )
+                            }
                             className="px-4 py-2 bg-blue-600 hover:bg-blue-700 text-white rounded-lg transition duration-300 text-sm"
                           >
                             View QR